@@ -0,0 +1,131 @@
+# cli.py
+#
+# Interface de linha de comando do F.A.L.C.O.N. (sem Qt), para rodar em
+# servidores / render farms:
+#
+#   python main.py batch imagens/ -o svgs/ --epsilon 1.0 --workers 8 --timeout 120
+#   python cli.py batch "scans/**/*.png" -o svgs/ --recursive
+#   python main.py bench --scale 0.5 -o relatorio.json
+import argparse
+import sys
+
+from core import node_optimization, primitives, shape_dedup
+from utils import batch_processing, benchmark
+
+def _optional_int(value: str) -> int | None:
+    return None if value.lower() in ("none", "0") else int(value)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="falcon", description="F.A.L.C.O.N. - vetorização sem interface gráfica.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser("batch", help="Vetoriza um diretório ou padrão glob de imagens em paralelo.")
+    batch.add_argument("inputs", nargs="+", help="Diretórios, padrões glob ou arquivos de imagem.")
+    batch.add_argument("-o", "--output-dir", required=True, help="Diretório de saída dos SVGs.")
+    batch.add_argument("-r", "--recursive", action="store_true", help="Percorre subdiretórios.")
+    batch.add_argument("-j", "--workers", type=int, default=None,
+                       help="Número de processos (padrão: número de CPUs).")
+    batch.add_argument("--timeout", type=float, default=None, help="Tempo máximo por arquivo, em segundos.")
+    batch.add_argument("-f", "--force", action="store_true", help="Reprocessa mesmo os SVGs já atualizados.")
+    batch.add_argument("-v", "--verbose", action="store_true", help="Mostra a saída de cada etapa do pipeline.")
+    batch.add_argument("--cache-dir", default=None,
+                       help="Cache das etapas (detecção, simplificação): reexecuções só refazem o que mudou.")
+
+    pipeline = batch.add_argument_group("pipeline")
+    defaults = batch_processing.DEFAULT_PIPELINE_PARAMETERS
+    pipeline.add_argument("--blur", type=int, default=defaults["blur_ksize"], help="Kernel do GaussianBlur (ímpar).")
+    pipeline.add_argument("--tile-size", type=_optional_int, default=defaults["tile_size"],
+                          help="Detecta contornos em blocos deste tamanho (imagens gigantes).")
+    pipeline.add_argument("--colors", type=_optional_int, default=defaults["colors"],
+                          help="Modo paleta: quantiza em K cores e exporta um grupo preenchido por cor.")
+    pipeline.add_argument("--compound", action="store_true",
+                          help="Caminhos compostos: cada contorno externo leva os seus furos (fill-rule evenodd).")
+    pipeline.add_argument("--subpixel", action="store_true",
+                          help="Contornos sub-pixel (marching squares): menos nós para a mesma fidelidade.")
+    pipeline.add_argument("--simplification", choices=list(node_optimization.SIMPLIFICATION_METHODS),
+                          default=defaults["simplification"],
+                          help="Algoritmo de simplificação: rdp (Douglas–Peucker) ou vw (Visvalingam–Whyatt).")
+    pipeline.add_argument("--epsilon", type=float, default=defaults["epsilon"],
+                          help="Tolerância da simplificação: distância (px) no rdp, área mínima (px²) no vw "
+                               "(omitido = sem simplificação).")
+    pipeline.add_argument("--max-nodes", type=_optional_int, default=defaults["max_nodes"],
+                          help="Orçamento global: total máximo de nós, distribuídos entre todos os caminhos "
+                               "pela significância de cada vértice.")
+    pipeline.add_argument("--max-svg-bytes", type=_optional_int, default=defaults["max_svg_bytes"],
+                          help="Orçamento global: tamanho máximo do SVG em bytes (exato sem --compact e sem Bézier).")
+    pipeline.add_argument("--primitives", type=float, nargs="?", const=primitives.DEFAULT_TOLERANCE,
+                          default=defaults["primitives"], metavar="TOL",
+                          help="Troca contornos que são círculos, elipses, retângulos, polígonos ou retas por "
+                               "elementos SVG nativos (erro máximo TOL px, padrão %(const)s).")
+    pipeline.add_argument("--dedup", choices=list(shape_dedup.DEDUP_MODES), nargs="?", const="translation",
+                          default=defaults["dedup"],
+                          help="Formas repetidas viram um <symbol> e um <use> por ocorrência; só um representante "
+                               "é simplificado e ajustado. similarity também junta formas giradas e em outra escala.")
+    pipeline.add_argument("--topology", action="store_true",
+                          help="Simplificação que preserva a topologia: bordas compartilhadas (ex.: entre as "
+                               "camadas de --colors) viram arcos simplificados uma única vez, sem frestas.")
+    pipeline.add_argument("--bezier-tolerance", type=float, default=defaults["bezier_tolerance"],
+                          help="Erro máximo (px) do ajuste de curvas Bézier (omitido = só linhas).")
+    pipeline.add_argument("--stroke-color", default=defaults["stroke_color"])
+    pipeline.add_argument("--stroke-width", default=defaults["stroke_width"])
+    pipeline.add_argument("--fill-color", default=defaults["fill_color"])
+    pipeline.add_argument("--compact", action="store_true",
+                          help="Codificação compacta do 'd' (comandos relativos, h/v, separadores mínimos).")
+    pipeline.add_argument("--precision", type=int, default=defaults["precision"],
+                          help="Casas decimais das coordenadas no modo compacto.")
+    pipeline.add_argument("--svgz", action="store_true", help="Grava SVGs comprimidos com gzip (.svgz).")
+
+    bench = subparsers.add_parser("bench", help="Mede as etapas do pipeline em um corpus sintético e compara com a linha de base.")
+    bench.add_argument("--images", nargs="+", choices=list(benchmark.CORPUS), default=None,
+                       help="Imagens do corpus (padrão: todas).")
+    bench.add_argument("--scale", type=float, default=1.0, help="Escala das dimensões das imagens do corpus.")
+    bench.add_argument("--repeats", type=int, default=3, help="Execuções por imagem (vale a mediana do tempo de cada etapa).")
+    bench.add_argument("-o", "--output", default=None, help="Grava o relatório JSON neste arquivo.")
+    bench.add_argument("--baseline", default=benchmark.DEFAULT_BASELINE_PATH, help="Arquivo da linha de base.")
+    bench.add_argument("--update-baseline", action="store_true", help="Grava o resultado como a nova linha de base.")
+    bench.add_argument("--time-tolerance", type=float, default=benchmark.DEFAULT_TOLERANCES["seconds"],
+                       help="Aumento relativo de tempo tolerado (0.5 = 50%%).")
+    bench.add_argument("--no-memory", action="store_true", help="Não mede o pico de memória de cada etapa.")
+    bench.add_argument("-v", "--verbose", action="store_true", help="Mostra a saída de cada etapa do pipeline.")
+    return parser
+
+def _pipeline_parameters(args: argparse.Namespace) -> dict:
+    return {
+        "blur_ksize": args.blur,
+        "tile_size": args.tile_size,
+        "colors": args.colors,
+        "compound": args.compound,
+        "subpixel": args.subpixel,
+        "simplification": args.simplification,
+        "epsilon": args.epsilon,
+        "max_nodes": args.max_nodes,
+        "max_svg_bytes": args.max_svg_bytes,
+        "primitives": args.primitives,
+        "dedup": args.dedup,
+        "topology": args.topology,
+        "bezier_tolerance": args.bezier_tolerance,
+        "stroke_color": args.stroke_color,
+        "stroke_width": args.stroke_width,
+        "fill_color": args.fill_color,
+        "compact": args.compact,
+        "precision": args.precision,
+        "svgz": args.svgz,
+    }
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "batch":
+        summary = batch_processing.run_batch(
+            args.inputs, args.output_dir, _pipeline_parameters(args),
+            workers=args.workers, timeout=args.timeout, recursive=args.recursive,
+            force=args.force, verbose=args.verbose, cache_dir=args.cache_dir)
+        return 1 if summary["failed"] or summary["timed_out"] else 0
+    if args.command == "bench":
+        return benchmark.run_benchmark(
+            args.images, scale=args.scale, repeats=args.repeats, output_path=args.output,
+            baseline_path=args.baseline, update_baseline=args.update_baseline,
+            tolerances={"seconds": args.time_tolerance}, measure_memory=not args.no_memory, verbose=args.verbose)
+    return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# core/color_layers.py
+#
+# Modo paleta: em vez de um único limiar (tons de cinza + Otsu), a imagem é
+# quantizada em K cores (k-means) e cada cor vira uma camada: uma máscara
+# binária traçada com RETR_CCOMP em caminhos compostos (externo + furos,
+# preenchidos com evenodd). As camadas são traçadas em paralelo em um pool de
+# processos, que lê o mapa de rótulos de um bloco de memória compartilhada.
+# Com shared_boundaries, as bordas seguem os cantos dos pixels (marching
+# squares sobre a máscara), e camadas vizinhas compartilham os mesmos vértices.
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+try:
+    from core.path_set import PathSet, PATH_CLOSED, PATH_HOLE
+    from core.contour_detection import compound_contour_order
+    from core.marching_squares import trace_label_boundaries
+except ModuleNotFoundError:
+    from path_set import PathSet, PATH_CLOSED, PATH_HOLE
+    from contour_detection import compound_contour_order
+    from marching_squares import trace_label_boundaries
+
+DEFAULT_MIN_AREA = 4.0 # Caminhos (externos ou furos) menores que isto, em px², são descartados
+_KMEANS_SAMPLE_SIZE = 200_000 # Pixels usados para ajustar os centros; a atribuição usa todos
+_ASSIGN_CHUNK_PIXELS = 1 << 20
+
+def quantize_colors(image: np.ndarray, color_count: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Quantiza uma imagem BGR em até color_count cores com k-means.
+
+    Os centros são ajustados (cv2.kmeans, k-means++) sobre uma amostra dos
+    pixels; depois cada pixel recebe o centro mais próximo em blocos, com uma
+    multiplicação de matrizes por bloco.
+
+    Args:
+        image (np.ndarray): Imagem BGR (uint8).
+        color_count (int): Número de cores (1 a 256).
+        seed (int): Semente da amostragem e da inicialização (resultados reprodutíveis).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (rótulos (H, W) uint8, paleta (K, 3) BGR uint8),
+            com as cores ordenadas da mais frequente para a menos frequente.
+    """
+    if not 1 <= color_count <= 256:
+        raise ValueError(f"color_count deve estar entre 1 e 256 (recebido {color_count}).")
+    height, width = image.shape[:2]
+    pixels = image.reshape(-1, 3)
+    rng = np.random.default_rng(seed)
+    if len(pixels) > _KMEANS_SAMPLE_SIZE:
+        sample = pixels[rng.choice(len(pixels), size=_KMEANS_SAMPLE_SIZE, replace=False)]
+    else:
+        sample = pixels
+    sample = sample.astype(np.float32)
+    color_count = min(color_count, len(np.unique(sample, axis=0)))
+
+    cv2.setRNGSeed(seed)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.5)
+    _, _, centers = cv2.kmeans(sample, color_count, None, criteria, 2, cv2.KMEANS_PP_CENTERS)
+
+    # argmin ||p - c||² = argmin (||c||² - 2 p·c): ||p||² não muda entre os centros
+    center_norms = np.sum(centers * centers, axis=1)
+    labels = np.empty(len(pixels), dtype=np.uint8)
+    for start in range(0, len(pixels), _ASSIGN_CHUNK_PIXELS):
+        chunk = pixels[start:start + _ASSIGN_CHUNK_PIXELS].astype(np.float32)
+        labels[start:start + len(chunk)] = np.argmin(center_norms - 2.0 * (chunk @ centers.T), axis=1)
+
+    counts = np.bincount(labels, minlength=color_count)
+    order = np.argsort(-counts, kind="stable")
+    remap = np.empty(color_count, dtype=np.uint8)
+    remap[order] = np.arange(color_count, dtype=np.uint8)
+    palette = np.clip(np.rint(centers[order]), 0, 255).astype(np.uint8)
+    return remap[labels].reshape(height, width), palette
+
+def _trace_label(labels: np.ndarray, label: int, min_area: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Traça a máscara de um rótulo em caminhos compostos; devolve os arrays de um PathSet."""
+    mask = (labels == label).view(np.uint8)
+    contours, hierarchy = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    order, is_hole = compound_contour_order(hierarchy, len(contours))
+    kept = []
+    flags = []
+    outer_kept = False
+    for index, hole in zip(order.tolist(), is_hole.tolist()):
+        contour = contours[index]
+        large_enough = cv2.contourArea(contour) >= min_area
+        if not hole:
+            outer_kept = large_enough
+        if outer_kept and large_enough:
+            kept.append(contour)
+            flags.append(PATH_CLOSED | PATH_HOLE if hole else PATH_CLOSED)
+    path_set = PathSet.from_contours(kept)
+    return path_set.coords, path_set.offsets, np.array(flags, dtype=np.uint8)
+
+def _trace_label_boundaries(labels: np.ndarray, label: int, min_area: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Variante de _trace_label com as bordas sobre os cantos dos pixels (fronteiras
+    idênticas entre camadas vizinhas). Todos os anéis da camada formam um único
+    caminho composto: com evenodd, cada anel alterna entre dentro e fora.
+    """
+    path_set = trace_label_boundaries(labels, label)
+    if len(path_set):
+        x, y = path_set.coords[:, 0], path_set.coords[:, 1]
+        cross = x * np.roll(y, -1) - np.roll(x, -1) * y
+        # np.roll fecha só o último caminho: corrige o termo final de cada caminho
+        last = path_set.offsets[1:] - 1
+        first = path_set.offsets[:-1]
+        cross[last] = x[last] * y[first] - x[first] * y[last]
+        areas = 0.5 * np.abs(np.add.reduceat(cross, first))
+        path_set = path_set.subset(np.flatnonzero(areas >= min_area))
+    flags = np.full(len(path_set), PATH_CLOSED | PATH_HOLE, dtype=np.uint8)
+    flags[:1] = PATH_CLOSED
+    return path_set.coords, path_set.offsets, flags
+
+# --- Pool de processos: o mapa de rótulos fica em memória compartilhada ---
+
+_worker_memory: shared_memory.SharedMemory | None = None
+_worker_labels: np.ndarray | None = None
+
+def _init_layer_worker(memory_name: str, shape: tuple[int, int]):
+    global _worker_memory, _worker_labels
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_labels = np.ndarray(shape, dtype=np.uint8, buffer=_worker_memory.buf)
+
+def _trace_label_in_worker(label: int, min_area: float, shared_boundaries: bool = False):
+    trace = _trace_label_boundaries if shared_boundaries else _trace_label
+    return trace(_worker_labels, label, min_area)
+
+def _trace_all_labels(labels: np.ndarray, label_count: int, min_area: float,
+                      max_workers: int | None, use_processes: bool, shared_boundaries: bool = False) -> list[tuple]:
+    if not use_processes or label_count < 2:
+        trace = _trace_label_boundaries if shared_boundaries else _trace_label
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda label: trace(labels, label, min_area), range(label_count)))
+
+    memory = shared_memory.SharedMemory(create=True, size=max(labels.nbytes, 1))
+    try:
+        np.ndarray(labels.shape, dtype=np.uint8, buffer=memory.buf)[:] = labels
+        workers = min(max_workers or multiprocessing.cpu_count(), label_count)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_layer_worker,
+                                 initargs=(memory.name, labels.shape)) as executor:
+            return list(executor.map(_trace_label_in_worker, range(label_count), [min_area] * label_count,
+                                     [shared_boundaries] * label_count))
+    finally:
+        memory.close()
+        memory.unlink()
+
+def trace_color_layers(image: np.ndarray, color_count: int, blur_ksize: int = 5,
+                       min_area: float = DEFAULT_MIN_AREA, max_workers: int | None = None,
+                       use_processes: bool | None = None, shared_boundaries: bool = False) -> list[dict]:
+    """
+    Vetoriza uma imagem colorida em camadas, uma por cor da paleta.
+
+    Args:
+        image (np.ndarray): Imagem BGR (uint8).
+        color_count (int): Número de cores da paleta.
+        blur_ksize (int): Kernel do GaussianBlur aplicado antes da quantização (1 = sem desfoque).
+        min_area (float): Área mínima (px²) dos caminhos mantidos.
+        max_workers (int | None): Processos (ou threads) do traçado; None = número de CPUs.
+        use_processes (bool | None): Traça as camadas em processos (padrão) ou em threads.
+            None escolhe threads dentro de processos daemon (ex.: workers do modo batch),
+            que não podem criar processos filhos.
+        shared_boundaries (bool): Traça as bordas sobre os cantos dos pixels, em vez
+            dos centros (findContours): camadas vizinhas têm fronteiras com os mesmos
+            vértices, para a simplificação por arcos compartilhados (core/shared_arcs.py).
+
+    Returns:
+        list[dict]: Uma camada por cor, da mais frequente para a menos frequente:
+            {"color": (b, g, r), "fill": "#rrggbb", "pixels": int, "paths": PathSet}.
+            Camadas sem nenhum caminho são omitidas.
+    """
+    if image is None:
+        print("Erro: Imagem de entrada para as camadas de cor é None.")
+        return []
+    if blur_ksize > 1:
+        if blur_ksize % 2 == 0: blur_ksize += 1
+        image = cv2.GaussianBlur(image, (blur_ksize, blur_ksize), 0)
+    labels, palette = quantize_colors(image, color_count)
+    pixel_counts = np.bincount(labels.ravel(), minlength=len(palette))
+    if use_processes is None:
+        use_processes = not multiprocessing.current_process().daemon
+
+    traced = _trace_all_labels(labels, len(palette), min_area, max_workers, use_processes, shared_boundaries)
+    layers = []
+    for label, (coords, offsets, flags) in enumerate(traced):
+        if len(offsets) < 2:
+            continue
+        blue, green, red = (int(v) for v in palette[label])
+        layers.append({"color": (blue, green, red), "fill": f"#{red:02x}{green:02x}{blue:02x}",
+                       "pixels": int(pixel_counts[label]), "paths": PathSet(coords, offsets, flags)})
+    print(f"Camadas de cor: {len(layers)} camadas, {sum(len(layer['paths']) for layer in layers)} caminhos.")
+    return layers
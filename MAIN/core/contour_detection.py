@@ -1,15 +1,29 @@
 # core/contour_detection.py
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from core import marching_squares
+    from core.path_set import PathSet
+except ModuleNotFoundError:
+    import marching_squares
+    from path_set import PathSet
 
 def detect_contours(color_image_cv: np.ndarray, 
-                    blur_ksize_val: int = 5) -> tuple[list | None, np.ndarray | None]: # Modificado para retornar também threshold_image
+                    blur_ksize_val: int = 5,
+                    tile_size: int | None = None,
+                    max_workers: int | None = None) -> tuple[list | None, np.ndarray | None]: # Modificado para retornar também threshold_image
     """
     Detecta contornos em uma imagem colorida.
 
     Args:
         color_image_cv (np.ndarray): A imagem carregada no formato OpenCV (BGR).
         blur_ksize_val (int): Tamanho do kernel para GaussianBlur (deve ser ímpar).
+        tile_size (int | None): Se definido, processa a imagem em blocos (tiles) de
+            tile_size x tile_size pixels, limitando a memória de trabalho ao tamanho
+            do bloco em vez do tamanho da imagem. Útil para digitalizações gigantes.
+        max_workers (int | None): Número de threads usadas no modo em blocos.
 
     Returns:
         tuple[list | None, np.ndarray | None]: 
@@ -20,6 +34,21 @@ def detect_contours(color_image_cv: np.ndarray,
         print("Erro: Imagem de entrada para detecção de contornos é None.")
         return None, None
 
+    if tile_size is not None:
+        return _detect_contours_tiled(color_image_cv, blur_ksize_val, tile_size, max_workers)
+
+    threshold_image = _otsu_threshold_image(color_image_cv, blur_ksize_val)
+    
+    contours, hierarchy = cv2.findContours(threshold_image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    if contours:
+        print(f"Número de contornos detectados: {len(contours)}")
+    else:
+        print("Nenhum contorno detectado.")
+    
+    return contours, threshold_image # Retorna também a imagem limiarizada
+
+def _blurred_gray(color_image_cv: np.ndarray, blur_ksize_val: int) -> np.ndarray:
     gray_image = cv2.cvtColor(color_image_cv, cv2.COLOR_BGR2GRAY)
     
     # Garante que o kernel de desfoque é ímpar e positivo
@@ -27,18 +56,442 @@ def detect_contours(color_image_cv: np.ndarray,
     if blur_ksize_val % 2 == 0: blur_ksize_val += 1
     blur_kernel_size = (blur_ksize_val, blur_ksize_val)
     
-    blurred_image = cv2.GaussianBlur(gray_image, blur_kernel_size, 0)
-    
-    _, threshold_image = cv2.threshold(blurred_image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-    
-    contours, hierarchy = cv2.findContours(threshold_image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    return cv2.GaussianBlur(gray_image, blur_kernel_size, 0)
+
+def _otsu_threshold_image(color_image_cv: np.ndarray, blur_ksize_val: int) -> np.ndarray:
+    _, threshold_image = cv2.threshold(_blurred_gray(color_image_cv, blur_ksize_val), 0, 255,
+                                       cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return threshold_image
+
+def detect_compound_contours(color_image_cv: np.ndarray,
+                             blur_ksize_val: int = 5,
+                             tile_size: int | None = None,
+                             max_workers: int | None = None) -> tuple[list | None, np.ndarray | None, np.ndarray | None]:
+    """
+    Como detect_contours, mas com cv2.RETR_CCOMP: cada contorno externo vem
+    seguido dos seus furos, para formar caminhos compostos (preenchidos com
+    evenodd) em vez de contornos interno/externo independentes.
+
+    O modo em blocos não reconstrói a hierarquia entre blocos: com tile_size,
+    os contornos são os de detect_contours e nenhum é marcado como furo.
+
+    Returns:
+        tuple[list | None, np.ndarray | None, np.ndarray | None]:
+            (contornos em ordem de caminho composto, máscara booleana "é furo",
+            imagem limiarizada). (None, None, None) se a imagem for None.
+    """
+    if color_image_cv is None:
+        print("Erro: Imagem de entrada para detecção de contornos é None.")
+        return None, None, None
+
+    if tile_size is not None:
+        print("Aviso: caminhos compostos não são suportados no modo em blocos; furos exportados como caminhos separados.")
+        contours, threshold_image = _detect_contours_tiled(color_image_cv, blur_ksize_val, tile_size, max_workers)
+        return contours, (np.zeros(len(contours), dtype=bool) if contours is not None else None), threshold_image
+
+    threshold_image = _otsu_threshold_image(color_image_cv, blur_ksize_val)
+    contours, hierarchy = cv2.findContours(threshold_image, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+    order, is_hole = compound_contour_order(hierarchy, len(contours))
+    contours = [contours[index] for index in order.tolist()]
 
     if contours:
-        print(f"Número de contornos detectados: {len(contours)}")
+        print(f"Número de contornos detectados: {len(contours)} ({int(is_hole.sum())} furos)")
     else:
         print("Nenhum contorno detectado.")
-    
-    return contours, threshold_image # Retorna também a imagem limiarizada
+    return contours, is_hole, threshold_image
+
+def detect_subpixel_contours(color_image_cv: np.ndarray,
+                             blur_ksize_val: int = 5,
+                             tile_size: int | None = None) -> tuple[PathSet | None, np.ndarray | None]:
+    """
+    Extrator alternativo a detect_contours: marching squares (core/marching_squares.py)
+    sobre a imagem em tons de cinza desfocada, no nível do limiar de Otsu.
+
+    Os vértices ficam sobre as bordas interpoladas entre os pixels (coordenadas
+    float), em vez da escada de pixels da imagem limiarizada; a simplificação
+    e o ajuste de curvas chegam à mesma fidelidade com muito menos nós.
+
+    Returns:
+        tuple[PathSet | None, np.ndarray | None]: (caminhos fechados sub-pixel,
+            imagem limiarizada). (None, None) se a imagem for None.
+    """
+    if color_image_cv is None:
+        print("Erro: Imagem de entrada para detecção de contornos é None.")
+        return None, None
+    if tile_size is not None:
+        print("Aviso: o extrator sub-pixel não usa o modo em blocos; a imagem é processada inteira.")
+
+    blurred_image = _blurred_gray(color_image_cv, blur_ksize_val)
+    threshold_value, threshold_image = cv2.threshold(blurred_image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # Dentro = pixels que o THRESH_BINARY_INV marca (valor <= limiar); o +0.5 separa os níveis inteiros
+    path_set = marching_squares.trace_isolines((threshold_value + 0.5) - blurred_image.astype(np.float32))
+
+    if len(path_set):
+        print(f"Número de contornos detectados (sub-pixel): {len(path_set)} ({path_set.total_points} pontos)")
+    else:
+        print("Nenhum contorno detectado.")
+    return path_set, threshold_image
+
+def compound_contour_order(hierarchy: np.ndarray | None, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Ordena os contornos de um cv2.findContours(..., cv2.RETR_CCOMP, ...) em
+    caminhos compostos: cada contorno externo seguido dos seus furos.
+
+    Args:
+        hierarchy (np.ndarray | None): A hierarquia devolvida pelo findContours ((1, n, 4) ou None).
+        count (int): Quantidade de contornos.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (ordem dos índices dos contornos, máscara booleana
+            "é furo" já na nova ordem).
+    """
+    if hierarchy is None or count == 0:
+        return np.arange(count, dtype=np.int64), np.zeros(count, dtype=bool)
+    parents = hierarchy.reshape(-1, 4)[:, 3]
+    is_hole = parents >= 0
+    # Grupo = índice do contorno externo; dentro do grupo, o externo vem antes dos furos
+    group = np.where(is_hole, parents, np.arange(count))
+    order = np.lexsort((is_hole, group))
+    return order, is_hole[order]
+
+
+# --- Detecção em blocos (tiles) para imagens gigantes ---
+#
+# O modo em blocos produz os mesmos contornos que o caminho acima, mas nunca
+# materializa as cópias em tons de cinza / desfocada da imagem inteira:
+#   1. Primeira passada: cada bloco (com uma margem de kernel_size // 2 pixels
+#      para o desfoque) é convertido e desfocado; só o histograma do núcleo é
+#      acumulado. O limiar de Otsu global sai desse histograma.
+#   2. Segunda passada: cada bloco é desfocado de novo, limiarizado e escrito na
+#      imagem limiarizada final. Componentes que não tocam uma costura entre
+#      blocos são traçados ali mesmo; os que tocam são unidos entre blocos
+#      (union-find sobre as bordas) e traçados uma única vez. Um componente de
+#      costura pode ocupar a imagem inteira (uma moldura), então nada do tamanho
+#      do seu bounding box é alocado: se o bounding box cabe em um bloco, o
+#      componente é retraçado pelo OpenCV nesse recorte; senão, suas bordas são
+#      seguidas direto na imagem limiarizada pelo mesmo algoritmo (Suzuki-Abe)
+#      do cv2.findContours, a partir do primeiro pixel de cada pedaço e dos
+#      pixels com o vizinho da direita vazio (candidatos a início de furo) que
+#      cada bloco guardou. O resultado é exatamente o da imagem inteira.
+# Os blocos são independentes e o OpenCV libera o GIL, então rodam em threads.
+
+# Direções do seguidor de borda do OpenCV (icvCodeDeltas): 0 = leste, anti-horário
+_BORDER_DIRECTIONS = ((1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1))
+
+def _otsu_threshold_from_histogram(histogram: np.ndarray) -> float:
+    """Reproduz o cálculo de Otsu do OpenCV (getThreshVal_Otsu_8u) a partir de um histograma."""
+    total = float(histogram.sum())
+    if total == 0:
+        return 0.0
+    scale = 1.0 / total
+    mu = 0.0
+    for i in range(256):
+        mu += i * float(histogram[i])
+    mu *= scale
+
+    mu1, q1 = 0.0, 0.0
+    max_sigma, max_val = 0.0, 0.0
+    flt_epsilon = float(np.finfo(np.float32).eps)
+    for i in range(256):
+        p_i = float(histogram[i]) * scale
+        mu1 *= q1
+        q1 += p_i
+        q2 = 1.0 - q1
+        if min(q1, q2) < flt_epsilon or max(q1, q2) > 1.0 - flt_epsilon:
+            continue
+        mu1 = (mu1 + i * p_i) / q1
+        mu2 = (mu - q1 * mu1) / q2
+        sigma = q1 * q2 * (mu1 - mu2) * (mu1 - mu2)
+        if sigma > max_sigma:
+            max_sigma = sigma
+            max_val = float(i)
+    return max_val
+
+def _tile_grid(height: int, width: int, tile_size: int) -> list[tuple[int, int, int, int]]:
+    """Retorna os blocos como (y0, y1, x0, x1), em ordem raster."""
+    return [(y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width))
+            for y0 in range(0, height, tile_size)
+            for x0 in range(0, width, tile_size)]
+
+def _blurred_gray_tile(color_image_cv: np.ndarray, tile: tuple[int, int, int, int], ksize: int) -> np.ndarray:
+    """Converte e desfoca um bloco lendo uma margem extra, para que o núcleo seja idêntico ao da imagem inteira."""
+    y0, y1, x0, x1 = tile
+    height, width = color_image_cv.shape[:2]
+    halo = ksize // 2
+    hy0, hy1 = max(0, y0 - halo), min(height, y1 + halo)
+    hx0, hx1 = max(0, x0 - halo), min(width, x1 + halo)
+    region = np.ascontiguousarray(color_image_cv[hy0:hy1, hx0:hx1])
+    gray_region = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+    blurred_region = cv2.GaussianBlur(gray_region, (ksize, ksize), 0)
+    return blurred_region[y0 - hy0:y1 - hy0, x0 - hx0:x1 - hx0]
+
+def _tile_histogram(color_image_cv: np.ndarray, tile: tuple[int, int, int, int], ksize: int) -> np.ndarray:
+    blurred_tile = _blurred_gray_tile(color_image_cv, tile, ksize)
+    return np.bincount(blurred_tile.ravel(), minlength=256).astype(np.int64)
+
+def _trace_tile(color_image_cv: np.ndarray, tile: tuple[int, int, int, int], ksize: int,
+                threshold_value: float, threshold_image: np.ndarray) -> dict:
+    """
+    Limiariza um bloco, escreve o resultado em threshold_image e traça os
+    componentes que não tocam nenhuma costura. Retorna as faixas de rótulos das
+    bordas internas e os pontos de partida dos componentes de costura.
+    """
+    y0, y1, x0, x1 = tile
+    height, width = threshold_image.shape
+    blurred_tile = _blurred_gray_tile(color_image_cv, tile, ksize)
+    _, binary_tile = cv2.threshold(blurred_tile, threshold_value, 255, cv2.THRESH_BINARY_INV)
+    threshold_image[y0:y1, x0:x1] = binary_tile
+
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(binary_tile, connectivity=8, ltype=cv2.CV_32S)
+
+    # Faixas de rótulos nas bordas que são costuras (não nas bordas da imagem)
+    edges = {
+        'top': labels[0, :].copy() if y0 > 0 else None,
+        'bottom': labels[-1, :].copy() if y1 < height else None,
+        'left': labels[:, 0].copy() if x0 > 0 else None,
+        'right': labels[:, -1].copy() if x1 < width else None,
+    }
+    is_seam_label = np.zeros(num_labels, dtype=bool)
+    for strip in edges.values():
+        if strip is not None:
+            is_seam_label[strip] = True
+    is_seam_label[0] = False
+
+    interior_mask = binary_tile
+    seam_starts, seam_boxes = {}, {}
+    hole_candidates = np.zeros(0, dtype=np.int64)
+    hole_labels = np.zeros(0, dtype=np.int32)
+    if is_seam_label.any():
+        seam_mask = is_seam_label[labels]
+        interior_mask = np.where(seam_mask, 0, binary_tile).astype(np.uint8)
+        # Primeiro pixel (ordem raster) e bounding box (x0, y0, x1, y1) globais de cada
+        # pedaço; o primeiro pixel fica na linha do topo do bounding box
+        for label in np.flatnonzero(is_seam_label).tolist():
+            top, left = int(stats[label, cv2.CC_STAT_TOP]), int(stats[label, cv2.CC_STAT_LEFT])
+            first = left + int(np.argmax(labels[top, left:] == label))
+            seam_starts[label] = (x0 + first, y0 + top)
+            seam_boxes[label] = (x0 + left, y0 + top, x0 + left + int(stats[label, cv2.CC_STAT_WIDTH]),
+                                 y0 + top + int(stats[label, cv2.CC_STAT_HEIGHT]))
+        # Um furo começa em um pixel com o vizinho da direita vazio. Na última coluna
+        # o vizinho está no bloco seguinte: a costura confere depois
+        right_open = np.ones_like(seam_mask)
+        right_open[:, :-1] = binary_tile[:, 1:] == 0
+        ys, xs = np.nonzero(seam_mask & right_open)
+        hole_candidates = (ys + y0).astype(np.int64) * width + (xs + x0)
+        hole_labels = labels[ys, xs]
+    contours, _ = cv2.findContours(interior_mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0))
+
+    return {'tile': tile, 'contours': list(contours), 'edges': edges, 'seam_starts': seam_starts,
+            'seam_boxes': seam_boxes, 'hole_candidates': hole_candidates, 'hole_labels': hole_labels}
+
+def _follow_border(threshold_image: np.ndarray, x0: int, y0: int, is_hole: bool,
+                   negatives: set[int]) -> np.ndarray:
+    """
+    Segue uma borda a partir de (x0, y0) exatamente como o icvFetchContour do
+    OpenCV (RETR_LIST, CHAIN_APPROX_SIMPLE, fora da imagem conta como fundo).
+    Acrescenta a `negatives` os pixels que o OpenCV marcaria com -NBD: os que
+    não podem mais iniciar um furo.
+    """
+    height, width = threshold_image.shape
+    pixels = memoryview(threshold_image.reshape(-1))
+    # (dx, dy, deslocamento na imagem achatada), duas voltas como os deltas do OpenCV
+    steps = [(dx, dy, dy * width + dx) for dx, dy in _BORDER_DIRECTIONS] * 2
+
+    def filled(x, y, position):
+        return 0 <= x < width and 0 <= y < height and pixels[position] != 0
+
+    # Primeiro vizinho no sentido horário, a partir do oeste (externa) ou do leste (furo)
+    start = y0 * width + x0
+    s = s_end = 0 if is_hole else 4
+    while True:
+        s = (s - 1) & 7
+        dx, dy, step = steps[s]
+        if filled(x0 + dx, y0 + dy, start + step) or s == s_end:
+            break
+    if s == s_end: # Pixel isolado
+        negatives.add(start)
+        return np.array([[[x0, y0]]], dtype=np.int32)
+
+    second = start + step
+    x3, y3, position = x0, y0, start
+    previous_s = s ^ 4
+    points = []
+    while True:
+        s_end = s
+        # Longe da borda da imagem os vizinhos dispensam o teste de limites
+        inner = 0 < x3 < width - 1 and 0 < y3 < height - 1
+        while True: # Próximo vizinho no sentido anti-horário
+            s += 1
+            dx, dy, step = steps[s]
+            if pixels[position + step] if inner else filled(x3 + dx, y3 + dy, position + step):
+                break
+        s &= 7
+        if 1 <= s <= s_end: # O vizinho da direita (vazio) foi examinado
+            negatives.add(position)
+        if s != previous_s: # CHAIN_APPROX_SIMPLE: só as mudanças de direção
+            points.append((x3, y3))
+            previous_s = s
+        if position + step == start and position == second:
+            break
+        x3, y3, position = x3 + dx, y3 + dy, position + step
+        s = (s + 4) & 7
+    return np.array(points, dtype=np.int32).reshape(-1, 1, 2)
+
+def _stitch_seam_components(tile_results: list[dict], grid_cols: int, threshold_image: np.ndarray,
+                            max_window_pixels: int) -> list[np.ndarray]:
+    """
+    Une, entre blocos vizinhos, os componentes que tocam costuras e traça cada
+    um uma vez: no recorte do bounding box, se ele tiver até max_window_pixels
+    pixels, ou seguindo as bordas direto na imagem limiarizada.
+    """
+    parent: dict[tuple[int, int], tuple[int, int]] = {}
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    for tile_index, result in enumerate(tile_results):
+        for label in result['seam_starts']:
+            node = (tile_index, int(label))
+            parent[node] = node
+
+    def link_strips(index_a, strip_a, index_b, strip_b):
+        # Vizinhança-8 atravessando a costura: mesmo índice e os dois adjacentes
+        for shift in (-1, 0, 1):
+            if shift < 0:
+                a, b = strip_a[-shift:], strip_b[:shift]
+            elif shift > 0:
+                a, b = strip_a[:-shift], strip_b[shift:]
+            else:
+                a, b = strip_a, strip_b
+            both = (a > 0) & (b > 0)
+            if both.any():
+                for pair in np.unique(np.stack([a[both], b[both]], axis=1), axis=0):
+                    union((index_a, int(pair[0])), (index_b, int(pair[1])))
+
+    def link_corner(index_a, label_a, index_b, label_b):
+        if label_a > 0 and label_b > 0:
+            union((index_a, int(label_a)), (index_b, int(label_b)))
+
+    num_tiles = len(tile_results)
+    for index in range(num_tiles):
+        edges = tile_results[index]['edges']
+        right_index = index + 1 if (index + 1) % grid_cols != 0 else None
+        below_index = index + grid_cols if index + grid_cols < num_tiles else None
+        if right_index is not None:
+            link_strips(index, edges['right'], right_index, tile_results[right_index]['edges']['left'])
+        if below_index is not None:
+            link_strips(index, edges['bottom'], below_index, tile_results[below_index]['edges']['top'])
+            if right_index is not None:
+                # Diagonais entre blocos que só se tocam por um canto
+                below_right = below_index + 1
+                link_corner(index, edges['bottom'][-1], below_right, tile_results[below_right]['edges']['top'][0])
+                link_corner(right_index, tile_results[right_index]['edges']['bottom'][0],
+                            below_index, tile_results[below_index]['edges']['top'][-1])
+
+    # Grupo de cada pedaço; a borda externa começa no primeiro pixel do grupo
+    # (ordem raster), como na varredura do findContours
+    group_of: dict[tuple[int, int], int] = {}
+    group_ids: dict[tuple[int, int], int] = {}
+    for node in parent:
+        group_of[node] = group_ids.setdefault(find(node), len(group_ids))
+    outer_starts: list[tuple[int, int] | None] = [None] * len(group_ids)
+    group_boxes: list[list[int] | None] = [None] * len(group_ids)
+    candidate_parts, group_parts = [], []
+    for tile_index, result in enumerate(tile_results):
+        seam_starts = result['seam_starts']
+        for label, (x, y) in seam_starts.items():
+            group = group_of[(tile_index, label)]
+            if outer_starts[group] is None or (y, x) < outer_starts[group]:
+                outer_starts[group] = (y, x)
+            bx0, by0, bx1, by1 = result['seam_boxes'][label]
+            box = group_boxes[group]
+            if box is None:
+                group_boxes[group] = [bx0, by0, bx1, by1]
+            else:
+                box[0], box[1] = min(box[0], bx0), min(box[1], by0)
+                box[2], box[3] = max(box[2], bx1), max(box[3], by1)
+        if len(result['hole_labels']):
+            lookup = np.zeros(max(seam_starts) + 1, dtype=np.int64)
+            for label in seam_starts:
+                lookup[label] = group_of[(tile_index, label)]
+            candidate_parts.append(result['hole_candidates'])
+            group_parts.append(lookup[result['hole_labels']])
+
+    height, width = threshold_image.shape
+    candidates = np.concatenate(candidate_parts) if candidate_parts else np.zeros(0, dtype=np.int64)
+    candidate_groups = np.concatenate(group_parts) if group_parts else np.zeros(0, dtype=np.int64)
+    # Candidatos na última coluna de um bloco: o vizinho da direita agora está escrito
+    ys, xs = np.divmod(candidates, width)
+    inside = xs + 1 < width
+    keep = ~inside
+    keep[inside] = threshold_image[ys[inside], xs[inside] + 1] == 0
+    candidates, candidate_groups = candidates[keep], candidate_groups[keep]
+    order = np.lexsort((candidates, candidate_groups))
+    candidates, candidate_groups = candidates[order], candidate_groups[order]
+    bounds = np.searchsorted(candidate_groups, np.arange(len(group_ids) + 1))
+
+    stitched_contours = []
+    for group, (y, x) in enumerate(outer_starts):
+        cx0, cy0, cx1, cy1 = group_boxes[group]
+        if (cx1 - cx0) * (cy1 - cy0) <= max_window_pixels:
+            crop = threshold_image[cy0:cy1, cx0:cx1]
+            _, crop_labels = cv2.connectedComponents(crop, connectivity=8, ltype=cv2.CV_32S)
+            component_mask = (crop_labels == crop_labels[y - cy0, x - cx0]).astype(np.uint8)
+            contours, _ = cv2.findContours(component_mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE,
+                                           offset=(cx0, cy0))
+            stitched_contours.extend(contours)
+            continue
+        negatives: set[int] = set()
+        stitched_contours.append(_follow_border(threshold_image, x, y, False, negatives))
+        # Em ordem raster, cada candidato ainda não marcado inicia um furo
+        for position in candidates[bounds[group]:bounds[group + 1]].tolist():
+            if position not in negatives:
+                hole_y, hole_x = divmod(position, width)
+                stitched_contours.append(_follow_border(threshold_image, hole_x, hole_y, True, negatives))
+    return stitched_contours
+
+def _detect_contours_tiled(color_image_cv: np.ndarray, blur_ksize_val: int,
+                           tile_size: int, max_workers: int | None) -> tuple[list | None, np.ndarray | None]:
+    if tile_size < 1:
+        print(f"Erro: tile_size deve ser positivo (recebido {tile_size}).")
+        return None, None
+
+    if blur_ksize_val < 1: blur_ksize_val = 1
+    if blur_ksize_val % 2 == 0: blur_ksize_val += 1
+
+    height, width = color_image_cv.shape[:2]
+    tiles = _tile_grid(height, width, tile_size)
+    grid_cols = (width + tile_size - 1) // tile_size
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        histogram = np.zeros(256, dtype=np.int64)
+        for tile_histogram in executor.map(lambda t: _tile_histogram(color_image_cv, t, blur_ksize_val), tiles):
+            histogram += tile_histogram
+        threshold_value = _otsu_threshold_from_histogram(histogram)
+
+        threshold_image = np.empty((height, width), dtype=np.uint8)
+        tile_results = list(executor.map(
+            lambda t: _trace_tile(color_image_cv, t, blur_ksize_val, threshold_value, threshold_image), tiles))
+
+    contours = [c for result in tile_results for c in result['contours']]
+    contours.extend(_stitch_seam_components(tile_results, grid_cols, threshold_image, tile_size * tile_size))
+
+    if contours:
+        print(f"Número de contornos detectados (em {len(tiles)} blocos): {len(contours)}")
+    else:
+        print("Nenhum contorno detectado.")
+
+    return contours, threshold_image
 
 # ... (bloco if __name__ == '__main__': pode ser atualizado para lidar com a tupla de retorno) ...
 # Exemplo de atualização para o bloco de teste:
@@ -1,26 +1,76 @@
 import numpy as np
 
-def fit_curves_to_paths(polylines: list[list[tuple[int, int]]]) -> list[list[tuple]] | None:
+try:
+    from core.path_set import PathSet, PATH_CLOSED
+    from core import parallel_paths
+except ModuleNotFoundError:
+    from path_set import PathSet, PATH_CLOSED
+    import parallel_paths
+
+def fit_curves_to_paths(polylines: list[list[tuple[int, int]]] | PathSet,
+                        tolerance: float | None = None,
+                        corner_angle: float | None = None,
+                        workers: int | None = None) -> list[list[tuple]] | PathSet | None:
     """
-    Converte polilinhas simplificadas em uma estrutura de caminho mais rica,
-    potencialmente pronta para ajuste de curvas de Bézier.
+    Converte polilinhas simplificadas na estrutura de segmentos usada pelo exportador.
 
-    Versão Inicial: Apenas converte para uma sequência de 'M' e 'L'.
-    Futuramente, esta função implementará o ajuste de Bézier.
+    Sem tolerância, apenas converte para uma sequência de 'M' e 'L'. Com
+    tolerância, ajusta Bézier cúbicas ('C') a cada caminho (ver fit_bezier_curves).
 
     Args:
-        polylines (list[list[tuple[int, int]]]): 
+        polylines (list[list[tuple[int, int]]] | PathSet): 
             Lista de caminhos (polilinhas), onde cada caminho é uma lista de tuplas (x,y).
             Tipicamente, o resultado da otimização RDP.
+        tolerance (float | None): Erro máximo, em pixels, do ajuste de Bézier.
+            None desativa o ajuste.
+        corner_angle (float | None): Ângulo (graus) a partir do qual um vértice
+            é preservado como canto. None usa DEFAULT_CORNER_ANGLE.
+        workers (int | None): Processos do ajuste de um PathSet (ver
+            core/parallel_paths.py); None decide pelo tamanho da entrada.
 
     Returns:
-        list[list[tuple]] | None:
+        list[list[tuple]] | PathSet | None:
             Lista de caminhos no novo formato de segmento [('CMD', pt1, pt2...), ...],
-            ou None se a entrada for inválida.
+            ou None se a entrada for inválida. Sem ajuste de Bézier, um PathSet já
+            representa caminhos 'M' + 'L' (o primeiro ponto é o 'M'), então é
+            devolvido como está, sem criar uma tupla por ponto. Com ajuste, os
+            furos (PATH_HOLE) de um PathSet entram no caminho composto anterior,
+            como subcaminhos separados por ('Z',).
     """
-    if not polylines:
+    if polylines is None or len(polylines) == 0:
         return None
 
+    if tolerance is not None:
+        corner_angle = DEFAULT_CORNER_ANGLE if corner_angle is None else corner_angle
+        is_path_set = isinstance(polylines, PathSet)
+        if is_path_set:
+            fitted = parallel_paths.map_paths(polylines, _fit_path_set_path, tolerance, corner_angle, workers=workers)
+        structured_paths = []
+        points_before = 0
+        for index, polyline in enumerate(polylines):
+            if len(polyline) < 1:
+                continue
+            if is_path_set:
+                segments = fitted[index]
+            else:
+                segments = fit_bezier_curves(polyline, tolerance, True, corner_angle)
+            if is_path_set and polylines.is_hole(index) and structured_paths:
+                # Furo: vira um subcaminho ('Z' + novo 'M') do caminho composto anterior
+                structured_paths[-1].append(('Z',))
+                structured_paths[-1].extend(segments)
+            else:
+                structured_paths.append(segments)
+            points_before += len(polyline)
+        segments_after = sum(len(path) for path in structured_paths)
+        print(f"Curve_fitter: Bézier (tolerância={tolerance}) em {len(structured_paths)} caminhos.")
+        print(f"  Pontos antes: {points_before}, Segmentos depois: {segments_after}"
+              f" (Redução: {100.0 * (1 - segments_after / points_before) if points_before else 0.0:.2f}%)")
+        return structured_paths
+
+    if isinstance(polylines, PathSet):
+        print(f"Curve_fitter: {len(polylines)} caminhos mantidos como PathSet (segmentos 'M'/'L' implícitos).")
+        return polylines
+
     structured_paths = []
     for polyline in polylines:
         if not polyline or len(polyline) < 1: # Precisa de pelo menos um ponto para M
@@ -44,38 +94,280 @@ def fit_curves_to_paths(polylines: list[list[tuple[int, int]]]) -> list[list[tup
     print(f"Curve_fitter: Convertidos {len(structured_paths)} polilinhas para estrutura de segmentos.")
     return structured_paths
 
-# --- Exemplo de como um futuro ajuste de Bézier PODE começar (MUITO SIMPLIFICADO) ---
-# NÃO USE ISTO EM PRODUÇÃO AINDA - É APENAS UMA ILUSTRAÇÃO CONCEITUAL
-def fit_naive_bezier_to_paths(polylines: list[list[tuple[int, int]]]) -> list[list[tuple]] | None:
-    if not polylines: return None
-    structured_paths = []
-    for polyline in polylines:
-        if not polyline or len(polyline) < 2: continue # Precisa de pelo menos 2 pontos
+# --- Ajuste de Bézier cúbicas com tolerância de erro ---
+#
+# Algoritmo de Schneider ("An Algorithm for Automatically Fitting Digitized
+# Curves", Graphics Gems, 1990): cada trecho entre cantos é aproximado por uma
+# cúbica por mínimos quadrados (tangentes fixas nas pontas); se o erro máximo
+# passa da tolerância, tenta-se reparametrizar (Newton-Raphson) e, se ainda não
+# bastar, o trecho é dividido no ponto de maior erro. A avaliação da curva, da
+# parametrização e do erro é feita em lote com NumPy, sobre todos os pontos do
+# trecho de uma vez; a subdivisão usa uma pilha explícita, sem recursão.
 
-        path_segments = [('M', polyline[0])]
-        
-        # Tenta agrupar pontos para formar Béziers cúbicas (ingênuo)
-        i = 1
-        while i < len(polyline):
-            if i + 2 < len(polyline): # Temos P_i, P_i+1, P_i+2 para P_end, cp1, cp2
-                # (P_i-1) é o start, P_i é cp1, P_i+1 é cp2, P_i+2 é end
-                # O ponto final do segmento anterior é o início deste Bézier.
-                # O ponto final deste Bézier será polyline[i+2]
-                # Pontos de controle serão polyline[i] e polyline[i+1]
-                path_segments.append(('C', polyline[i], polyline[i+1], polyline[i+2]))
-                i += 3 # Avança 3 pontos
-            elif i + 1 < len(polyline): # Temos P_i para P_end (cp1 = P_i-1, cp2=P_i) - Quadrática?
-                 # Para simplificar, apenas adiciona como linha
-                path_segments.append(('L', polyline[i]))
-                i += 1
-            else: # Último ponto como linha
-                path_segments.append(('L', polyline[i]))
-                i += 1
-        
-        if path_segments and len(path_segments) > 1: # Garante que temos mais que apenas 'M'
-             structured_paths.append(path_segments)
-    print(f"Curve_fitter (naive_bezier): Processados {len(structured_paths)} caminhos.")
-    return structured_paths
+DEFAULT_BEZIER_TOLERANCE = 1.0 # Distância máxima (px) entre a curva e os pontos
+DEFAULT_CORNER_ANGLE = 60.0 # Mudança de direção (graus) a partir da qual um vértice é canto
+_TANGENT_WINDOW = 3.0 # Comprimento de arco (px) usado para estimar tangentes e cantos
+_MAX_REPARAMETERIZATIONS = 4
+
+def _bernstein(u: np.ndarray) -> np.ndarray:
+    """Base de Bernstein cúbica, (m,) -> (m, 4)."""
+    mu = 1.0 - u
+    return np.stack((mu * mu * mu, 3.0 * mu * mu * u, 3.0 * mu * u * u, u * u * u), axis=1)
+
+def _normalized(vector: np.ndarray) -> np.ndarray | None:
+    length = np.hypot(vector[0], vector[1])
+    return vector / length if length > 1e-12 else None
+
+def _arc_lengths(points: np.ndarray) -> np.ndarray:
+    segment_lengths = np.hypot(*np.diff(points, axis=0).T)
+    return np.concatenate(([0.0], np.cumsum(segment_lengths)))
+
+def _tangent(points: np.ndarray, arc: np.ndarray, index: int, first: int, last: int,
+             forward: bool, backward: bool) -> np.ndarray:
+    """
+    Tangente em points[index] estimada com vizinhos a _TANGENT_WINDOW de
+    comprimento de arco (limitados a [first, last]), o que suaviza a "escada"
+    dos contornos de pixel. Sempre aponta no sentido do percurso.
+    """
+    ahead = index
+    behind = index
+    if forward:
+        ahead = min(int(np.searchsorted(arc, arc[index] + _TANGENT_WINDOW)), last)
+    if backward:
+        behind = max(int(np.searchsorted(arc, arc[index] - _TANGENT_WINDOW, side='right')) - 1, first)
+    tangent = _normalized(points[ahead] - points[behind])
+    if tangent is None: # Pontos coincidentes: usa os vizinhos imediatos
+        tangent = _normalized(points[min(index + 1, last)] - points[max(index - 1, first)])
+    return tangent if tangent is not None else np.array([1.0, 0.0])
+
+def _corner_indices(points: np.ndarray, closed: bool, corner_angle: float) -> np.ndarray:
+    """Índices dos vértices em que a direção muda mais que corner_angle (máximos locais)."""
+    count = len(points)
+    if count < 3:
+        return np.empty(0, dtype=np.int64)
+    # Caminho fechado: três voltas seguidas, para que as janelas atravessem o ponto inicial
+    extended = np.concatenate((points, points, points)) if closed else points
+    base = count if closed else 0
+    arc = _arc_lengths(extended)
+    index = np.arange(base, base + count)
+    ahead = np.minimum(np.searchsorted(arc, arc[index] + _TANGENT_WINDOW), len(extended) - 1)
+    behind = np.maximum(np.searchsorted(arc, arc[index] - _TANGENT_WINDOW, side='right') - 1, 0)
+    incoming = extended[index] - extended[behind]
+    outgoing = extended[ahead] - extended[index]
+    norms = np.hypot(*incoming.T) * np.hypot(*outgoing.T)
+    cosines = np.ones(count)
+    valid = norms > 1e-12
+    cosines[valid] = (incoming[valid] * outgoing[valid]).sum(axis=1) / norms[valid]
+    angles = np.degrees(np.arccos(np.clip(cosines, -1.0, 1.0)))
+
+    if closed:
+        previous_angles, next_angles = np.roll(angles, 1), np.roll(angles, -1)
+    else:
+        angles[0] = angles[-1] = 0.0 # As pontas de um caminho aberto já são âncoras
+        previous_angles = np.concatenate(([0.0], angles[:-1]))
+        next_angles = np.concatenate((angles[1:], [0.0]))
+    is_corner = (angles > corner_angle) & (angles >= previous_angles) & (angles > next_angles)
+    return np.flatnonzero(is_corner)
+
+def _generate_bezier(points: np.ndarray, u: np.ndarray, left_tangent: np.ndarray,
+                     right_tangent: np.ndarray) -> np.ndarray:
+    """Pontos de controle (4, 2) por mínimos quadrados, com as tangentes das pontas fixas."""
+    start, end = points[0], points[-1]
+    basis = _bernstein(u)
+    a1 = basis[:, 1:2] * left_tangent
+    a2 = basis[:, 2:3] * right_tangent
+    residual = points - (basis[:, 0:1] + basis[:, 1:2]) * start - (basis[:, 2:3] + basis[:, 3:4]) * end
+    c00, c01, c11 = (a1 * a1).sum(), (a1 * a2).sum(), (a2 * a2).sum()
+    x0, x1 = (a1 * residual).sum(), (a2 * residual).sum()
+
+    chord = np.hypot(*(end - start))
+    determinant = c00 * c11 - c01 * c01
+    alpha_left = alpha_right = 0.0
+    if abs(determinant) > 1e-12:
+        alpha_left = (x0 * c11 - c01 * x1) / determinant
+        alpha_right = (c00 * x1 - c01 * x0) / determinant
+    # Solução degenerada (ou com alças invertidas): heurística de Wu/Barsky
+    if alpha_left < 1e-6 * chord or alpha_right < 1e-6 * chord:
+        alpha_left = alpha_right = chord / 3.0
+    else:
+        # Alças que se cruzam ao longo da corda geram laços entre os pontos amostrados
+        direction = end - start
+        overshoot = alpha_left * (left_tangent @ direction) - alpha_right * (right_tangent @ direction)
+        if overshoot > chord * chord:
+            alpha_left = alpha_right = chord / 3.0
+    return np.array((start, start + alpha_left * left_tangent, end + alpha_right * right_tangent, end))
+
+def _max_error(points: np.ndarray, control: np.ndarray, u: np.ndarray) -> tuple[float, int]:
+    squared = ((_bernstein(u) @ control - points) ** 2).sum(axis=1)
+    split = int(np.argmax(squared))
+    return float(squared[split]), split
+
+def _reparameterize(points: np.ndarray, control: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Um passo de Newton-Raphson para todos os parâmetros ao mesmo tempo."""
+    first_derivative = 3.0 * np.diff(control, axis=0)
+    second_derivative = 2.0 * np.diff(first_derivative, axis=0)
+    mu = (1.0 - u)[:, None]
+    uu = u[:, None]
+    difference = _bernstein(u) @ control - points
+    q1 = mu * mu * first_derivative[0] + 2.0 * mu * uu * first_derivative[1] + uu * uu * first_derivative[2]
+    q2 = mu * second_derivative[0] + uu * second_derivative[1]
+    numerator = (difference * q1).sum(axis=1)
+    denominator = (q1 * q1).sum(axis=1) + (difference * q2).sum(axis=1)
+    step = np.divide(numerator, denominator, out=np.zeros_like(u), where=np.abs(denominator) > 1e-12)
+    return np.clip(u - step, 0.0, 1.0)
+
+def _fits_line(points: np.ndarray, tolerance: float) -> bool:
+    """True se todos os pontos estão a até tolerance do segmento entre as pontas."""
+    start, end = points[0], points[-1]
+    direction = end - start
+    length_sq = float(direction @ direction)
+    if length_sq == 0.0:
+        distances_sq = ((points - start) ** 2).sum(axis=1)
+    else:
+        t = np.clip((points - start) @ direction / length_sq, 0.0, 1.0)
+        distances_sq = ((points - (start + t[:, None] * direction)) ** 2).sum(axis=1)
+    return float(distances_sq.max()) <= tolerance * tolerance
+
+def _fit_piece(points: np.ndarray, arc: np.ndarray, first: int, last: int,
+               left_tangent: np.ndarray, right_tangent: np.ndarray, tolerance: float) -> list[tuple]:
+    """Ajusta points[first:last + 1] (um trecho sem cantos) com segmentos 'C' (ou 'L' nos trechos retos)."""
+    squared_tolerance = tolerance * tolerance
+    segments = []
+    stack = [(first, last, left_tangent, right_tangent)]
+    while stack:
+        start, end, tangent_start, tangent_end = stack.pop()
+        piece = points[start:end + 1]
+        if len(piece) == 2 or _fits_line(piece, tolerance):
+            segments.append(('L', piece[-1]))
+            continue
+
+        u = (arc[start:end + 1] - arc[start]) / (arc[end] - arc[start]) # Parametrização por corda
+        control = _generate_bezier(piece, u, tangent_start, tangent_end)
+        error, split = _max_error(piece, control, u)
+        if squared_tolerance < error < 4.0 * squared_tolerance:
+            for _ in range(_MAX_REPARAMETERIZATIONS):
+                u = _reparameterize(piece, control, u)
+                control = _generate_bezier(piece, u, tangent_start, tangent_end)
+                error, split = _max_error(piece, control, u)
+                if error <= squared_tolerance:
+                    break
+        if error <= squared_tolerance:
+            segments.append(('C', control[1], control[2], control[3]))
+            continue
+
+        split = start + min(max(split, 1), len(piece) - 2)
+        center_tangent = _tangent(points, arc, split, start, end, forward=True, backward=True)
+        # A metade da direita vai primeiro para a pilha: a da esquerda é emitida antes
+        stack.append((split, end, center_tangent, tangent_end))
+        stack.append((start, split, tangent_start, -center_tangent))
+    return segments
+
+def _rounded_point(point, precision: int) -> tuple:
+    values = []
+    for value in point:
+        value = round(float(value), precision)
+        values.append(int(value) if value.is_integer() else value)
+    return tuple(values)
+
+def fit_bezier_curves(polyline, tolerance: float = DEFAULT_BEZIER_TOLERANCE, closed: bool = True,
+                      corner_angle: float = DEFAULT_CORNER_ANGLE, precision: int = 2) -> list[tuple]:
+    """
+    Ajusta uma polilinha com Bézier cúbicas dentro de uma tolerância de erro.
+
+    Args:
+        polyline: Pontos (x, y) do caminho (lista de tuplas ou array (n, 2)).
+        tolerance (float): Distância máxima, em pixels, entre a curva e os pontos.
+        closed (bool): Se o caminho é fechado (o último segmento volta ao primeiro ponto).
+        corner_angle (float): Mudança de direção, em graus, a partir da qual um
+            vértice é tratado como canto (a curva não é suavizada ali).
+        precision (int): Casas decimais das coordenadas emitidas.
+
+    Returns:
+        list[tuple]: Segmentos [('M', p0), ('C', c1, c2, p), ('L', p), ...].
+    """
+    points = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    if len(points) > 1: # Pontos repetidos em sequência anulam tangentes e a parametrização
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.any(np.diff(points, axis=0) != 0, axis=1)
+        points = points[keep]
+        if closed and len(points) > 1 and np.array_equal(points[0], points[-1]):
+            points = points[:-1]
+    if len(points) == 0:
+        return []
+    if len(points) == 1:
+        return [('M', _rounded_point(points[0], precision))]
+
+    corners = _corner_indices(points, closed, corner_angle)
+    if closed:
+        # Começa em um canto (se houver) e termina de volta no ponto inicial
+        start = int(corners[0]) if len(corners) else 0
+        points = np.concatenate((points[start:], points[:start], points[start:start + 1]))
+        anchors = np.concatenate(((corners - start) % (len(points) - 1), [len(points) - 1]))
+        anchors = np.unique(np.concatenate(([0], anchors)))
+    else:
+        anchors = np.unique(np.concatenate(([0], corners, [len(points) - 1])))
+
+    arc = _arc_lengths(points)
+    last_index = len(points) - 1
+    seamless = closed and len(corners) == 0
+    if seamless:
+        # Sem cantos: a tangente no ponto inicial é contínua através da emenda
+        ahead = min(int(np.searchsorted(arc, _TANGENT_WINDOW)), last_index - 1)
+        behind = max(int(np.searchsorted(arc, arc[-1] - _TANGENT_WINDOW, side='right')) - 1, 1)
+        seam_tangent = _normalized(points[ahead] - points[behind])
+        if seam_tangent is None:
+            seamless = False
+
+    segments = [('M', _rounded_point(points[0], precision))]
+    for first, last in zip(anchors[:-1].tolist(), anchors[1:].tolist()):
+        if seamless:
+            left_tangent = seam_tangent if first == 0 else None
+            right_tangent = -seam_tangent if last == last_index else None
+        else:
+            left_tangent = right_tangent = None
+        if left_tangent is None:
+            left_tangent = _tangent(points, arc, first, first, last, forward=True, backward=False)
+        if right_tangent is None: # Na ponta final, a tangente aponta para dentro do trecho
+            right_tangent = -_tangent(points, arc, last, first, last, forward=False, backward=True)
+        for command, *segment_points in _fit_piece(points, arc, first, last, left_tangent, right_tangent, tolerance):
+            segments.append((command, *(_rounded_point(p, precision) for p in segment_points)))
+    return segments
+
+def _fit_path_set_path(points: np.ndarray, flags: int, tolerance: float, corner_angle: float) -> list[tuple]:
+    return fit_bezier_curves(points, tolerance, bool(flags & PATH_CLOSED), corner_angle)
+
+def flatten_structured_paths(structured_paths: list[list[tuple]], samples_per_curve: int = 8) -> list[np.ndarray]:
+    """
+    Amostra caminhos no formato de segmentos ('M', 'L', 'Q', 'C') em polilinhas
+    (n, 2), por exemplo para desenhar o resultado do ajuste no preview. Cada
+    subcaminho de um caminho composto (separados por ('Z',)) vira uma polilinha.
+    """
+    t = np.linspace(0.0, 1.0, samples_per_curve + 1)[1:, None]
+    mt = 1.0 - t
+    flattened = []
+    for path_segments in structured_paths:
+        if not path_segments:
+            continue
+        pieces = [np.asarray(path_segments[0][-1], dtype=np.float64).reshape(1, 2)]
+        current = pieces[0][0]
+        for command, *points in path_segments[1:]:
+            if command == 'Z': # Fim de um subcaminho de um caminho composto
+                flattened.append(np.concatenate(pieces))
+                pieces = []
+                continue
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+            if command == 'M':
+                pieces.append(points[-1:])
+            elif command == 'C':
+                pieces.append(mt ** 3 * current + 3 * mt * mt * t * points[0] + 3 * mt * t * t * points[1] + t ** 3 * points[2])
+            elif command == 'Q':
+                pieces.append(mt * mt * current + 2 * mt * t * points[0] + t * t * points[1])
+            else:
+                pieces.append(points[-1:])
+            current = points[-1]
+        if pieces:
+            flattened.append(np.concatenate(pieces))
+    return flattened
 
 if __name__ == '__main__':
     test_polylines = [
@@ -88,8 +380,10 @@ if __name__ == '__main__':
         for i, p in enumerate(structured):
             print(f"Caminho {i}: {p}")
 
-    print("\n--- Teste com fit_naive_bezier_to_paths (Bézier Cúbico Ingênuo) ---")
-    naive_bezier = fit_naive_bezier_to_paths(test_polylines)
-    if naive_bezier:
-        for i, p in enumerate(naive_bezier):
-            print(f"Caminho Bézier Ingênuo {i}: {p}")
\ No newline at end of file
+    print("\n--- Teste com fit_curves_to_paths (Bézier Cúbico, tolerância 1.0) ---")
+    angles = np.linspace(0, 2 * np.pi, 80, endpoint=False)
+    circle = np.rint(np.column_stack((200 + 50 * np.cos(angles), 200 + 50 * np.sin(angles)))).astype(int)
+    bezier = fit_curves_to_paths(test_polylines + [circle.tolist()], tolerance=1.0)
+    if bezier:
+        for i, p in enumerate(bezier):
+            print(f"Caminho Bézier {i}: {p}")
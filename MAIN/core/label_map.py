@@ -0,0 +1,83 @@
+# core/label_map.py
+import cv2
+import numpy as np
+
+class ContourLabelMap:
+    """
+    Mapa de rótulos (um inteiro por pixel) com o índice do contorno que
+    contém cada pixel, para resolver cliques com uma única consulta ao array.
+
+    Quando um pixel está dentro de vários contornos, vence o de menor área (e,
+    no empate, o de menor índice) — o mesmo critério da busca com
+    cv2.pointPolygonTest + cv2.contourArea. Os contornos são preenchidos do
+    maior para o menor, então os menores sobrescrevem os maiores. Pixels fora
+    de qualquer contorno valem -1.
+
+    O dtype é int16 quando há menos de 32767 contornos (metade da memória) e
+    int32 caso contrário.
+    """
+    def __init__(self, contours: list, shape: tuple):
+        self.shape = tuple(shape[:2])
+        self.contours = list(contours)
+        count = len(self.contours)
+        self.areas = np.array([cv2.contourArea(c) for c in self.contours], dtype=np.float64)
+        self.bboxes = np.array([cv2.boundingRect(c) for c in self.contours], dtype=np.int64).reshape(-1, 4)
+        self.labels = np.full(self.shape, -1, dtype=np.int16 if count < np.iinfo(np.int16).max else np.int32)
+        self._paint(np.arange(count), 0, 0, self.shape[1], self.shape[0])
+
+    def __len__(self) -> int:
+        return len(self.contours)
+
+    def label_at(self, x: int, y: int) -> int:
+        """Índice do contorno no pixel (x, y), ou -1 (nenhum contorno ou fora da imagem)."""
+        if 0 <= x < self.shape[1] and 0 <= y < self.shape[0]:
+            return int(self.labels[y, x])
+        return -1
+
+    def bbox(self, index: int) -> tuple[int, int, int, int]:
+        """Retângulo (x, y, largura, altura) do contorno."""
+        return tuple(int(v) for v in self.bboxes[index])
+
+    def update_contour(self, index: int, contour: np.ndarray | None):
+        """
+        Substitui (ou remove, com None) um contorno e repinta só a região
+        afetada: a união das caixas antiga e nova, com os contornos que a cruzam.
+        """
+        old_box = self.bboxes[index].copy()
+        if contour is None or len(contour) == 0:
+            self.contours[index] = np.empty((0, 1, 2), dtype=np.int32)
+            self.areas[index] = 0.0
+            self.bboxes[index] = (0, 0, 0, 0)
+            new_box = old_box
+        else:
+            self.contours[index] = contour
+            self.areas[index] = cv2.contourArea(contour)
+            self.bboxes[index] = cv2.boundingRect(contour)
+            new_box = self.bboxes[index]
+
+        x0 = max(int(min(old_box[0], new_box[0])), 0)
+        y0 = max(int(min(old_box[1], new_box[1])), 0)
+        x1 = min(int(max(old_box[0] + old_box[2], new_box[0] + new_box[2])), self.shape[1])
+        y1 = min(int(max(old_box[1] + old_box[3], new_box[1] + new_box[3])), self.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return
+        boxes = self.bboxes
+        intersects = ((boxes[:, 0] < x1) & (boxes[:, 0] + boxes[:, 2] > x0) &
+                      (boxes[:, 1] < y1) & (boxes[:, 1] + boxes[:, 3] > y0) & (boxes[:, 2] > 0))
+        self._paint(np.flatnonzero(intersects), x0, y0, x1, y1)
+
+    def _paint(self, indices: np.ndarray, x0: int, y0: int, x1: int, y1: int):
+        """Repinta a região [x0, x1) x [y0, y1) com os contornos indicados, do maior para o menor."""
+        # lexsort: a última chave é a principal (área decrescente); no empate, o menor índice por último
+        order = indices[np.lexsort((-indices, -self.areas[indices]))]
+        whole_image = (x0, y0, x1, y1) == (0, 0, self.shape[1], self.shape[0])
+        # A região é uma cópia contígua (o OpenCV não desenha em views com stride),
+        # exceto quando é a imagem inteira
+        region = self.labels if whole_image else np.empty((y1 - y0, x1 - x0), dtype=self.labels.dtype)
+        region.fill(-1)
+        for index in order.tolist():
+            contour = self.contours[index]
+            if len(contour):
+                cv2.fillPoly(region, [contour], index, offset=(-x0, -y0))
+        if not whole_image:
+            self.labels[y0:y1, x0:x1] = region
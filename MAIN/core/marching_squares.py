@@ -0,0 +1,186 @@
+# core/marching_squares.py
+#
+# Extração de contornos sub-pixel: marching squares vetorizado sobre um campo
+# escalar (ex.: a imagem em tons de cinza desfocada menos o limiar). Cada
+# aresta da grade cruzada pelo nível vira um vértice, interpolado linearmente
+# entre os dois pixels, em vez da escada de pixels do cv2.findContours.
+#
+# Os segmentos de cada célula são orientados (o "dentro" fica sempre do mesmo
+# lado), então cada aresta cruzada é a saída de exatamente uma célula e a
+# entrada de exatamente outra: a ligação dos segmentos é uma permutação, e os
+# caminhos são os ciclos dela, ordenados com saltos de ponteiro em NumPy (sem
+# laço Python por vértice).
+import numpy as np
+
+try:
+    from core.path_set import PathSet, PATH_CLOSED
+except ModuleNotFoundError:
+    from path_set import PathSet, PATH_CLOSED
+
+DEFAULT_DECIMALS = 2 # Casas decimais das coordenadas (1/100 px já é bem menor que o ruído da imagem)
+
+_TOP, _RIGHT, _BOTTOM, _LEFT = range(4)
+
+def _segment_table() -> np.ndarray:
+    """
+    Segmentos (aresta de entrada, aresta de saída) de cada um dos 16 casos,
+    com o "dentro" à esquerda de quem percorre o segmento (coordenadas de
+    imagem, y para baixo). Índices: [variante, caso, segmento, entrada/saída];
+    -1 = sem segmento. A variante 1 só difere nas selas (casos 5 e 10), quando
+    o centro da célula está dentro.
+    """
+    # Cantos: 1 = superior esquerdo, 2 = superior direito, 4 = inferior direito, 8 = inferior esquerdo.
+    # Arestas em sentido horário, com os cantos de origem e destino.
+    clockwise_edges = ((_TOP, 1, 2), (_RIGHT, 2, 4), (_BOTTOM, 4, 8), (_LEFT, 8, 1))
+    table = np.full((2, 16, 2, 2), -1, dtype=np.int8)
+    for case in range(1, 15):
+        entries = [edge for edge, origin, target in clockwise_edges if not case & origin and case & target]
+        exits = [edge for edge, origin, target in clockwise_edges if case & origin and not case & target]
+        if len(entries) == 1:
+            table[:, case, 0] = (entries[0], exits[0])
+    # Selas: com o centro fora, os dois cantos de dentro ficam isolados; com o centro dentro, os de fora
+    table[0, 5] = ((_LEFT, _TOP), (_RIGHT, _BOTTOM))
+    table[1, 5] = ((_RIGHT, _TOP), (_LEFT, _BOTTOM))
+    table[0, 10] = ((_TOP, _RIGHT), (_BOTTOM, _LEFT))
+    table[1, 10] = ((_TOP, _LEFT), (_BOTTOM, _RIGHT))
+    return table
+
+_SEGMENTS = _segment_table()
+
+def trace_isolines(field: np.ndarray, level: float = 0.0, decimals: int = DEFAULT_DECIMALS,
+                   cell_vertices: bool = False) -> PathSet:
+    """
+    Traça as curvas de nível field == level como caminhos fechados sub-pixel.
+
+    "Dentro" são os pixels com valor > level. A imagem é tratada como cercada
+    por pixels de fora, então toda curva é fechada. Coordenadas (x, y) no
+    sistema dos centros dos pixels, como as do cv2.findContours.
+
+    Args:
+        field (np.ndarray): Campo escalar 2D (qualquer dtype numérico).
+        level (float): Nível das curvas.
+        decimals (int): Casas decimais em que as coordenadas são arredondadas.
+        cell_vertices (bool): Em vez do cruzamento sobre cada aresta, usa como
+            vértice o canto entre os pixels da célula de cada segmento: os
+            caminhos seguem as bordas dos pixels (ver trace_label_boundaries).
+
+    Returns:
+        PathSet: Um caminho fechado (PATH_CLOSED) por curva, com coordenadas float64.
+    """
+    values = np.pad(np.asarray(field, dtype=np.float32) - np.float32(level), 1, constant_values=-1.0)
+    inside = values > 0
+    rows, cols = values.shape
+    case = (inside[:-1, :-1] * np.uint8(1) | inside[:-1, 1:] * np.uint8(2) |
+            inside[1:, 1:] * np.uint8(4) | inside[1:, :-1] * np.uint8(8))
+    cell_y, cell_x = np.nonzero((case != 0) & (case != 15))
+    if len(cell_y) == 0:
+        return PathSet.empty(dtype=np.float64)
+    cell_case = case[cell_y, cell_x]
+
+    variant = np.zeros(len(cell_case), dtype=np.intp)
+    saddle = np.flatnonzero((cell_case == 5) | (cell_case == 10))
+    if len(saddle):
+        y, x = cell_y[saddle], cell_x[saddle]
+        center = values[y, x] + values[y, x + 1] + values[y + 1, x] + values[y + 1, x + 1]
+        variant[saddle] = center > 0
+    segments = _SEGMENTS[variant, cell_case] # (células, 2 segmentos, entrada/saída)
+    has_second = segments[:, 1, 0] >= 0
+    local_edges = np.concatenate((segments[:, 0], segments[has_second, 1]))
+    segment_y = np.concatenate((cell_y, cell_y[has_second]))[:, None]
+    segment_x = np.concatenate((cell_x, cell_x[has_second]))[:, None]
+
+    # Identificador global de cada aresta: horizontais (y, x) primeiro, depois as verticais
+    horizontal_count = rows * (cols - 1)
+    is_horizontal = (local_edges == _TOP) | (local_edges == _BOTTOM)
+    edge_ids = np.where(is_horizontal,
+                        (segment_y + (local_edges == _BOTTOM)) * (cols - 1) + segment_x,
+                        horizontal_count + segment_y * cols + segment_x + (local_edges == _RIGHT))
+    entries, exits = edge_ids[:, 0], edge_ids[:, 1]
+
+    # Nó = aresta cruzada; next_node é uma permutação cujos ciclos são os caminhos
+    order = np.argsort(entries, kind="stable")
+    nodes = entries[order]
+    next_node = np.searchsorted(nodes, exits[order])
+
+    path_order, offsets = _cycles(next_node)
+    if cell_vertices:
+        # O nó k é a entrada do segmento order[k]: o vértice é o centro da célula desse segmento
+        segment = order[path_order]
+        coords = np.stack((segment_x[segment, 0], segment_y[segment, 0]), axis=1) - 0.5
+        return PathSet(coords.astype(np.float64), offsets, np.full(len(offsets) - 1, PATH_CLOSED, dtype=np.uint8))
+    node_ids = nodes[path_order]
+
+    # Vértices: interpolação linear do cruzamento sobre cada aresta
+    coords = np.empty((len(node_ids), 2), dtype=np.float64)
+    horizontal = node_ids < horizontal_count
+    h_ids = node_ids[horizontal]
+    y, x = np.divmod(h_ids, cols - 1)
+    start, end = values[y, x], values[y, x + 1]
+    coords[horizontal, 0] = x + start / (start - end)
+    coords[horizontal, 1] = y
+    y, x = np.divmod(node_ids[~horizontal] - horizontal_count, cols)
+    start, end = values[y, x], values[y + 1, x]
+    coords[~horizontal, 0] = x
+    coords[~horizontal, 1] = y + start / (start - end)
+    coords -= 1.0 # Desfaz a borda do np.pad
+    np.round(coords, decimals, out=coords)
+
+    return PathSet(coords, offsets, np.full(len(offsets) - 1, PATH_CLOSED, dtype=np.uint8))
+
+def trace_label_boundaries(labels: np.ndarray, label: int) -> PathSet:
+    """
+    Traça as bordas da região labels == label sobre as arestas entre os pixels.
+
+    Os vértices são os cantos dos pixels (coordenadas x.5, no sistema dos
+    centros dos pixels), então duas regiões vizinhas têm a fronteira comum
+    com exatamente os mesmos vértices, inclusive nos cantos em que três ou
+    mais rótulos se encontram: as regiões cobrem a imagem sem frestas nem
+    sobreposições (ver core/shared_arcs.py).
+
+    Returns:
+        PathSet: Caminhos fechados; os furos têm a orientação oposta à dos externos.
+    """
+    return trace_isolines((labels == label).view(np.uint8), 0.5, cell_vertices=True)
+
+def _cycles(next_node: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decompõe a permutação next_node em ciclos.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (nós na ordem de percurso, ciclo após ciclo;
+            offsets de cada ciclo nessa ordem). Cada ciclo começa no seu menor nó.
+    """
+    count = len(next_node)
+    indices = np.arange(count)
+
+    # Representante de cada ciclo: o menor nó dele (mínimo sobre janelas que dobram a cada
+    # passo). Se nenhum mínimo muda em um passo, toda janela já cobre o seu ciclo inteiro.
+    root = indices.copy()
+    jump = next_node.copy()
+    steps = 0
+    while True:
+        window_root = np.minimum(root, root[jump])
+        steps += 1
+        if np.array_equal(window_root, root):
+            break
+        root = window_root
+        jump = jump[jump]
+
+    # Distância de cada nó até o fim do ciclo, cortado logo antes do representante
+    # (list ranking com saltos de ponteiro; o ciclo mais longo tem no máximo 2^steps nós)
+    is_last = root[next_node] == next_node
+    remaining = (~is_last).astype(np.int64)
+    jump = np.where(is_last, indices, next_node)
+    for _ in range(steps):
+        remaining += remaining[jump]
+        jump = jump[jump]
+
+    # Cada nó vai direto para a sua posição: início do ciclo + distância desde o representante
+    is_root = root == indices
+    lengths = np.bincount(root, minlength=count)[is_root]
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    cycle = (np.cumsum(is_root) - 1)[root]
+    path_order = np.empty(count, dtype=np.int64)
+    path_order[offsets[cycle] + lengths[cycle] - 1 - remaining] = indices
+    return path_order, offsets
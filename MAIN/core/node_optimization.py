@@ -1,108 +1,451 @@
+import heapq
+
 import numpy as np
 from typing import List # Necessário para List[complex] em Python mais antigo
 
-# Sua implementação do RDP (adaptada para usar List em vez de np.ndarray para entrada/saída de pontos)
-def rdp_custom(points_complex: List[complex], epsilon: float) -> List[complex]:
-    if not points_complex or len(points_complex) < 3:
-        return points_complex
+try:
+    from core.path_set import PathSet
+    from core import parallel_paths
+except ModuleNotFoundError:
+    from path_set import PathSet
+    import parallel_paths
 
-    # Função interna para distância perpendicular
-    def perpendicular_distance(pt: complex, line_start: complex, line_end: complex) -> float:
-        if line_start == line_end:
-            return abs(pt - line_start)
-        
-        # Usando a fórmula baseada em produto vetorial (equivalente à sua)
-        # |Im( (line_end - line_start)^* * (pt - line_start) )| / |line_end - line_start|
-        # onde ^* é o conjugado.
-        # np.cross para vetores 2D (x1,y1), (x2,y2) é x1*y2 - x2*y1
-        # Se (line_end - line_start) = dx + idy
-        # Se (pt - line_start) = px + ipy
-        # O numerador é |dx*py - dy*px|
-        line_vec = line_end - line_start
-        pt_vec = pt - line_start
-        
-        # Numerador: abs(line_vec.real * pt_vec.imag - line_vec.imag * pt_vec.real)
-        # Denominador: abs(line_vec)
-        numerator = abs(line_vec.real * pt_vec.imag - line_vec.imag * pt_vec.real)
-        denominator = abs(line_vec)
-        
-        if denominator == 0: # line_start == line_end
-             return abs(pt - line_start)
-        return numerator / denominator
-
-    max_dist = 0.0
-    index = 0 # O RDP original usa o índice 1 como primeiro candidato válido se len > 2
-              # Mas o loop range(1, len(points_complex)-1) cuida disso.
-              # index=0 é um placeholder se nenhum ponto for encontrado com dist > max_dist.
-
-    # Encontra o ponto mais distante do segmento entre o primeiro e o último ponto
-    for i in range(1, len(points_complex) - 1):
-        dist = perpendicular_distance(points_complex[i], points_complex[0], points_complex[-1])
-        if dist > max_dist:
-            index = i
-            max_dist = dist
-
-    # Se a distância máxima for maior que epsilon, simplifica recursivamente
-    if max_dist > epsilon:
-        # Chamada recursiva para a parte esquerda e direita do ponto de divisão
-        left_simplified = rdp_custom(points_complex[:index + 1], epsilon)
-        right_simplified = rdp_custom(points_complex[index:], epsilon)
-        
-        # Concatena os resultados, removendo o ponto de junção duplicado
-        return left_simplified[:-1] + right_simplified
-    else:
-        # Se não, todos os pontos intermediários são removidos
-        return [points_complex[0], points_complex[-1]]
+# --- Núcleo RDP iterativo e vetorizado ---
+#
+# O RDP trabalha sobre um único array (n, 2) float64 e uma pilha explícita de
+# intervalos de índices [start, end]: sem recursão (sem limite de profundidade),
+# sem cópias de fatias da lista e com as distâncias de cada trecho calculadas em
+# uma só passada NumPy. A aritmética é a mesma da antiga versão com números
+# complexos (|dx*py - dy*px| / hypot(dx, dy)), e o ponto de divisão é o primeiro
+# de distância máxima, então o resultado é idêntico bit a bit.
 
-def _convert_to_complex_points(polyline: list[tuple[int, int]]) -> List[complex]:
-    """Converte [(x,y),...] para [complex(x,y),...]."""
-    return [complex(p[0], p[1]) for p in polyline]
+def _perpendicular_distances(points: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Distâncias de points[start+1:end] à reta que passa por points[start] e points[end]."""
+    line_x = points[end, 0] - points[start, 0]
+    line_y = points[end, 1] - points[start, 1]
+    pt_x = points[start + 1:end, 0] - points[start, 0]
+    pt_y = points[start + 1:end, 1] - points[start, 1]
+    denominator = np.hypot(line_x, line_y)
+    if denominator == 0: # line_start == line_end
+        return np.hypot(pt_x, pt_y)
+    return np.abs(line_x * pt_y - line_y * pt_x) / denominator
 
-def _convert_from_complex_points(complex_polyline: List[complex]) -> list[tuple[int, int]]:
-    """Converte [complex(x,y),...] para [(x,y),...]."""
-    return [(int(round(p.real)), int(round(p.imag))) for p in complex_polyline]
+def rdp_keep_mask(points: np.ndarray, epsilon: float) -> np.ndarray:
+    """
+    Executa o RDP sobre um array de pontos e retorna a máscara dos vértices mantidos.
+
+    Args:
+        points (np.ndarray): Array (n, 2) com as coordenadas (x, y).
+        epsilon (float): Tolerância do RDP.
+
+    Returns:
+        np.ndarray: Máscara booleana (n,) com True para os vértices mantidos.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n < 3:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        distances = _perpendicular_distances(points, start, end)
+        local_index = int(np.argmax(distances))
+        if distances[local_index] > epsilon:
+            index = start + 1 + local_index
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return keep
+
+def rdp_custom(points_complex: List[complex], epsilon: float) -> List[complex]:
+    """RDP sobre uma lista de pontos complexos (mantida por compatibilidade; usa rdp_keep_mask)."""
+    if not points_complex or len(points_complex) < 3:
+        return points_complex
+    points = np.array([(p.real, p.imag) for p in points_complex], dtype=np.float64)
+    keep = rdp_keep_mask(points, epsilon)
+    return [points_complex[i] for i in np.flatnonzero(keep)]
 
 def apply_custom_rdp_simplification(
-        polylines_input: list[list[tuple[int, int]]], 
-        epsilon: float = 1.0  # Tolerância para o RDP
-    ) -> list[list[tuple[int, int]]] | None:
+        polylines_input: list[list[tuple[int, int]]] | PathSet, 
+        epsilon: float = 1.0,  # Tolerância para o RDP
+        workers: int | None = None
+    ) -> list[list[tuple[int, int]]] | PathSet | None:
     """
     Aplica a simplificação RDP customizada a uma lista de polilinhas.
+
+    Aceita também um PathSet; nesse caso retorna um PathSet com os mesmos
+    caminhos e flags, filtrando o buffer de coordenadas com uma única máscara.
+    A máscara de um PathSet é calculada em paralelo (core/parallel_paths.py)
+    com `workers` processos; None decide pelo tamanho da entrada.
     """
-    if not polylines_input:
+    if polylines_input is None or len(polylines_input) == 0:
         return None
 
+    if isinstance(polylines_input, PathSet):
+        keep = parallel_paths.map_points(polylines_input, rdp_keep_mask, bool, epsilon, workers=workers)
+        simplified_path_set = polylines_input.filter_points(keep)
+        _print_simplification_summary(f"Simplificação RDP Customizada (epsilon={epsilon})",
+                                       len(polylines_input), polylines_input.total_points,
+                                       simplified_path_set.total_points)
+        return simplified_path_set
+
     simplified_polylines_list = []
     total_points_before = 0
     total_points_after = 0
 
     for polyline in polylines_input:
-        if not polyline or len(polyline) < 2: # RDP precisa de pelo menos 2, idealmente 3
+        if len(polyline) < 2: # RDP precisa de pelo menos 2, idealmente 3
             simplified_polylines_list.append(polyline) # Mantém polilinhas muito curtas
             total_points_before += len(polyline)
             total_points_after += len(polyline)
             continue
 
         total_points_before += len(polyline)
-        complex_pts = _convert_to_complex_points(polyline)
-        simplified_complex = rdp_custom(complex_pts, epsilon)
-        simplified_output_polyline = _convert_from_complex_points(simplified_complex)
-        
-        # Garante que a polilinha simplificada não seja vazia se a original não era
-        if not simplified_output_polyline and polyline:
-            simplified_polylines_list.append([polyline[0]]) # Mantém pelo menos um ponto
-        elif simplified_output_polyline:
-            simplified_polylines_list.append(simplified_output_polyline)
-        
+        points = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+        keep = rdp_keep_mask(points, epsilon)
+        kept_points = np.rint(points[keep]).astype(np.int64)
+        simplified_output_polyline = [tuple(p) for p in kept_points.tolist()]
+        simplified_polylines_list.append(simplified_output_polyline)
         total_points_after += len(simplified_output_polyline)
 
-    print(f"Simplificação RDP Customizada (epsilon={epsilon}): Processadas {len(polylines_input)} polilinhas.")
-    if total_points_before > 0:
-        reduction = ((total_points_before - total_points_after) / total_points_before) * 100 if total_points_before > 0 else 0
-        print(f"  Pontos antes: {total_points_before}, Pontos depois: {total_points_after} (Redução: {reduction:.2f}%)")
-    
+    _print_simplification_summary(f"Simplificação RDP Customizada (epsilon={epsilon})",
+                                   len(polylines_input), total_points_before, total_points_after)
+    return simplified_polylines_list
+
+def _print_simplification_summary(label: str, num_polylines: int, points_before: int, points_after: int):
+    print(f"{label}: Processadas {num_polylines} polilinhas.")
+    if points_before > 0:
+        reduction = ((points_before - points_after) / points_before) * 100
+        print(f"  Pontos antes: {points_before}, Pontos depois: {points_after} (Redução: {reduction:.2f}%)")
+
+# --- Índice de significância RDP (independente de epsilon) ---
+#
+# Com epsilon >= 0, a árvore de divisões do RDP não depende de epsilon: em cada
+# trecho o ponto de divisão é sempre o primeiro ponto de distância máxima. Um
+# vértice sobrevive a rdp_custom(epsilon) se, e somente se, todas as divisões
+# no caminho da raiz até ele tiveram distância > epsilon. Guardando esse mínimo
+# por vértice (a "significância"), simplificar para qualquer epsilon vira um
+# filtro linear: significance > epsilon.
+
+def compute_rdp_significance(polyline: list[tuple[int, int]] | np.ndarray) -> np.ndarray:
+    """
+    Calcula a significância RDP de cada vértice de uma polilinha.
+
+    Args:
+        polyline (list[tuple[int, int]] | np.ndarray): Pontos (x, y) da polilinha.
+
+    Returns:
+        np.ndarray: Array float64 com um valor por vértice. As extremidades recebem
+            infinito; um vértice é mantido por rdp_custom(epsilon) sse o valor > epsilon.
+    """
+    points = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    significance = np.zeros(n, dtype=np.float64)
+    if n < 3:
+        significance[:] = np.inf
+        return significance
+    significance[0] = significance[-1] = np.inf
+
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        start, end, parent_significance = stack.pop()
+        if end - start < 2:
+            continue
+        distances = _perpendicular_distances(points, start, end)
+        local_index = int(np.argmax(distances))
+        max_dist = float(distances[local_index])
+        if max_dist <= 0.0:
+            continue # Trecho colinear: todos os intermediários ficam com 0
+        index = start + 1 + local_index
+        node_significance = min(max_dist, parent_significance)
+        significance[index] = node_significance
+        stack.append((start, index, node_significance))
+        stack.append((index, end, node_significance))
+    return significance
+
+def compute_path_set_significance(path_set: PathSet, workers: int | None = None) -> np.ndarray:
+    """
+    compute_rdp_significance de todos os caminhos de um PathSet, em paralelo
+    (ver core/parallel_paths.py). Retorna um array alinhado com path_set.coords.
+    """
+    return parallel_paths.map_points(path_set, compute_rdp_significance, np.float64, workers=workers)
+
+def simplify_by_significance(polyline: list[tuple[int, int]] | np.ndarray,
+                             significance: np.ndarray,
+                             epsilon: float) -> list[tuple[int, int]]:
+    """Mantém os vértices com significância > epsilon (equivalente a rdp_custom com o mesmo epsilon)."""
+    points = np.asarray(polyline).reshape(-1, 2)
+    kept = np.rint(points[significance > epsilon]).astype(np.int64)
+    return [tuple(p) for p in kept.tolist()]
+
+def apply_rdp_with_significance(
+        polylines_input: list[list[tuple[int, int]]] | list[np.ndarray] | PathSet,
+        significances: list[np.ndarray] | np.ndarray,
+        epsilon: float = 1.0
+    ) -> list[list[tuple[int, int]]] | PathSet | None:
+    """
+    Versão de apply_custom_rdp_simplification que usa significâncias já calculadas
+    (ver compute_rdp_significance). Produz o mesmo resultado em tempo linear.
+
+    Para um PathSet, significances pode ser a lista por caminho ou um único array
+    alinhado com path_set.coords; a simplificação é então uma só comparação.
+    """
+    if polylines_input is None or len(polylines_input) == 0:
+        return None
+
+    if isinstance(polylines_input, PathSet):
+        flat_significance = significances
+        if not isinstance(flat_significance, np.ndarray):
+            flat_significance = np.concatenate(significances)
+        simplified_path_set = polylines_input.filter_points(flat_significance > epsilon)
+        _print_simplification_summary(f"Simplificação RDP (índice de significância, epsilon={epsilon})",
+                                       len(polylines_input), polylines_input.total_points,
+                                       simplified_path_set.total_points)
+        return simplified_path_set
+
+    simplified_polylines_list = []
+    total_points_before = 0
+    total_points_after = 0
+    for polyline, significance in zip(polylines_input, significances):
+        total_points_before += len(polyline)
+        if len(polyline) < 2:
+            simplified = [tuple(int(v) for v in p) for p in np.asarray(polyline).reshape(-1, 2).tolist()]
+        else:
+            simplified = simplify_by_significance(polyline, significance, epsilon)
+        simplified_polylines_list.append(simplified)
+        total_points_after += len(simplified)
+
+    _print_simplification_summary(f"Simplificação RDP (índice de significância, epsilon={epsilon})",
+                                   len(polylines_input), total_points_before, total_points_after)
     return simplified_polylines_list
 
+# --- Visvalingam–Whyatt (área efetiva por vértice) ---
+#
+# O VW remove, um a um, o vértice cujo triângulo com os dois vizinhos tem a
+# menor área, e recalcula só os triângulos dos vizinhos. Os triângulos ficam em
+# um heap binário (com remoção preguiçosa de entradas desatualizadas) e os
+# vizinhos em listas ligadas por índice (prev/next), então um caminho de n
+# pontos custa O(n log n). A "área efetiva" de um vértice é a área no momento
+# em que ele sai, nunca menor que a do vértice removido antes dele: a ordem de
+# remoção fica monotônica, e simplificar para qualquer limiar (ou quantidade
+# de nós) é um filtro linear, como com a significância RDP. Ao contrário do
+# RDP, o VW elimina primeiro os degraus e picos isolados de área pequena.
+
+def _triangle_areas(points: np.ndarray, previous: np.ndarray, current: np.ndarray, following: np.ndarray) -> np.ndarray:
+    """Áreas dos triângulos (points[previous], points[current], points[following])."""
+    ax, ay = points[previous, 0], points[previous, 1]
+    bx, by = points[current, 0], points[current, 1]
+    cx, cy = points[following, 0], points[following, 1]
+    return 0.5 * np.abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay))
+
+def compute_vw_effective_area(polyline: list[tuple[int, int]] | np.ndarray) -> np.ndarray:
+    """
+    Calcula a área efetiva Visvalingam–Whyatt de cada vértice de uma polilinha.
+
+    Args:
+        polyline (list[tuple[int, int]] | np.ndarray): Pontos (x, y) da polilinha.
+
+    Returns:
+        np.ndarray: Array float64 com um valor por vértice. As extremidades recebem
+            infinito; um vértice sobrevive ao VW com limiar de área A sse o valor > A.
+    """
+    points = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    n = len(points)
+    effective_area = np.full(n, np.inf, dtype=np.float64)
+    if n < 3:
+        return effective_area
+
+    previous = np.arange(-1, n - 1)
+    following = np.arange(1, n + 1)
+    interior = np.arange(1, n - 1)
+    areas = np.full(n, np.inf, dtype=np.float64)
+    areas[interior] = _triangle_areas(points, interior - 1, interior, interior + 1)
+    heap = list(zip(areas[interior].tolist(), interior.tolist()))
+    heapq.heapify(heap)
+
+    previous_list, following_list, area_list = previous.tolist(), following.tolist(), areas.tolist()
+    removed = [False] * n
+    points_list = points.tolist()
+    last_area = 0.0
+    while heap:
+        area, index = heapq.heappop(heap)
+        if removed[index] or area != area_list[index]:
+            continue # Entrada desatualizada: o triângulo mudou depois de entrar no heap
+        removed[index] = True
+        last_area = max(last_area, area)
+        effective_area[index] = last_area
+
+        before, after = previous_list[index], following_list[index]
+        following_list[before] = after
+        previous_list[after] = before
+        for neighbour in (before, after):
+            if neighbour == 0 or neighbour == n - 1:
+                continue
+            (ax, ay), (bx, by), (cx, cy) = (points_list[previous_list[neighbour]], points_list[neighbour],
+                                            points_list[following_list[neighbour]])
+            new_area = 0.5 * abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay))
+            area_list[neighbour] = new_area
+            heapq.heappush(heap, (new_area, neighbour))
+    return effective_area
+
+def compute_path_set_effective_area(path_set: PathSet, workers: int | None = None) -> np.ndarray:
+    """
+    compute_vw_effective_area de todos os caminhos de um PathSet, em paralelo
+    (ver core/parallel_paths.py). Retorna um array alinhado com path_set.coords.
+    """
+    return parallel_paths.map_points(path_set, compute_vw_effective_area, np.float64, workers=workers)
+
+def vw_keep_mask(effective_area: np.ndarray, area_threshold: float = 0.0,
+                 target_nodes: int | None = None) -> np.ndarray:
+    """
+    Máscara dos vértices mantidos para um limiar de área ou, com target_nodes,
+    para uma quantidade total de nós (ver budget_keep_mask).
+    """
+    if target_nodes is None:
+        return effective_area > area_threshold
+    return budget_keep_mask(effective_area, max_nodes=target_nodes)
+
+def apply_visvalingam_simplification(
+        polylines_input: list[list[tuple[int, int]]] | PathSet,
+        area_threshold: float = 1.0, # Área mínima (px²) do triângulo de um vértice mantido
+        target_nodes: int | None = None,
+        effective_areas: list[np.ndarray] | np.ndarray | None = None,
+        workers: int | None = None
+    ) -> list[list[tuple[int, int]]] | PathSet | None:
+    """
+    Aplica a simplificação Visvalingam–Whyatt a uma lista de polilinhas ou a um PathSet.
+
+    Com target_nodes, o limiar é ignorado e o resultado tem exatamente essa
+    quantidade total de nós (ou só as extremidades, se ela for menor). As
+    áreas efetivas podem vir já calculadas (por caminho ou um único array
+    alinhado com as coordenadas); senão são calculadas com `workers` processos.
+    """
+    if polylines_input is None or len(polylines_input) == 0:
+        return None
+
+    path_set = polylines_input if isinstance(polylines_input, PathSet) else \
+        PathSet.from_polylines(polylines_input, dtype=np.float64)
+    if effective_areas is None:
+        flat_area = compute_path_set_effective_area(path_set, workers=workers)
+    elif isinstance(effective_areas, np.ndarray):
+        flat_area = effective_areas
+    else:
+        flat_area = np.concatenate(effective_areas) if len(effective_areas) else np.zeros(0)
+    simplified_path_set = path_set.filter_points(vw_keep_mask(flat_area, area_threshold, target_nodes))
+
+    label = f"nós={target_nodes}" if target_nodes is not None else f"área={area_threshold}"
+    _print_simplification_summary(f"Simplificação Visvalingam–Whyatt ({label})",
+                                   len(path_set), path_set.total_points, simplified_path_set.total_points)
+    if isinstance(polylines_input, PathSet):
+        return simplified_path_set
+    return simplified_path_set.with_coords(np.rint(simplified_path_set.coords).astype(np.int64)).to_polylines()
+
+# Simplificações disponíveis no pipeline, por nome: função(caminhos, tolerância) -> caminhos.
+# A tolerância é a distância (px) no RDP e a área mínima (px²) no VW.
+SIMPLIFICATION_METHODS = {
+    "rdp": apply_custom_rdp_simplification,
+    "vw": apply_visvalingam_simplification,
+}
+
+# --- Orçamento global de nós ---
+#
+# Com a significância RDP ou a área efetiva VW de cada vértice, todos os
+# caminhos disputam o mesmo orçamento: os vértices entram em uma única fila de
+# prioridade global (ordem decrescente de significância; empates pelo índice)
+# e são aceitos enquanto cabem no limite de nós e/ou de bytes. Contornos
+# pequenos, cujos vértices têm pouca significância, cedem nós aos grandes.
+# Como a fila é consumida uma única vez, o resultado atende o orçamento
+# exatamente, sem tentar vários epsilons. As extremidades (significância
+# infinita) são sempre mantidas, para nenhum caminho desaparecer.
+
+# Índice de significância por vértice de cada método de simplificação (PathSet -> array alinhado com coords)
+SIGNIFICANCE_METHODS = {
+    "rdp": compute_path_set_significance,
+    "vw": compute_path_set_effective_area,
+}
+
+def budget_keep_mask(priority: np.ndarray, max_nodes: int | None = None,
+                     vertex_bytes: np.ndarray | None = None, max_bytes: int | None = None,
+                     min_priority: float | None = None) -> np.ndarray:
+    """
+    Máscara dos vértices mantidos por um orçamento global.
+
+    Args:
+        priority (np.ndarray): Significância de cada vértice (infinito = extremidade, sempre mantida).
+        max_nodes (int | None): Quantidade máxima de vértices mantidos.
+        vertex_bytes (np.ndarray | None): Custo em bytes de cada vértice (obrigatório com max_bytes).
+        max_bytes (int | None): Soma máxima de vertex_bytes dos vértices mantidos.
+        min_priority (float | None): Vértices com significância <= min_priority nunca entram
+            (o epsilon/limiar usual, combinado com o orçamento).
+
+    Returns:
+        np.ndarray: Máscara booleana alinhada com priority.
+    """
+    keep = np.isinf(priority)
+    eligible = ~keep if min_priority is None else ~keep & (priority > min_priority)
+    candidates = np.flatnonzero(eligible)
+    queue = candidates[np.lexsort((candidates, -priority[candidates]))]
+    count = len(queue)
+    if max_nodes is not None:
+        count = min(count, max(0, int(max_nodes) - int(keep.sum())))
+    if max_bytes is not None:
+        if vertex_bytes is None:
+            raise ValueError("max_bytes exige vertex_bytes")
+        remaining = int(max_bytes) - int(vertex_bytes[keep].sum())
+        count = min(count, int(np.searchsorted(np.cumsum(vertex_bytes[queue]), remaining, side="right")))
+    keep[queue[:count]] = True
+    return keep
+
+def apply_node_budget(
+        polylines_input: list[list[tuple[int, int]]] | PathSet,
+        max_nodes: int | None = None,
+        max_bytes: int | None = None,
+        vertex_bytes: np.ndarray | None = None,
+        method: str = "rdp",
+        priorities: list[np.ndarray] | np.ndarray | None = None,
+        min_priority: float | None = None,
+        workers: int | None = None
+    ) -> list[list[tuple[int, int]]] | PathSet | None:
+    """
+    Simplifica todos os caminhos juntos para caber em max_nodes vértices e/ou
+    max_bytes (soma de vertex_bytes; ver utils/exporter.svg_vertex_bytes).
+
+    A significância usada é a do método ("rdp" ou "vw"); pode vir já calculada
+    em priorities (por caminho ou um único array alinhado com as coordenadas).
+    """
+    if polylines_input is None or len(polylines_input) == 0:
+        return None
+
+    path_set = polylines_input if isinstance(polylines_input, PathSet) else \
+        PathSet.from_polylines(polylines_input, dtype=np.float64)
+    if priorities is None:
+        flat_priority = SIGNIFICANCE_METHODS[method](path_set, workers=workers)
+    elif isinstance(priorities, np.ndarray):
+        flat_priority = priorities
+    else:
+        flat_priority = np.concatenate(priorities) if len(priorities) else np.zeros(0)
+
+    keep = budget_keep_mask(flat_priority, max_nodes, vertex_bytes, max_bytes, min_priority)
+    endpoints = np.isinf(flat_priority)
+    if (max_nodes is not None and int(endpoints.sum()) > max_nodes) or \
+            (max_bytes is not None and int(vertex_bytes[endpoints].sum()) > max_bytes):
+        print("Aviso: o orçamento é menor que as extremidades dos caminhos; mantidas só as extremidades.")
+    simplified_path_set = path_set.filter_points(keep)
+
+    limits = [f"nós={max_nodes}"] if max_nodes is not None else []
+    limits += [f"bytes={max_bytes}"] if max_bytes is not None else []
+    _print_simplification_summary(f"Simplificação por orçamento ({method}, {', '.join(limits) or 'sem limite'})",
+                                   len(path_set), path_set.total_points, simplified_path_set.total_points)
+    if isinstance(polylines_input, PathSet):
+        return simplified_path_set
+    return simplified_path_set.with_coords(np.rint(simplified_path_set.coords).astype(np.int64)).to_polylines()
+
 # Para manter a compatibilidade se algum código ainda chama optimize_paths,
 # ou simplesmente para ter um nome de função consistente.
 optimize_paths = apply_custom_rdp_simplification
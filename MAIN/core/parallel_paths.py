@@ -0,0 +1,186 @@
+# core/parallel_paths.py
+#
+# Execução paralela das etapas que processam um caminho por vez (RDP,
+# significância RDP, ajuste de Bézier) sobre um PathSet.
+#
+# Os caminhos são divididos em blocos contíguos com quantidades parecidas de
+# pontos; o buffer de coordenadas, os offsets e as flags vão para um bloco de
+# memória compartilhada (sem serializar tuplas), e resultados por ponto (ex.:
+# máscara do RDP) são escritos direto em outro bloco compartilhado. Cada
+# bloco produz exatamente o que o laço serial produziria para os mesmos
+# caminhos, e os resultados são montados na ordem dos caminhos: a saída não
+# depende da quantidade de processos.
+#
+# O pool de processos é persistente (criado no primeiro uso e reaproveitado
+# pelas chamadas seguintes) e encerrado na saída do programa.
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from core.path_set import PathSet
+except ModuleNotFoundError:
+    from path_set import PathSet
+
+PARALLEL_MIN_POINTS = 20_000 # Abaixo disto (com workers=None) o custo do pool não compensa
+CHUNKS_PER_WORKER = 4 # Blocos menores que a fatia de cada processo equilibram caminhos de custo desigual
+
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def resolve_workers(workers: int | None, total_points: int) -> int:
+    """
+    Quantidade de processos para uma chamada: workers explícito, ou (None) o
+    número de CPUs quando há pontos suficientes. Dentro de processos daemon
+    (ex.: workers do modo batch, que já rodam em paralelo) é sempre 1.
+    """
+    if multiprocessing.current_process().daemon:
+        return 1
+    if workers is None:
+        workers = (os.cpu_count() or 1) if total_points >= PARALLEL_MIN_POINTS else 1
+    return max(1, int(workers))
+
+def balanced_chunks(offsets: np.ndarray, chunk_count: int) -> list[tuple[int, int]]:
+    """
+    Divide os caminhos em até chunk_count intervalos contíguos [início, fim)
+    de índices, com quantidades de pontos parecidas.
+    """
+    path_count = len(offsets) - 1
+    if path_count == 0:
+        return []
+    targets = np.linspace(offsets[0], offsets[-1], max(1, chunk_count) + 1)[1:-1]
+    boundaries = np.searchsorted(offsets, targets, side="left")
+    boundaries = np.unique(np.concatenate(([0], np.clip(boundaries, 0, path_count), [path_count])))
+    return list(zip(boundaries[:-1].tolist(), boundaries[1:].tolist()))
+
+def shutdown_pool():
+    """Encerra o pool persistente (chamado automaticamente na saída do programa)."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+atexit.register(shutdown_pool)
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+# --- Memória compartilhada ---
+
+def _share_path_set(path_set: PathSet) -> tuple[shared_memory.SharedMemory, tuple]:
+    """Copia coords (float64), offsets e flags para um bloco compartilhado; devolve o bloco e o layout."""
+    point_count, path_count = path_set.total_points, len(path_set)
+    coords_bytes, offsets_bytes = point_count * 16, (path_count + 1) * 8
+    memory = shared_memory.SharedMemory(create=True, size=max(coords_bytes + offsets_bytes + path_count, 1))
+    coords, offsets, flags = _path_set_views(memory.buf, point_count, path_count)
+    coords[:] = path_set.coords
+    offsets[:] = path_set.offsets
+    flags[:] = path_set.flags
+    return memory, (memory.name, point_count, path_count)
+
+def _path_set_views(buffer, point_count: int, path_count: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    coords = np.ndarray((point_count, 2), dtype=np.float64, buffer=buffer)
+    offsets = np.ndarray((path_count + 1,), dtype=np.int64, buffer=buffer, offset=point_count * 16)
+    flags = np.ndarray((path_count,), dtype=np.uint8, buffer=buffer, offset=point_count * 16 + (path_count + 1) * 8)
+    return coords, offsets, flags
+
+def _run_point_chunk(coords, offsets, output, start: int, end: int, function, args: tuple):
+    for index in range(start, end):
+        first, last = offsets[index], offsets[index + 1]
+        output[first:last] = function(coords[first:last], *args)
+
+def _run_path_chunk(coords, offsets, flags, start: int, end: int, function, args: tuple) -> list:
+    return [function(coords[offsets[index]:offsets[index + 1]], int(flags[index]), *args)
+            for index in range(start, end)]
+
+def _point_chunk_in_worker(layout: tuple, output_layout: tuple, start: int, end: int, function, args: tuple):
+    memory = shared_memory.SharedMemory(name=layout[0])
+    output_memory = shared_memory.SharedMemory(name=output_layout[0])
+    try:
+        coords, offsets, _ = _path_set_views(memory.buf, layout[1], layout[2])
+        output = np.ndarray((layout[1],), dtype=np.dtype(output_layout[1]), buffer=output_memory.buf)
+        _run_point_chunk(coords, offsets, output, start, end, function, args)
+        del coords, offsets, output
+    finally:
+        memory.close()
+        output_memory.close()
+
+def _path_chunk_in_worker(layout: tuple, start: int, end: int, function, args: tuple) -> list:
+    memory = shared_memory.SharedMemory(name=layout[0])
+    try:
+        coords, offsets, flags = _path_set_views(memory.buf, layout[1], layout[2])
+        result = _run_path_chunk(coords, offsets, flags, start, end, function, args)
+        del coords, offsets, flags
+        return result
+    finally:
+        memory.close()
+
+# --- API ---
+
+def map_points(path_set: PathSet, function, dtype, *args, workers: int | None = None) -> np.ndarray:
+    """
+    Aplica function(pontos_do_caminho, *args) -> array (n,) a cada caminho e
+    devolve os resultados concatenados, alinhados com path_set.coords.
+
+    function precisa ser uma função de módulo (enviada aos processos por nome).
+    """
+    output = np.empty(path_set.total_points, dtype=dtype)
+    workers = resolve_workers(workers, path_set.total_points)
+    if workers == 1 or len(path_set) < 2:
+        _run_point_chunk(path_set.coords, path_set.offsets, output, 0, len(path_set), function, args)
+        return output
+
+    memory, layout = _share_path_set(path_set)
+    output_memory = shared_memory.SharedMemory(create=True, size=max(output.nbytes, 1))
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_point_chunk_in_worker, layout, (output_memory.name, output.dtype.str), start, end,
+                               function, args)
+                   for start, end in balanced_chunks(path_set.offsets, workers * CHUNKS_PER_WORKER)]
+        for future in futures:
+            future.result()
+        output[:] = np.ndarray(output.shape, dtype=output.dtype, buffer=output_memory.buf)
+    finally:
+        for block in (memory, output_memory):
+            block.close()
+            block.unlink()
+    return output
+
+def map_paths(path_set: PathSet, function, *args, workers: int | None = None) -> list:
+    """
+    Aplica function(pontos_do_caminho, flags_do_caminho, *args) a cada caminho
+    e devolve a lista de resultados, na ordem dos caminhos.
+
+    function precisa ser uma função de módulo (enviada aos processos por nome).
+    """
+    workers = resolve_workers(workers, path_set.total_points)
+    if workers == 1 or len(path_set) < 2:
+        return _run_path_chunk(path_set.coords, path_set.offsets, path_set.flags, 0, len(path_set), function, args)
+
+    memory, layout = _share_path_set(path_set)
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_path_chunk_in_worker, layout, start, end, function, args)
+                   for start, end in balanced_chunks(path_set.offsets, workers * CHUNKS_PER_WORKER)]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+    finally:
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,171 @@
+# core/path_set.py
+import numpy as np
+
+# Flags por caminho (bits em PathSet.flags)
+PATH_CLOSED = 1
+PATH_SELECTED = 2
+PATH_HOLE = 4 # Furo do caminho não-furo anterior: os dois formam um único caminho composto
+
+class PathSet:
+    """
+    Conjunto de caminhos guardado em arrays planos, compartilhado por todas as
+    etapas do pipeline (vetorização, otimização de nós, ajuste de curvas,
+    preview e exportação).
+
+    Em vez de listas de listas de tuplas, todos os pontos ficam em um único
+    buffer contíguo e cada caminho é um intervalo desse buffer:
+
+        coords  (N, 2)  coordenadas (x, y) de todos os caminhos, em sequência
+        offsets (P + 1,) o caminho i ocupa coords[offsets[i]:offsets[i + 1]]
+        flags   (P,)    bits por caminho (PATH_CLOSED, PATH_SELECTED, PATH_HOLE)
+
+    Caminhos compostos (contorno externo + furos, preenchidos com evenodd) são
+    o caminho externo seguido dos seus furos, marcados com PATH_HOLE.
+
+    Os caminhos individuais (path_set[i]) são views do buffer, sem cópia.
+    """
+    __slots__ = ('coords', 'offsets', 'flags')
+
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray, flags: np.ndarray | None = None):
+        self.coords = np.asarray(coords).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if flags is None:
+            flags = np.zeros(len(self.offsets) - 1, dtype=np.uint8)
+        self.flags = np.asarray(flags, dtype=np.uint8)
+
+    @classmethod
+    def from_contours(cls, contours: list, closed: bool = True) -> 'PathSet':
+        """
+        Constrói o conjunto a partir dos contornos do OpenCV (arrays (n, 1, 2)).
+
+        Os pontos são copiados uma única vez, em bloco, para o buffer contíguo; o
+        dtype dos contornos (int32 do findContours) é preservado.
+        """
+        if contours is None or len(contours) == 0:
+            return cls.empty()
+        lengths = np.fromiter((len(c) for c in contours), dtype=np.int64, count=len(contours))
+        offsets = np.zeros(len(contours) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if len(contours) == 1:
+            coords = np.asarray(contours[0]).reshape(-1, 2) # view, sem cópia
+        else:
+            coords = np.concatenate([np.asarray(c).reshape(-1, 2) for c in contours])
+        flags = np.full(len(contours), PATH_CLOSED if closed else 0, dtype=np.uint8)
+        return cls(coords, offsets, flags)
+
+    @classmethod
+    def from_polylines(cls, polylines: list, closed: bool = True, dtype=None) -> 'PathSet':
+        """Constrói o conjunto a partir de listas de tuplas (x, y) (formato antigo do pipeline)."""
+        arrays = [np.asarray(p, dtype=dtype).reshape(-1, 2) for p in polylines]
+        return cls.from_contours(arrays, closed=closed)
+
+    @classmethod
+    def concatenate(cls, path_sets: list['PathSet']) -> 'PathSet':
+        """Junta vários conjuntos em um só, na ordem dada (flags preservadas)."""
+        if not path_sets:
+            return cls.empty()
+        coords = np.concatenate([path_set.coords for path_set in path_sets])
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for path_set in path_sets:
+            offsets.append(path_set.offsets[1:] + base)
+            base += path_set.total_points
+        return cls(coords, np.concatenate(offsets), np.concatenate([path_set.flags for path_set in path_sets]))
+
+    @classmethod
+    def empty(cls, dtype=np.int32) -> 'PathSet':
+        return cls(np.empty((0, 2), dtype=dtype), np.zeros(1, dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        if index < 0:
+            index += len(self)
+        return self.coords[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            yield self.coords[start:end]
+
+    def __repr__(self) -> str:
+        return f"PathSet({len(self)} caminhos, {self.total_points} pontos, dtype={self.coords.dtype})"
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def total_points(self) -> int:
+        return int(self.offsets[-1])
+
+    def is_closed(self, index: int) -> bool:
+        return bool(self.flags[index] & PATH_CLOSED)
+
+    def is_hole(self, index: int) -> bool:
+        return bool(self.flags[index] & PATH_HOLE)
+
+    @property
+    def has_holes(self) -> bool:
+        return bool(np.any(self.flags & PATH_HOLE))
+
+    def compound_offsets(self) -> np.ndarray:
+        """
+        Particionamento dos caminhos em caminhos compostos: o grupo g ocupa os
+        caminhos [result[g], result[g + 1]) (um externo e os furos seguintes).
+        """
+        starts = np.flatnonzero((self.flags & PATH_HOLE) == 0)
+        if len(self) and (not len(starts) or starts[0] != 0):
+            starts = np.concatenate(([0], starts)) # Furo sem externo antes dele: grupo próprio
+        return np.concatenate((starts, [len(self)])).astype(np.int64)
+
+    def compound_parents(self) -> np.ndarray:
+        """Índice do caminho externo do caminho composto de cada caminho (o próprio índice, se não for furo)."""
+        groups = self.compound_offsets()
+        return np.repeat(groups[:-1], np.diff(groups))
+
+    def selected_mask(self) -> np.ndarray:
+        return (self.flags & PATH_SELECTED) != 0
+
+    def set_selected(self, index: int, selected: bool):
+        if selected:
+            self.flags[index] |= PATH_SELECTED
+        else:
+            self.flags[index] &= ~np.uint8(PATH_SELECTED)
+
+    def subset(self, indices) -> 'PathSet':
+        """Retorna um novo conjunto só com os caminhos indicados (índices ou máscara booleana)."""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        indices = indices.astype(np.int64, copy=False)
+        starts = self.offsets[indices]
+        lengths = self.offsets[indices + 1] - starts
+        new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=new_offsets[1:])
+        # Índice de cada ponto no buffer original, montado sem laço Python
+        point_index = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+        return PathSet(self.coords[point_index], new_offsets, self.flags[indices])
+
+    def filter_points(self, keep_mask: np.ndarray) -> 'PathSet':
+        """Retorna um novo conjunto só com os pontos em que keep_mask (alinhada com coords) é True."""
+        kept_before = np.zeros(len(keep_mask) + 1, dtype=np.int64)
+        np.cumsum(keep_mask, out=kept_before[1:])
+        return PathSet(self.coords[keep_mask], kept_before[self.offsets], self.flags.copy())
+
+    def with_coords(self, coords: np.ndarray) -> 'PathSet':
+        """Mesmo particionamento e flags, com outro buffer de coordenadas (ex.: após arredondamento)."""
+        return PathSet(coords, self.offsets, self.flags)
+
+    def as_cv_contours(self) -> list[np.ndarray]:
+        """Caminhos no formato (n, 1, 2) int32 esperado por cv2.polylines / cv2.drawContours."""
+        coords = self.coords
+        if coords.dtype != np.int32:
+            coords = np.rint(coords).astype(np.int32)
+        return [coords[start:end].reshape(-1, 1, 2)
+                for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
+
+    def to_polylines(self) -> list[list[tuple]]:
+        """Converte de volta para o formato de listas de tuplas (x, y)."""
+        all_points = [tuple(p) for p in self.coords.tolist()]
+        return [all_points[start:end] for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
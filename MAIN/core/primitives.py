@@ -0,0 +1,226 @@
+# core/primitives.py
+#
+# Reconhecimento de primitivas geométricas: contornos que são círculos,
+# elipses, retângulos, polígonos com poucos lados ou segmentos de reta viram
+# elementos nativos do SVG (<circle>, <ellipse>, <rect>, <polygon>, <line>) em
+# vez de um <path> com dezenas de nós.
+#
+# Os ajustes são feitos para todos os caminhos de uma vez: as somas dos
+# mínimos quadrados de cada caminho saem de np.add.reduceat sobre os pontos, e
+# os sistemas (3x3 do círculo, 6x6 da cônica) são resolvidos em lote. O erro
+# de cada ajuste é medido nos vértices e nos pontos médios das arestas (só os
+# vértices deixariam um quadrado passar por círculo: os quatro cantos estão
+# sobre o círculo circunscrito), e um caminho só é trocado quando o erro
+# máximo fica dentro da tolerância.
+#
+# Só entram caminhos fechados que não fazem parte de um caminho composto
+# (externo com furos); os abertos podem virar <line>.
+import numpy as np
+
+try:
+    from core.path_set import PathSet, PATH_CLOSED, PATH_HOLE
+    from core import node_optimization, parallel_paths
+except ModuleNotFoundError:
+    from path_set import PathSet, PATH_CLOSED, PATH_HOLE
+    import node_optimization, parallel_paths
+
+DEFAULT_TOLERANCE = 1.0 # Erro máximo (px) entre o contorno e a primitiva
+POLYGON_MAX_VERTICES = 8 # Acima disto o contorno continua um <path> (e pode receber Bézier)
+MIN_ANGLE = 0.01 # Rotação (graus) abaixo da qual a elipse fica alinhada aos eixos (angle = 0)
+
+def _ring_samples(path_set: PathSet) -> np.ndarray:
+    """Vértices intercalados com os pontos médios das arestas (inclusive a que fecha o anel): (2N, 2)."""
+    coords = path_set.coords.astype(np.float64)
+    following = np.arange(1, len(coords) + 1)
+    following[path_set.offsets[1:] - 1] = path_set.offsets[:-1]
+    samples = np.empty((2 * len(coords), 2), dtype=np.float64)
+    samples[0::2] = coords
+    samples[1::2] = 0.5 * (coords + coords[following])
+    return samples
+
+def fit_circles(samples: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ajuste algébrico de círculos (Kåsa) por mínimos quadrados, um por caminho.
+
+    Args:
+        samples (np.ndarray): Pontos (n, 2) de todos os caminhos, contíguos.
+        offsets (np.ndarray): O caminho i ocupa samples[offsets[i]:offsets[i + 1]]
+            (nenhum caminho vazio).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (centros (P, 2), raios (P,),
+            maior distância de um ponto ao círculo (P,)); NaN onde o ajuste falha.
+    """
+    starts = offsets[:-1]
+    counts = np.diff(offsets).astype(np.float64)
+    path_index = np.repeat(np.arange(len(counts)), np.diff(offsets))
+    # Coordenadas centradas e normalizadas por caminho: sistemas bem condicionados
+    mean = np.add.reduceat(samples, starts, axis=0) / counts[:, None]
+    centered = samples - mean[path_index]
+    scale = np.sqrt(np.add.reduceat((centered ** 2).sum(axis=1), starts) / counts)
+    scale[scale == 0] = 1.0
+    x, y = (centered / scale[path_index, None]).T
+
+    # x² + y² + D x + E y + F = 0
+    design = np.stack([x, y, np.ones_like(x)], axis=1)
+    target = -(x * x + y * y)
+    normal = np.add.reduceat(design[:, :, None] * design[:, None, :], starts, axis=0)
+    right = np.add.reduceat(design * target[:, None], starts, axis=0)
+    solution = np.full((len(counts), 3), np.nan)
+    solvable = np.abs(np.linalg.det(normal)) > 1e-12
+    solution[solvable] = np.linalg.solve(normal[solvable], right[solvable][:, :, None])[:, :, 0]
+
+    center = -0.5 * solution[:, :2]
+    radius = np.sqrt(np.maximum((center ** 2).sum(axis=1) - solution[:, 2], 0.0))
+    distances = np.abs(np.hypot(x - center[path_index, 0], y - center[path_index, 1]) - radius[path_index])
+    error = np.maximum.reduceat(np.nan_to_num(distances, nan=np.inf), starts) * scale
+    return center * scale[:, None] + mean, radius * scale, error
+
+def fit_ellipses(samples: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ajuste de cônicas por mínimos quadrados (autovetor do menor autovalor da
+    matriz de dispersão), um por caminho, convertido para elipse.
+
+    O erro de cada ponto é a distância de Sampson (|F| / |∇F|), uma
+    aproximação de primeira ordem da distância geométrica.
+
+    Returns:
+        tuple: (centros (P, 2), semieixos (P, 2) com o maior primeiro, rotação do
+            maior eixo em graus (P,), maior erro (P,)); NaN/inf onde a cônica não é
+            uma elipse.
+    """
+    starts = offsets[:-1]
+    counts = np.diff(offsets).astype(np.float64)
+    path_index = np.repeat(np.arange(len(counts)), np.diff(offsets))
+    mean = np.add.reduceat(samples, starts, axis=0) / counts[:, None]
+    centered = samples - mean[path_index]
+    scale = np.sqrt(np.add.reduceat((centered ** 2).sum(axis=1), starts) / counts)
+    scale[scale == 0] = 1.0
+    x, y = (centered / scale[path_index, None]).T
+
+    # a x² + b xy + c y² + d x + e y + f = 0, com |(a..f)| = 1
+    design = np.stack([x * x, x * y, y * y, x, y, np.ones_like(x)], axis=1)
+    scatter = np.add.reduceat(design[:, :, None] * design[:, None, :], starts, axis=0)
+    _, vectors = np.linalg.eigh(scatter)
+    a, b, c, d, e, f = vectors[:, :, 0].T
+
+    gradient_x = 2 * a[path_index] * x + b[path_index] * y + d[path_index]
+    gradient_y = b[path_index] * x + 2 * c[path_index] * y + e[path_index]
+    residual = (design * vectors[path_index, :, 0]).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distances = np.abs(residual) / np.hypot(gradient_x, gradient_y)
+        error = np.maximum.reduceat(np.nan_to_num(distances, nan=np.inf), starts) * scale
+
+        determinant = 4 * a * c - b * b
+        center_x = (b * e - 2 * c * d) / determinant
+        center_y = (b * d - 2 * a * e) / determinant
+        value = a * center_x ** 2 + b * center_x * center_y + c * center_y ** 2 + d * center_x + e * center_y + f
+        shape = np.stack([np.stack([a, 0.5 * b], axis=1), np.stack([0.5 * b, c], axis=1)], axis=1)
+        eigenvalues, axes = np.linalg.eigh(shape)
+        semi_axes = np.sqrt(-value[:, None] / eigenvalues)
+    valid = (determinant > 0) & np.all(np.isfinite(semi_axes), axis=1)
+    error[~valid] = np.inf
+    angle = np.degrees(np.arctan2(axes[:, 1, 0], axes[:, 0, 0]))
+    # O sinal do autovetor da cônica é arbitrário: com a, c < 0 o primeiro autovalor
+    # é o de maior módulo, e o primeiro semieixo sai o menor. Troca para o maior primeiro.
+    swapped = semi_axes[:, 0] < semi_axes[:, 1]
+    semi_axes[swapped] = semi_axes[swapped][:, ::-1]
+    angle[swapped] += 90.0
+    angle = (angle + 90.0) % 180.0 - 90.0
+    centers = np.stack([center_x, center_y], axis=1) * scale[:, None] + mean
+    return centers, semi_axes * scale[:, None], angle, error
+
+def _polygon_vertices(points: np.ndarray, keep: np.ndarray, tolerance: float) -> np.ndarray:
+    """Vértices mantidos pelo RDP de um anel, sem o primeiro quando ele fica no meio de um lado."""
+    vertices = points[keep].astype(np.float64)
+    if len(vertices) > 3:
+        previous, following = vertices[-1], vertices[1]
+        line = following - previous
+        offset = vertices[0] - previous
+        length = np.hypot(*line)
+        if length > 0 and abs(line[0] * offset[1] - line[1] * offset[0]) / length <= tolerance:
+            vertices = vertices[1:]
+    return vertices
+
+def _rectangle(vertices: np.ndarray, tolerance: float) -> tuple[float, float, float, float] | None:
+    """(x, y, largura, altura) se o polígono for um retângulo alinhado aos eixos."""
+    if len(vertices) != 4:
+        return None
+    steps = np.abs(np.diff(np.vstack([vertices, vertices[:1]]), axis=0))
+    if not np.all(steps.min(axis=1) <= tolerance): # Todo lado horizontal ou vertical
+        return None
+    low, high = vertices.min(axis=0), vertices.max(axis=0)
+    if np.any(high - low <= tolerance):
+        return None
+    return float(low[0]), float(low[1]), float(high[0] - low[0]), float(high[1] - low[1])
+
+def recognize_primitives(path_set: PathSet, tolerance: float = DEFAULT_TOLERANCE,
+                         workers: int | None = None) -> tuple[list[dict], PathSet]:
+    """
+    Troca por primitivas SVG os caminhos que são retângulos, círculos, elipses,
+    polígonos de até POLYGON_MAX_VERTICES lados (fechados) ou segmentos (abertos).
+
+    A ordem de teste é retângulo, círculo, elipse e polígono: um círculo pequeno
+    também passaria por polígono, e um retângulo tem cantos que nenhuma cônica
+    acompanha.
+
+    Args:
+        path_set (PathSet): Caminhos vetorizados (antes da simplificação).
+        tolerance (float): Erro máximo, em pixels, entre o contorno e a primitiva.
+        workers (int | None): Processos do RDP (ver core/parallel_paths.py).
+
+    Returns:
+        tuple[list[dict], PathSet]: (primitivas, caminhos restantes). Cada primitiva
+            é um dict com "type" ("circle", "ellipse", "rect", "polygon" ou "line")
+            e os atributos dela: cx/cy/r; cx/cy/rx/ry/angle; x/y/width/height;
+            points (array (k, 2)); x1/y1/x2/y2.
+    """
+    if path_set is None or len(path_set) == 0:
+        return [], path_set
+
+    lengths = path_set.lengths
+    closed = (path_set.flags & PATH_CLOSED) != 0
+    groups = path_set.compound_offsets()
+    single = np.zeros(len(path_set), dtype=bool)
+    single[groups[:-1][np.diff(groups) == 1]] = True # Caminho composto de um só anel
+    rings = np.flatnonzero(closed & single & ((path_set.flags & PATH_HOLE) == 0) & (lengths >= 3))
+    segments = np.flatnonzero(~closed & (lengths >= 2))
+
+    shapes: dict[int, dict] = {}
+    if len(rings):
+        ring_set = path_set.subset(rings)
+        keep = parallel_paths.map_points(ring_set, node_optimization.rdp_keep_mask, bool, tolerance, workers=workers)
+        samples = _ring_samples(ring_set)
+        sample_offsets = 2 * ring_set.offsets
+        centers, radii, circle_error = fit_circles(samples, sample_offsets)
+        ellipse_centers, semi_axes, angles, ellipse_error = fit_ellipses(samples, sample_offsets)
+        for position, index in enumerate(rings.tolist()):
+            start, end = ring_set.offsets[position], ring_set.offsets[position + 1]
+            vertices = _polygon_vertices(ring_set.coords[start:end], keep[start:end], tolerance)
+            rectangle = _rectangle(vertices, tolerance)
+            if rectangle is not None:
+                shapes[index] = dict(zip(("type", "x", "y", "width", "height"), ("rect",) + rectangle))
+            elif circle_error[position] <= tolerance:
+                shapes[index] = {"type": "circle", "cx": float(centers[position, 0]),
+                                 "cy": float(centers[position, 1]), "r": float(radii[position])}
+            elif ellipse_error[position] <= tolerance:
+                angle = float(angles[position]) if abs(angles[position]) >= MIN_ANGLE else 0.0
+                shapes[index] = {"type": "ellipse", "cx": float(ellipse_centers[position, 0]),
+                                 "cy": float(ellipse_centers[position, 1]), "rx": float(semi_axes[position, 0]),
+                                 "ry": float(semi_axes[position, 1]), "angle": angle}
+            elif len(vertices) <= POLYGON_MAX_VERTICES:
+                shapes[index] = {"type": "polygon", "points": vertices}
+
+    for index in segments.tolist():
+        points = path_set[index].astype(np.float64)
+        if node_optimization.rdp_keep_mask(points, tolerance).sum() == 2:
+            (x1, y1), (x2, y2) = points[0].tolist(), points[-1].tolist()
+            shapes[index] = {"type": "line", "x1": x1, "y1": y1, "x2": x2, "y2": y2}
+
+    matched = np.zeros(len(path_set), dtype=bool)
+    matched[list(shapes)] = True
+    kinds = [shape["type"] for shape in shapes.values()]
+    print(f"Primitivas: {len(shapes)} de {len(path_set)} caminhos ("
+          + ", ".join(f"{kinds.count(kind)} {kind}" for kind in ("circle", "ellipse", "rect", "polygon", "line")
+                      if kind in kinds) + ").")
+    return [shapes[index] for index in sorted(shapes)], path_set.subset(np.flatnonzero(~matched))
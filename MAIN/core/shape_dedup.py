@@ -0,0 +1,231 @@
+# core/shape_dedup.py
+#
+# Deduplicação de formas repetidas (retículas, ícones, letras): caminhos
+# geometricamente iguais a menos de uma translação (e, opcionalmente, de uma
+# rotação e escala) formam uma classe. Só um representante de cada classe é
+# simplificado e ajustado; o exportador escreve o representante uma vez em um
+# <symbol> dentro de <defs> e cada ocorrência como um <use>.
+#
+# Cada caminho composto (externo + furos) é normalizado e arredondado para uma
+# grade, e a chave da classe são os bytes desse resultado:
+#   - translação: coordenadas relativas ao canto do retângulo envolvente;
+#   - semelhança: relativas ao centróide, giradas para o eixo principal (o
+#     sentido vem do terceiro momento) e divididas pelo raio médio. Aqui o
+#     ponto inicial de cada anel e a ordem dos furos não são confiáveis,
+#     então cada anel começa no menor vértice da grade e os furos são ordenados.
+# A transformação de cada ocorrência leva o representante (no seu próprio
+# referencial) até ela, com erro da ordem do passo da grade. O representante é
+# a maior ocorrência da classe: as escalas ficam <= 1, e o erro da
+# simplificação e do Bézier (feitos na escala do representante) nunca cresce
+# nas ocorrências.
+#
+# Na semelhança o passo da grade é relativo ao tamanho, então formas parecidas
+# mas diferentes (retângulos com proporções próximas) podem cair na mesma chave.
+# Por isso cada ocorrência é conferida: o representante transformado precisa
+# cair sobre ela, vértice a vértice, a até MAX_INSTANCE_ERROR pixels; as que
+# não caem formam outra classe ou continuam caminhos comuns.
+import numpy as np
+
+try:
+    from core.path_set import PathSet
+except ModuleNotFoundError:
+    from path_set import PathSet
+
+DEDUP_MODES = ("translation", "similarity")
+TRANSLATION_QUANTUM = 0.01 # Passo da grade (px) da translação: absorve só o ruído de ponto flutuante
+ROTATION_QUANTUM = 0.25 # Passo da grade (px) com rotação: os vértices girados não caem na mesma posição exata
+SIMILARITY_QUANTUM = 1 / 32 # Passo da grade com escala, em frações do raio médio da forma
+MIN_INSTANCES = 2 # Classes com uma só ocorrência continuam caminhos comuns
+MAX_INSTANCE_ERROR = 0.5 # Desvio máximo (px) de um vértice da ocorrência para o representante transformado
+
+class ShapeClasses:
+    """
+    Classes de formas repetidas.
+
+        representatives   PathSet com um caminho composto por classe, no referencial
+                          do representante (a âncora dele na origem)
+        transforms        (M, 4) float64: x, y, rotação (graus) e escala (<= 1) de
+                          cada ocorrência, agrupadas por classe
+        transform_offsets a classe c usa transforms[transform_offsets[c]:transform_offsets[c + 1]]
+    """
+    __slots__ = ('representatives', 'transforms', 'transform_offsets')
+
+    def __init__(self, representatives: PathSet, transforms: np.ndarray, transform_offsets: np.ndarray):
+        self.representatives = representatives
+        self.transforms = transforms
+        self.transform_offsets = transform_offsets
+
+    def __len__(self) -> int:
+        return len(self.transform_offsets) - 1
+
+    @property
+    def instance_count(self) -> int:
+        return len(self.transforms)
+
+    def symbols(self, fitted_representatives: list[list[tuple]] | PathSet) -> list[dict]:
+        """
+        Separa os representantes já simplificados/ajustados por classe, no formato do
+        exportador: [{"paths": PathSet ou caminhos em segmentos, "transforms": (n, 4)}, ...].
+        """
+        if isinstance(fitted_representatives, PathSet):
+            groups = fitted_representatives.compound_offsets()
+            class_paths = [fitted_representatives.subset(np.arange(start, end))
+                           for start, end in zip(groups[:-1].tolist(), groups[1:].tolist())]
+        else: # Com Bézier, um caminho composto vira um único caminho em segmentos
+            class_paths = [[path] for path in fitted_representatives]
+        return [{"paths": paths, "transforms": self.transforms[start:end]}
+                for paths, start, end in zip(class_paths, self.transform_offsets[:-1].tolist(),
+                                             self.transform_offsets[1:].tolist())]
+
+def _similarity_frames(coords: np.ndarray, point_group: np.ndarray, group_starts: np.ndarray,
+                       counts: np.ndarray, rotation: bool, scale: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Centróide, ângulo (rad) do eixo principal e raio médio de cada caminho composto."""
+    centroid = np.add.reduceat(coords, group_starts, axis=0) / counts[:, None]
+    centered = coords - centroid[point_group]
+    angle = np.zeros(len(counts))
+    if rotation:
+        moments = np.add.reduceat(np.stack([centered[:, 0] ** 2, centered[:, 1] ** 2,
+                                            centered[:, 0] * centered[:, 1]], axis=1), group_starts, axis=0)
+        angle = 0.5 * np.arctan2(2 * moments[:, 2], moments[:, 0] - moments[:, 1])
+        along = centered[:, 0] * np.cos(angle)[point_group] + centered[:, 1] * np.sin(angle)[point_group]
+        angle = np.where(np.add.reduceat(along ** 3, group_starts) < 0, angle + np.pi, angle)
+    radius = np.ones(len(counts))
+    if scale:
+        radius = np.sqrt(np.add.reduceat((centered ** 2).sum(axis=1), group_starts) / counts)
+        radius[radius == 0] = 1.0
+    return centroid, angle, radius
+
+def _canonical_rings(grid: np.ndarray, ring_offsets: list[int]) -> tuple[bytes, np.ndarray]:
+    """
+    Chave de um caminho composto na semelhança: anéis a partir do menor vértice,
+    furos ordenados. Retorna também a ordem canônica dos pontos (índices locais),
+    que põe em correspondência os vértices de duas formas com a mesma chave.
+    """
+    rings = []
+    for start, end in zip(ring_offsets[:-1], ring_offsets[1:]):
+        ring = grid[start:end]
+        first = int(np.lexsort((ring[:, 0], ring[:, 1]))[0])
+        order = np.roll(np.arange(start, end), -first)
+        rings.append((len(ring).to_bytes(8, "little") + grid[order].tobytes(), order))
+    rings[1:] = sorted(rings[1:], key=lambda ring: ring[0])
+    return b"".join(key for key, _ in rings), np.concatenate([order for _, order in rings])
+
+def _instance_errors(points: np.ndarray, representative: np.ndarray, transforms: np.ndarray) -> np.ndarray:
+    """
+    Maior distância (px) entre os vértices de cada ocorrência, points (k, n, 2), e
+    o representante (n, 2) levado até ela por transforms (k, 4): x, y, graus, escala.
+    """
+    turn = np.radians(transforms[:, 2])
+    cos, sin = np.cos(turn)[:, None], np.sin(turn)[:, None]
+    factor = transforms[:, 3, None]
+    placed_x = factor * (cos * representative[:, 0] - sin * representative[:, 1]) + transforms[:, 0, None]
+    placed_y = factor * (sin * representative[:, 0] + cos * representative[:, 1]) + transforms[:, 1, None]
+    return np.hypot(placed_x - points[:, :, 0], placed_y - points[:, :, 1]).max(axis=1)
+
+def deduplicate_paths(path_set: PathSet, rotation: bool = False, scale: bool = False,
+                      min_instances: int = MIN_INSTANCES) -> tuple[ShapeClasses, PathSet]:
+    """
+    Agrupa caminhos compostos iguais a menos de translação (e, se pedido, rotação e escala).
+
+    Args:
+        path_set (PathSet): Caminhos vetorizados.
+        rotation (bool): Considera iguais formas giradas.
+        scale (bool): Considera iguais formas em outra escala.
+        min_instances (int): Ocorrências mínimas para uma classe virar <symbol>.
+
+    Returns:
+        tuple[ShapeClasses, PathSet]: (classes repetidas, caminhos que não se repetem,
+            na ordem original).
+    """
+    groups = path_set.compound_offsets() if len(path_set) else np.zeros(1, dtype=np.int64)
+    group_count = len(groups) - 1
+    group_starts = path_set.offsets[groups[:-1]]
+    counts = np.diff(path_set.offsets[groups])
+    non_empty = counts > 0
+    similarity = rotation or scale
+    coords = path_set.coords.astype(np.float64)
+
+    if group_count and path_set.total_points:
+        point_group = np.repeat(np.arange(group_count), counts)
+        reduce_starts = np.minimum(group_starts, max(path_set.total_points - 1, 0))
+        if similarity:
+            anchor, angle, radius = _similarity_frames(coords, point_group, reduce_starts,
+                                                       np.maximum(counts, 1), rotation, scale)
+            centered = coords - anchor[point_group]
+            cos, sin = np.cos(angle)[point_group], np.sin(angle)[point_group]
+            normalized = np.stack([cos * centered[:, 0] + sin * centered[:, 1],
+                                   -sin * centered[:, 0] + cos * centered[:, 1]], axis=1)
+            quantum = SIMILARITY_QUANTUM if scale else ROTATION_QUANTUM # Sem escala, radius é 1
+            grid = np.rint(normalized / (radius[point_group, None] * quantum)).astype(np.int64)
+        else:
+            anchor = np.minimum.reduceat(coords, reduce_starts, axis=0)
+            angle, radius = np.zeros(group_count), np.ones(group_count)
+            grid = np.rint((coords - anchor[point_group]) / TRANSLATION_QUANTUM).astype(np.int64)
+    else:
+        anchor, angle, radius = np.zeros((group_count, 2)), np.zeros(group_count), np.ones(group_count)
+        grid = np.zeros((0, 2), dtype=np.int64)
+
+    offsets = path_set.offsets.tolist()
+    flags = path_set.flags
+    classes: dict[bytes, list[int]] = {}
+    point_order: dict[int, np.ndarray] = {} # Ordem canônica (índices globais) de cada caminho composto
+    for group in np.flatnonzero(non_empty).tolist():
+        first_path, end_path = int(groups[group]), int(groups[group + 1])
+        start, end = offsets[first_path], offsets[end_path]
+        ring_offsets = [offset - start for offset in offsets[first_path:end_path + 1]]
+        if similarity:
+            key, order = _canonical_rings(grid[start:end], ring_offsets)
+            point_order[group] = order + start
+        else:
+            key = np.asarray(ring_offsets, dtype=np.int64).tobytes() + grid[start:end].tobytes()
+            point_order[group] = np.arange(start, end)
+        key = flags[first_path:end_path].tobytes() + key
+        classes.setdefault(key, []).append(group)
+
+    # O representante é a maior ocorrência (a primeira, em empate; na translação,
+    # sempre a primeira) e só leva as ocorrências sobre as quais cai depois de
+    # transformado. As que sobram formam outra classe com a maior delas, e assim por diante
+    repeated, representative_groups = [], []
+    for candidates in classes.values():
+        while len(candidates) >= min_instances:
+            representative = candidates[int(np.argmax(radius[candidates]))]
+            reference = coords[point_order[representative]] - anchor[representative]
+            placements = np.column_stack([anchor[candidates], np.degrees(angle[candidates] - angle[representative]),
+                                          radius[candidates] / radius[representative]])
+            points = coords[np.stack([point_order[member] for member in candidates])]
+            matches = (_instance_errors(points, reference, placements) <= MAX_INSTANCE_ERROR).tolist()
+            members = [member for member, match in zip(candidates, matches) if match]
+            candidates = [member for member, match in zip(candidates, matches) if not match]
+            if len(members) >= min_instances:
+                repeated.append(members)
+                representative_groups.append(representative)
+    order = sorted(range(len(repeated)), key=lambda index: repeated[index][0]) # Ordem da primeira ocorrência
+    repeated = [repeated[index] for index in order]
+    representative_groups = [representative_groups[index] for index in order]
+    is_instance = np.zeros(group_count, dtype=bool)
+    for members in repeated:
+        is_instance[members] = True
+
+    path_indices = [np.arange(groups[group], groups[group + 1]) for group in representative_groups]
+    representatives = path_set.subset(np.concatenate(path_indices) if path_indices else np.zeros(0, np.int64))
+    representatives = representatives.with_coords(representatives.coords.astype(np.float64))
+    if len(representatives):
+        rep_groups = representatives.compound_offsets()
+        rep_counts = np.diff(representatives.offsets[rep_groups])
+        representatives.coords -= np.repeat(anchor[representative_groups], rep_counts, axis=0)
+
+    transforms = np.zeros((sum(map(len, repeated)), 4), dtype=np.float64)
+    transform_offsets = np.zeros(len(repeated) + 1, dtype=np.int64)
+    np.cumsum([len(members) for members in repeated], out=transform_offsets[1:])
+    for index, (members, representative) in enumerate(zip(repeated, representative_groups)):
+        rows = transforms[transform_offsets[index]:transform_offsets[index + 1]]
+        rows[:, :2] = anchor[members]
+        rows[:, 2] = np.degrees(angle[members] - angle[representative])
+        rows[:, 3] = radius[members] / radius[representative]
+
+    kept_paths = np.repeat(~is_instance, np.diff(groups)) if group_count else np.zeros(0, dtype=bool)
+    remaining = path_set.subset(np.flatnonzero(kept_paths))
+    shape_classes = ShapeClasses(representatives, transforms, transform_offsets)
+    print(f"Formas repetidas: {shape_classes.instance_count} de {group_count} caminhos em "
+          f"{len(shape_classes)} classes; {len(remaining)} caminhos únicos.")
+    return shape_classes, remaining
@@ -0,0 +1,260 @@
+# core/shared_arcs.py
+#
+# Simplificação que preserva a topologia: regiões vizinhas (ex.: as camadas
+# do modo paleta) têm fronteiras com exatamente os mesmos vértices, mas cada
+# caminho simplificado por conta própria perde vértices diferentes, e as duas
+# cópias da fronteira deixam frestas e sobreposições entre as regiões.
+#
+# Aqui os caminhos viram um grafo planar: junções são os vértices em que o
+# conjunto de caminhos que passam por ali muda (o par de vizinhos difere entre
+# duas ocorrências do mesmo ponto) e as pontas dos caminhos abertos. Cada
+# caminho é cortado nas junções em arcos; um arco percorrido por dois
+# caminhos (em qualquer sentido) é guardado uma única vez. Os arcos são
+# simplificados (e, opcionalmente, ajustados com Bézier) uma vez cada, com as
+# pontas fixas, e os caminhos são remontados a partir deles: as duas regiões
+# recebem a mesma fronteira simplificada.
+import numpy as np
+
+try:
+    from core.path_set import PathSet, PATH_CLOSED, PATH_HOLE
+    from core import curve_fitter, node_optimization, parallel_paths
+except ModuleNotFoundError:
+    from path_set import PathSet, PATH_CLOSED, PATH_HOLE
+    import curve_fitter, node_optimization, parallel_paths
+
+class SharedArcs:
+    """
+    Caminhos de um PathSet decompostos em arcos únicos.
+
+        arcs        PathSet de arcos abertos (um arco fechado sem junções repete o
+                    primeiro ponto no fim)
+        refs        arcos de cada caminho, em ordem; ~i = arco i percorrido ao contrário
+        ref_offsets o caminho j usa refs[ref_offsets[j]:ref_offsets[j + 1]]
+        flags       flags dos caminhos originais
+    """
+    __slots__ = ('arcs', 'refs', 'ref_offsets', 'flags')
+
+    def __init__(self, arcs: PathSet, refs: np.ndarray, ref_offsets: np.ndarray, flags: np.ndarray):
+        self.arcs = arcs
+        self.refs = refs
+        self.ref_offsets = ref_offsets
+        self.flags = flags
+
+    @property
+    def shared_count(self) -> int:
+        """Quantidade de arcos usados por mais de um caminho."""
+        usage = np.bincount(np.where(self.refs < 0, ~self.refs, self.refs), minlength=len(self.arcs))
+        return int(np.count_nonzero(usage > 1))
+
+    def _path_refs(self, index: int) -> list[int]:
+        return self.refs[self.ref_offsets[index]:self.ref_offsets[index + 1]].tolist()
+
+    def assemble(self, arcs: PathSet) -> PathSet:
+        """Remonta os caminhos a partir de arcos (ex.: simplificados), na ordem e com as flags originais."""
+        pieces = []
+        lengths = np.zeros(len(self.flags), dtype=np.int64)
+        closed = ((self.flags & PATH_CLOSED) != 0).tolist()
+        for index in range(len(self.flags)):
+            path_refs = self._path_refs(index)
+            for position, ref in enumerate(path_refs):
+                points = arcs[ref] if ref >= 0 else arcs[~ref][::-1]
+                # A ponta final de cada arco é o começo do seguinte (ou, fechado, o do primeiro)
+                if closed[index] or position < len(path_refs) - 1:
+                    points = points[:-1]
+                pieces.append(points)
+                lengths[index] += len(points)
+        offsets = np.zeros(len(self.flags) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        coords = np.concatenate(pieces) if pieces else np.empty((0, 2), dtype=arcs.coords.dtype)
+        return PathSet(coords, offsets, self.flags.copy())
+
+    def assemble_curves(self, arcs: PathSet, tolerance: float,
+                        corner_angle: float | None = None, workers: int | None = None) -> list[list[tuple]]:
+        """
+        Ajusta Bézier a cada arco uma única vez e remonta os caminhos no formato
+        de segmentos do exportador (furos PATH_HOLE como subcaminhos do caminho
+        composto anterior, como em curve_fitter.fit_curves_to_paths).
+        """
+        corner_angle = curve_fitter.DEFAULT_CORNER_ANGLE if corner_angle is None else corner_angle
+        open_arcs = PathSet(arcs.coords, arcs.offsets, np.zeros(len(arcs), dtype=np.uint8))
+        fitted = parallel_paths.map_paths(open_arcs, curve_fitter._fit_path_set_path, tolerance, corner_angle,
+                                          workers=workers)
+        structured_paths = []
+        for index in range(len(self.flags)):
+            segments = []
+            for ref in self._path_refs(index):
+                arc_segments = fitted[ref] if ref >= 0 else _reversed_segments(fitted[~ref])
+                if not arc_segments:
+                    continue
+                segments.extend(arc_segments if not segments else arc_segments[1:])
+            if not segments:
+                continue
+            if self.flags[index] & PATH_HOLE and structured_paths:
+                structured_paths[-1].append(('Z',))
+                structured_paths[-1].extend(segments)
+            else:
+                structured_paths.append(segments)
+        return structured_paths
+
+def _reversed_segments(segments: list[tuple]) -> list[tuple]:
+    """Os mesmos segmentos ('M', 'L', 'C') percorridos do fim para o começo."""
+    ends = [segment[-1] for segment in segments]
+    reversed_segments = [('M', ends[-1])]
+    for index in range(len(segments) - 1, 0, -1):
+        command = segments[index][0]
+        if command == 'C':
+            reversed_segments.append(('C', segments[index][2], segments[index][1], ends[index - 1]))
+        else:
+            reversed_segments.append((command, ends[index - 1]))
+    return reversed_segments
+
+def _junctions(point_ids: np.ndarray, path_set: PathSet) -> np.ndarray:
+    """Máscara (por ocorrência) dos vértices que são junções."""
+    offsets = path_set.offsets
+    lengths = np.diff(offsets)
+    count = len(point_ids)
+    path_index = np.repeat(np.arange(len(path_set)), lengths)
+    indices = np.arange(count)
+    is_first = indices == offsets[path_index]
+    is_last = indices == offsets[path_index + 1] - 1
+    closed = ((path_set.flags & PATH_CLOSED) != 0)[path_index]
+
+    # Vizinhos de cada ocorrência (cíclicos nos caminhos fechados; -1 nas pontas dos abertos)
+    previous_id = point_ids[np.where(is_first, offsets[path_index + 1] - 1, indices - 1)]
+    next_id = point_ids[np.where(is_last, offsets[path_index], np.minimum(indices + 1, count - 1))]
+    previous_id[is_first & ~closed] = -1
+    next_id[is_last & ~closed] = -1
+    pairs = np.stack((point_ids, np.minimum(previous_id, next_id), np.maximum(previous_id, next_id)), axis=1)
+
+    # Ponto com mais de um par de vizinhos distinto: ali os caminhos se separam
+    distinct_pairs = np.unique(pairs, axis=0)
+    is_junction = np.bincount(distinct_pairs[:, 0], minlength=int(point_ids.max()) + 1) > 1
+    is_junction[point_ids[(is_first | is_last) & ~closed]] = True
+    return is_junction[point_ids]
+
+def _canonical(sequence: np.ndarray, ring: bool) -> tuple[bytes, np.ndarray, bool]:
+    """
+    Chave do arco (igual nos dois sentidos), sequência no sentido canônico e se
+    ela é a inversa da recebida. Um anel sem junções pode ser lido a partir de
+    qualquer ponto: ele passa a começar (e terminar) no menor ponto, e o caminho
+    que o usa começa ali também.
+    """
+    if ring:
+        body = sequence[:-1]
+        start = int(np.argmin(body))
+        forward = np.concatenate((body[start:], body[:start], body[start:start + 1]))
+    else:
+        forward = sequence
+    backward = forward[::-1]
+    forward_key, backward_key = forward.tobytes(), backward.tobytes()
+    if backward_key < forward_key:
+        return backward_key, backward, True
+    return forward_key, forward, False
+
+def build_shared_arcs(path_set: PathSet) -> SharedArcs:
+    """
+    Decompõe os caminhos em arcos entre junções, com os arcos repetidos
+    (inclusive os percorridos em sentido contrário) guardados uma vez só.
+    """
+    if path_set.total_points == 0:
+        return SharedArcs(PathSet.empty(path_set.coords.dtype), np.zeros(0, dtype=np.int64),
+                          np.zeros(len(path_set) + 1, dtype=np.int64), path_set.flags.copy())
+    unique_coords, point_ids = np.unique(path_set.coords, axis=0, return_inverse=True)
+    point_ids = point_ids.reshape(-1).astype(np.int64)
+    junction = _junctions(point_ids, path_set)
+
+    arc_index: dict[bytes, int] = {}
+    arc_sequences: list[np.ndarray] = []
+    refs: list[int] = []
+    ref_offsets = [0]
+    offsets = path_set.offsets.tolist()
+    closed = ((path_set.flags & PATH_CLOSED) != 0).tolist()
+    for index in range(len(path_set)):
+        start, end = offsets[index], offsets[index + 1]
+        ids = point_ids[start:end]
+        cuts = np.flatnonzero(junction[start:end])
+        if len(ids) == 0:
+            ref_offsets.append(len(refs))
+            continue
+        if closed[index]:
+            first_cut = int(cuts[0]) if len(cuts) else 0
+            ids = np.concatenate((ids[first_cut:], ids[:first_cut], ids[first_cut:first_cut + 1]))
+            cuts = np.concatenate(((cuts - first_cut) % (end - start), [end - start])) if len(cuts) else None
+        if cuts is None:
+            pieces = [(ids, True)]
+        else:
+            cuts = np.unique(cuts).tolist()
+            if len(cuts) == 1: # Caminho aberto de um ponto só
+                cuts = [0, 0]
+            pieces = [(ids[a:b + 1], False) for a, b in zip(cuts[:-1], cuts[1:])]
+        for sequence, ring in pieces:
+            key, canonical, reversed_ = _canonical(sequence, ring)
+            arc = arc_index.get(key)
+            if arc is None:
+                arc = arc_index[key] = len(arc_sequences)
+                arc_sequences.append(canonical)
+            refs.append(~arc if reversed_ else arc)
+        ref_offsets.append(len(refs))
+
+    lengths = np.fromiter((len(sequence) for sequence in arc_sequences), dtype=np.int64, count=len(arc_sequences))
+    arc_offsets = np.zeros(len(arc_sequences) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=arc_offsets[1:])
+    arcs = PathSet(unique_coords[np.concatenate(arc_sequences)], arc_offsets,
+                   np.zeros(len(arc_sequences), dtype=np.uint8))
+    return SharedArcs(arcs, np.array(refs, dtype=np.int64), np.array(ref_offsets, dtype=np.int64),
+                      path_set.flags.copy())
+
+def simplify_arcs(shared: SharedArcs, epsilon: float, method: str = "rdp", workers: int | None = None) -> PathSet:
+    """
+    Simplifica cada arco uma vez (pontas fixas), com a significância do método
+    ("rdp": distância em px; "vw": área em px²). Arcos que começam e terminam no
+    mesmo ponto mantêm ao menos dois vértices internos, para não virarem um ponto.
+    """
+    significance = node_optimization.SIGNIFICANCE_METHODS[method](shared.arcs, workers=workers)
+    keep = significance > epsilon
+    offsets = shared.arcs.offsets
+    for index in np.flatnonzero(np.diff(offsets) > 3).tolist():
+        start, end = offsets[index], offsets[index + 1]
+        if np.array_equal(shared.arcs.coords[start], shared.arcs.coords[end - 1]) and \
+                np.count_nonzero(keep[start + 1:end - 1]) < 2:
+            interior = significance[start + 1:end - 1]
+            keep[start + 1 + np.argsort(-interior, kind="stable")[:2]] = True
+    return shared.arcs.filter_points(keep)
+
+def simplify_shared_arcs(path_sets: list[PathSet], epsilon: float, method: str = "rdp",
+                         bezier_tolerance: float | None = None, corner_angle: float | None = None,
+                         workers: int | None = None) -> list[PathSet | list[list[tuple]]]:
+    """
+    Simplifica juntos caminhos que compartilham fronteiras (ex.: as camadas do
+    modo paleta), preservando a topologia.
+
+    Args:
+        path_sets (list[PathSet]): Conjuntos de caminhos (um por camada).
+        epsilon (float): Tolerância da simplificação (distância no RDP, área no VW).
+        method (str): "rdp" ou "vw".
+        bezier_tolerance (float | None): Se informada, cada arco também recebe o
+            ajuste de Bézier uma única vez, e o resultado vem no formato de segmentos.
+
+    Returns:
+        list: Um resultado por conjunto de entrada: PathSet (sem Bézier) ou
+            caminhos no formato de segmentos (com Bézier).
+    """
+    counts = [len(path_set) for path_set in path_sets]
+    combined = PathSet.concatenate(path_sets)
+    shared = build_shared_arcs(combined)
+    arcs = simplify_arcs(shared, epsilon, method, workers)
+    print(f"Arcos compartilhados: {len(combined)} caminhos -> {len(shared.arcs)} arcos únicos "
+          f"({shared.shared_count} compartilhados); pontos simplificados: {shared.arcs.total_points}"
+          f" -> {arcs.total_points} (em vez de {combined.total_points} caminho a caminho).")
+
+    results = []
+    start = 0
+    for count in counts:
+        layer = SharedArcs(arcs, shared.refs, shared.ref_offsets[start:start + count + 1],
+                           shared.flags[start:start + count])
+        if bezier_tolerance is not None:
+            results.append(layer.assemble_curves(arcs, bezier_tolerance, corner_angle, workers))
+        else:
+            results.append(layer.assemble(arcs))
+        start += count
+    return results
@@ -1,22 +1,43 @@
 # core/vectorization.py
 import numpy as np
 
-def vectorize_from_contours(contours: list) -> list[list[tuple[int, int]]] | None:
+try:
+    from core.path_set import PathSet, PATH_HOLE
+except ModuleNotFoundError:
+    from path_set import PathSet, PATH_HOLE
+
+def vectorize_from_contours(contours: list | PathSet,
+                            as_path_set: bool = False,
+                            hole_mask: np.ndarray | None = None) -> list[list[tuple[int, int]]] | PathSet | None:
     """
     Converte os contornos detectados pelo OpenCV em uma lista de caminhos vetoriais.
 
     Args:
-        contours (list): A lista de contornos do OpenCV.
+        contours (list | PathSet): A lista de contornos do OpenCV.
                          Cada contorno é um np.ndarray de formato (n, 1, 2).
+        as_path_set (bool): Se True, retorna um PathSet (buffer plano de coordenadas)
+                         em vez de listas de tuplas.
+        hole_mask (np.ndarray | None): Máscara "é furo" de detect_compound_contours;
+                         no PathSet, os furos recebem a flag PATH_HOLE.
 
     Returns:
-        list[list[tuple[int, int]]] | None:
+        list[list[tuple[int, int]]] | PathSet | None:
             Uma lista de caminhos. Cada caminho é uma lista de tuplas de coordenadas (x, y).
             Retorna None se a entrada for None ou vazia.
     """
-    if contours is None or not contours:
+    if contours is None or len(contours) == 0:
         return None
 
+    if isinstance(contours, PathSet):
+        return contours if as_path_set else contours.to_polylines()
+
+    if as_path_set:
+        path_set = PathSet.from_contours(contours)
+        if hole_mask is not None and len(hole_mask) == len(path_set):
+            path_set.flags[np.asarray(hole_mask, dtype=bool)] |= PATH_HOLE
+        print(f"Vetorização concluída: {len(path_set)} caminhos criados ({path_set.total_points} pontos).")
+        return path_set
+
     vectorized_paths = []
     for contour in contours:
         # Cada 'point' em 'contour' é como [[x, y]], então precisamos extrair x e y.
@@ -1,31 +1,57 @@
 from PyQt5.QtWidgets import QLabel, QApplication # QApplication para keyboardModifiers
 from PyQt5.QtGui import QPixmap, QImage, QMouseEvent, QPaintEvent, QPainter, QWheelEvent, QCursor
-from PyQt5.QtCore import Qt, pyqtSignal, QPoint
+from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QRect, QRectF, QSize
+import numpy as np
+
+from .image_pyramid import ImagePyramid, TileGrid
+from .preview_layers import ContourOverlay
 
 
 class ClickableImageLabel(QLabel):
     imageClicked = pyqtSignal(QPoint); viewChanged = pyqtSignal()
     def __init__(self, parent=None):
         super().__init__(parent)
-        self._pixmap_unscaled: QPixmap | None = None; self._original_image_width = 0; self._original_image_height = 0
+        # A imagem é desenhada a partir de uma pirâmide em blocos (ver gui/image_pyramid.py)
+        self._pyramid: ImagePyramid | None = None; self._original_image_width = 0; self._original_image_height = 0
         self._zoom_factor = 1.0; self._pan_offset_x = 0.0; self._pan_offset_y = 0.0
         self._panning = False; self._pan_last_mouse_pos = QPoint()
+        # Camada de contornos pintada por cima da base, também em níveis e blocos (ver gui/preview_layers.py)
+        self._overlay: ContourOverlay | None = None
         self.setAlignment(Qt.AlignCenter); self.setMinimumSize(200, 200); self.setMouseTracking(True)
-    def setPixmap(self, pixmap: QPixmap | None):
-        self._pixmap_unscaled = pixmap
-        if pixmap and not pixmap.isNull(): self.setOriginalImageSize(pixmap.width(), pixmap.height())
+    def setImage(self, image: np.ndarray | None, logical_size: tuple[int, int] | None = None):
+        # Tons de cinza (2D), BGR ou BGRA; o array é usado sem cópia e não deve ser alterado depois.
+        # logical_size (largura, altura): tamanho em que a imagem é exibida e em que os cliques são
+        # reportados, quando o array é uma versão reduzida da imagem (prévia em baixa resolução)
+        self._pyramid = ImagePyramid(image) if image is not None and image.size else None
+        if self._pyramid is not None: self.setOriginalImageSize(*(logical_size or (self._pyramid.width, self._pyramid.height)))
         else: self.clearOriginalImageSize()
         self.update()
+    def setPixmap(self, pixmap: QPixmap | None):
+        if not pixmap or pixmap.isNull(): self.setImage(None); return
+        image = pixmap.toImage().convertToFormat(QImage.Format_ARGB32)
+        buffer = image.constBits(); buffer.setsize(image.sizeInBytes())
+        rows = np.frombuffer(buffer, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+        self.setImage(rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4).copy())
+    def setOverlay(self, overlay: ContourOverlay | None):
+        self._overlay = overlay; self.update()
+    def updateOverlayRegion(self, x: int, y: int, width: int, height: int):
+        # Repinta só a parte do widget que mostra o retângulo (x, y, width, height) da imagem
+        if self._original_image_width == 0 or self._original_image_height == 0: self.update(); return
+        draw_x, draw_y, painted_w, painted_h = self._painted_geometry()
+        overlay_w, overlay_h = self._overlay_size()
+        scale_x = painted_w / overlay_w; scale_y = painted_h / overlay_h
+        self.update(QRect(int(draw_x + x * scale_x) - 1, int(draw_y + y * scale_y) - 1,
+                          int(width * scale_x) + 3, int(height * scale_y) + 3))
     def setOriginalImageSize(self, width: int, height: int):
         if self._original_image_width != width or self._original_image_height != height:
             self._original_image_width = width; self._original_image_height = height
             self._zoom_factor = 1.0; self._pan_offset_x = 0.0; self._pan_offset_y = 0.0
             self.viewChanged.emit() 
     def clearOriginalImageSize(self):
-        self._original_image_width = 0; self._original_image_height = 0; self._pixmap_unscaled = None
+        self._original_image_width = 0; self._original_image_height = 0; self._pyramid = None; self._overlay = None
         self._zoom_factor = 1.0; self._pan_offset_x = 0.0; self._pan_offset_y = 0.0; self.update()
     def wheelEvent(self, event: QWheelEvent):
-        if not self._pixmap_unscaled or self._pixmap_unscaled.isNull(): super().wheelEvent(event); return
+        if self._pyramid is None: super().wheelEvent(event); return
         delta = event.angleDelta().y(); zoom_speed_factor = 1.1; old_zoom_factor = self._zoom_factor
         if delta > 0: self._zoom_factor *= zoom_speed_factor
         elif delta < 0: self._zoom_factor /= zoom_speed_factor
@@ -33,27 +59,51 @@ class ClickableImageLabel(QLabel):
         if abs(old_zoom_factor - self._zoom_factor) > 1e-9: self.viewChanged.emit()
         self.update(); event.accept()
     def paintEvent(self, event: QPaintEvent):
-        if not self._pixmap_unscaled or self._pixmap_unscaled.isNull() or \
-           self._original_image_width == 0 or self._original_image_height == 0:
+        if self._pyramid is None or self._original_image_width == 0 or self._original_image_height == 0:
             painter = QPainter(self); painter.eraseRect(self.rect()); super().paintEvent(event); return
         painter = QPainter(self); painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        draw_x, draw_y, painted_w, painted_h = self._painted_geometry()
+        if painted_w == 0 or painted_h == 0: return
+        # Só a parte visível (e danificada) da imagem é desenhada
+        target = QRectF(int(draw_x), int(draw_y), painted_w, painted_h)
+        visible = target.intersected(QRectF(event.rect()))
+        if visible.isEmpty(): return
+        painter.setClipRect(visible)
+        self._paint_tiles(painter, self._pyramid, target, visible)
+        # A camada pode ter resolução diferente da exibida (prévia reduzida): é esticada sobre a imagem
+        if self._overlay is not None: self._paint_tiles(painter, self._overlay, target, visible)
+    def _paint_tiles(self, painter: QPainter, layer: TileGrid, target: QRectF, visible: QRectF):
+        # Nível da camada mais próximo do zoom e blocos que cruzam a área visível
+        level = layer.level_for_scale(target.width() / layer.width)
+        level_h, level_w = layer.level_shape(level)
+        scale_x = target.width() / level_w; scale_y = target.height() / level_h; tile = layer.tile_size
+        columns, rows = layer.tile_grid(level)
+        first_column = max(int((visible.left() - target.x()) / scale_x) // tile, 0)
+        last_column = min(int((visible.right() - target.x()) / scale_x) // tile, columns - 1)
+        first_row = max(int((visible.top() - target.y()) / scale_y) // tile, 0)
+        last_row = min(int((visible.bottom() - target.y()) / scale_y) // tile, rows - 1)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                pixmap = layer.tile(level, column, row)
+                painter.drawPixmap(QRectF(target.x() + column * tile * scale_x, target.y() + row * tile * scale_y,
+                                          pixmap.width() * scale_x, pixmap.height() * scale_y),
+                                   pixmap, QRectF(pixmap.rect()))
+    def _overlay_size(self) -> tuple[int, int]:
+        if self._overlay is None: return self._original_image_width, self._original_image_height
+        return self._overlay.width, self._overlay.height
+    def _painted_geometry(self) -> tuple[float, float, int, int]:
+        # Tamanho e posição da imagem no widget, calculados sem escalar nenhum pixel
         target_w_zoomed = self._original_image_width * self._zoom_factor
         target_h_zoomed = self._original_image_height * self._zoom_factor
-        pixmap_to_draw = self._pixmap_unscaled.scaled(
-            int(target_w_zoomed), int(target_h_zoomed), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        draw_x = (self.width() - pixmap_to_draw.width()) / 2.0 - self._pan_offset_x
-        draw_y = (self.height() - pixmap_to_draw.height()) / 2.0 - self._pan_offset_y
-        painter.drawPixmap(int(draw_x), int(draw_y), pixmap_to_draw)
-    def _map_widget_to_image_coords(self, widget_pos: QPoint) -> tuple[int | None, int | None]:
-        if not self._pixmap_unscaled or self._pixmap_unscaled.isNull() or \
-           self._original_image_width == 0 or self._original_image_height == 0: return None, None
-        target_w_zoomed = self._original_image_width * self._zoom_factor
-        target_h_zoomed = self._original_image_height * self._zoom_factor
-        painted_pixmap_scaled = self._pixmap_unscaled.scaled(
-            int(target_w_zoomed), int(target_h_zoomed), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        painted_w, painted_h = painted_pixmap_scaled.width(), painted_pixmap_scaled.height()
+        painted_size = QSize(self._original_image_width, self._original_image_height).scaled(
+            int(target_w_zoomed), int(target_h_zoomed), Qt.KeepAspectRatio)
+        painted_w, painted_h = painted_size.width(), painted_size.height()
         draw_x = (self.width() - painted_w) / 2.0 - self._pan_offset_x
         draw_y = (self.height() - painted_h) / 2.0 - self._pan_offset_y
+        return draw_x, draw_y, painted_w, painted_h
+    def _map_widget_to_image_coords(self, widget_pos: QPoint) -> tuple[int | None, int | None]:
+        if self._pyramid is None or self._original_image_width == 0 or self._original_image_height == 0: return None, None
+        draw_x, draw_y, painted_w, painted_h = self._painted_geometry()
         if not (draw_x <= widget_pos.x() < draw_x + painted_w and \
                 draw_y <= widget_pos.y() < draw_y + painted_h): return None, None
         on_painted_x = widget_pos.x() - draw_x; on_painted_y = widget_pos.y() - draw_y
@@ -64,7 +114,7 @@ class ClickableImageLabel(QLabel):
     def mousePressEvent(self, event: QMouseEvent):
         modifiers = QApplication.keyboardModifiers(); is_ctrl_pressed = bool(modifiers & Qt.ControlModifier)
         if is_ctrl_pressed and event.button() == Qt.LeftButton:
-            if self._pixmap_unscaled and not self._pixmap_unscaled.isNull():
+            if self._pyramid is not None:
                 self._panning = True; self._pan_last_mouse_pos = event.pos()
                 self.setCursor(Qt.ClosedHandCursor); event.accept(); return
         self.unsetCursor()
@@ -0,0 +1,93 @@
+# gui/image_pyramid.py
+import math
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap
+
+DEFAULT_TILE_SIZE = 256
+DEFAULT_MAX_TILES = 256 # ~64 MB de QPixmaps com blocos RGBA de 256x256
+
+class TileGrid:
+    """
+    Níveis de resolução (cada um com metade da largura e da altura do anterior)
+    divididos em blocos de tile_size pixels. Base da ImagePyramid e da camada
+    de contornos (gui/preview_layers.py), que o ClickableImageLabel pinta do
+    mesmo jeito: só os blocos visíveis, no nível mais próximo do zoom.
+    """
+    def __init__(self, width: int, height: int, tile_size: int = DEFAULT_TILE_SIZE):
+        self.width, self.height = width, height
+        self.tile_size = tile_size
+        # Último nível: o primeiro que cabe inteiro em um bloco
+        self.max_level = max(0, math.ceil(math.log2(max(width, height, 1) / tile_size)))
+
+    def level_for_scale(self, scale: float) -> int:
+        """Nível com a menor resolução que ainda não é ampliado na escala pedida (1.0 = resolução original)."""
+        if scale >= 1.0:
+            return 0
+        return min(int(math.floor(math.log2(1.0 / scale))), self.max_level)
+
+    def tile_grid(self, index: int) -> tuple[int, int]:
+        """Quantidade de blocos (colunas, linhas) do nível."""
+        height, width = self.level_shape(index)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def level_shape(self, index: int) -> tuple[int, int]:
+        """(altura, largura) do nível, sem calculá-lo."""
+        height, width = self.height, self.width
+        for _ in range(index):
+            height, width = max(1, (height + 1) // 2), max(1, (width + 1) // 2)
+        return height, width
+
+class ImagePyramid(TileGrid):
+    """
+    Pirâmide de resolução (mipmaps) de uma imagem, dividida em blocos.
+
+    O nível 0 é o próprio array (sem cópia); o nível k tem metade da largura e
+    da altura do nível k-1 e só é calculado (cv2.INTER_AREA) quando algum
+    bloco dele é pedido. Os blocos viram QPixmaps sob demanda e ficam em um
+    LRU limitado, então a memória de pixmaps depende da área visível, não do
+    tamanho da imagem.
+
+    Args:
+        image (np.ndarray): Imagem em tons de cinza (2D), BGR ou BGRA (uint8).
+        tile_size (int): Lado dos blocos, em pixels do nível.
+        max_tiles (int): Quantidade máxima de blocos guardados.
+    """
+    def __init__(self, image: np.ndarray, tile_size: int = DEFAULT_TILE_SIZE, max_tiles: int = DEFAULT_MAX_TILES):
+        super().__init__(image.shape[1], image.shape[0], tile_size)
+        self.max_tiles = max_tiles
+        self._levels: list[np.ndarray] = [image]
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+
+    def level(self, index: int) -> np.ndarray:
+        while len(self._levels) <= index:
+            previous = self._levels[-1]
+            size = (max(1, (previous.shape[1] + 1) // 2), max(1, (previous.shape[0] + 1) // 2))
+            self._levels.append(cv2.resize(previous, size, interpolation=cv2.INTER_AREA))
+        return self._levels[index]
+
+    def tile(self, index: int, column: int, row: int) -> QPixmap:
+        key = (index, column, row)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+        level = self.level(index)
+        x0, y0 = column * self.tile_size, row * self.tile_size
+        block = np.ascontiguousarray(level[y0:y0 + self.tile_size, x0:x0 + self.tile_size])
+        if block.ndim == 2:
+            image_format = QImage.Format_Grayscale8
+        else:
+            image_format = QImage.Format_ARGB32 if block.shape[2] == 4 else QImage.Format_BGR888
+        # fromImage copia os pixels: o bloco NumPy pode ser descartado em seguida
+        pixmap = QPixmap.fromImage(QImage(block.data, block.shape[1], block.shape[0], block.strides[0], image_format))
+        self._tiles[key] = pixmap
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return pixmap
+
+    @property
+    def cached_tiles(self) -> int:
+        return len(self._tiles)
@@ -3,28 +3,183 @@ import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QLabel, QPushButton,
                              QVBoxLayout, QWidget, QFileDialog, QMessageBox, QHBoxLayout,
-                             QCheckBox, QDoubleSpinBox, QFormLayout)
+                             QCheckBox, QComboBox, QDoubleSpinBox, QSpinBox, QFormLayout, QProgressBar)
 from PyQt5.QtGui import (QPixmap, QImage, QPaintEvent, # QMouseEvent, QWheelEvent, QCursor são usados por ClickableImageLabel
-                          QPainter)
-from PyQt5.QtCore import Qt, pyqtSignal, QPoint
+                          QPainter, QImageReader)
+from PyQt5.QtCore import Qt, pyqtSignal, QPoint, QTimer
 import cv2
 import numpy as np
 
 # Assumindo que clickable_image_label.py está na mesma pasta 'gui/'
 from .clickable_image_label import ClickableImageLabel
+from .workers import BackgroundRunner
+from .preview_layers import ContourOverlay, SELECTED_COLOR, UNSELECTED_COLOR, PROCESSED_COLOR
 
 # Importe as funções dos seus módulos
 try:
-    from utils import image_loader, exporter, file_manager
+    from utils import image_loader, exporter, file_manager, pipeline_cache
+    from utils.pipeline_cache import PipelineCache
     from core import contour_detection, vectorization, node_optimization, curve_fitter
+    from core.path_set import PathSet
+    from core.label_map import ContourLabelMap
 
 except ModuleNotFoundError:
     # Bloco de fallback para o path (mantido como no seu original)
     current_dir = os.path.dirname(os.path.abspath(__file__))
     project_root = os.path.dirname(current_dir)
     if project_root not in sys.path: sys.path.append(project_root)
-    from utils import image_loader, exporter, file_manager
+    from utils import image_loader, exporter, file_manager, pipeline_cache
+    from utils.pipeline_cache import PipelineCache
     from core import contour_detection, vectorization, node_optimization, curve_fitter
+    from core.path_set import PathSet
+    from core.label_map import ContourLabelMap
+
+
+# --- Etapas executadas fora da thread da interface (ver gui/workers.py) ---
+# Recebem apenas dados (nunca widgets) e devolvem um dict com os resultados.
+
+# Imagens grandes ganham uma prévia em baixa resolução enquanto a detecção
+# completa roda. A redução (2, 4 ou 8 na leitura) sai da quantidade de pixels,
+# lida só do cabeçalho: o tamanho do arquivo não diz nada (uma digitalização
+# binária de 100 MP em PNG tem menos de 1 MB).
+_PREVIEW_MIN_PIXELS = 8_000_000 # Abaixo disto a detecção completa já é rápida
+_PREVIEW_MAX_PIXELS = 2_000_000
+
+def _detection_job(file_path: str, blur_ksize: int, compound: bool, subpixel: bool, cache: PipelineCache,
+                   report, is_cancelled) -> dict | None:
+    report(5, "Carregando imagem")
+    loaded = cache.load_image(file_path)
+    if loaded is None:
+        return None
+    loaded_image, image_hash = loaded
+    report(25, "Detectando contornos")
+    # Mesma imagem (pelos pixels) e mesmo kernel: a detecção vem do cache
+    raw_path_set, threshold_image, detection_key = pipeline_cache.detect_and_vectorize(
+        cache, loaded_image, image_hash, blur_ksize=blur_ksize, compound=compound, subpixel=subpixel)
+    raw_contours = raw_path_set.as_cv_contours() if raw_path_set is not None else []
+    report(85, "Indexando contornos")
+    # Rasterizado uma vez por detecção: cada clique vira uma consulta ao array
+    label_map = ContourLabelMap(raw_contours, loaded_image.shape) if raw_contours else None
+    return {"image": loaded_image, "contours": raw_contours, "threshold_image": threshold_image,
+            "raw_path_set": raw_path_set, "detection_key": detection_key, "label_map": label_map}
+
+def _preview_reduction_for(file_path: str) -> int:
+    """
+    Fator de redução da prévia rápida (1 = sem prévia), pela quantidade de pixels.
+
+    Só o JPEG é decodificado de fato em tamanho reduzido (escala da DCT). PNG e
+    os demais formatos sem compressão escalável são decodificados inteiros
+    também na prévia (o QImageReader.setScaledSize faz o mesmo internamente):
+    nesses, a prévia só economiza a detecção, não a leitura.
+    """
+    size = QImageReader(file_path).size() # Lê só o cabeçalho
+    if not size.isValid():
+        return 1
+    pixels = size.width() * size.height()
+    if pixels < _PREVIEW_MIN_PIXELS:
+        return 1
+    for reduction in (2, 4):
+        if pixels / reduction ** 2 <= _PREVIEW_MAX_PIXELS:
+            return reduction
+    return 8 # O restante é reduzido com cv2.resize até _PREVIEW_MAX_PIXELS
+
+def _preview_detection_job(file_path: str, reduction: int, blur_ksize: int, report, is_cancelled) -> dict | None:
+    # Imagem decodificada já reduzida; a detecção completa roda em paralelo e substitui este resultado
+    image = image_loader.load_image(file_path, reduction=reduction)
+    if image is None:
+        return None
+    full_size = (image.shape[1] * reduction, image.shape[0] * reduction)
+    if image.shape[0] * image.shape[1] > _PREVIEW_MAX_PIXELS:
+        factor = (_PREVIEW_MAX_PIXELS / (image.shape[0] * image.shape[1])) ** 0.5
+        image = cv2.resize(image, (max(1, int(image.shape[1] * factor)), max(1, int(image.shape[0] * factor))),
+                           interpolation=cv2.INTER_AREA)
+    if is_cancelled():
+        return None
+    # O desfoque é proporcional à redução, para o limiar ficar parecido com o da imagem inteira
+    preview_blur = max(1, int(round(blur_ksize * image.shape[1] / full_size[0])))
+    contours, _ = contour_detection.detect_contours(image, blur_ksize_val=preview_blur)
+    return {"image": image, "contours": list(contours or []), "full_size": full_size}
+
+def _processing_job(raw_path_set: PathSet, selected_indices: list[int], epsilon: float | None,
+                    significance_cache: dict[int, np.ndarray], bezier_tolerance: float | None,
+                    cache: PipelineCache, detection_key: str,
+                    report, is_cancelled, simplification_method: str = "rdp",
+                    max_nodes: int | None = None) -> dict:
+    report(5, "Vetorizando seleção")
+    if raw_path_set.has_holes:
+        # Furo cujo contorno externo não foi selecionado não tem o que furar
+        parents = raw_path_set.compound_parents()
+        selected = set(selected_indices)
+        selected_indices = [index for index in selected_indices if int(parents[index]) in selected]
+    polylines_base = raw_path_set.subset(selected_indices)
+    polylines_para_finalizar = polylines_base
+    simplification_error = None
+
+    simplified_key = None
+    if epsilon is not None:
+        all_selected = len(selected_indices) == len(raw_path_set)
+        simplified_key = pipeline_cache.simplification_key(detection_key, epsilon,
+                                                           None if all_selected else selected_indices,
+                                                           method=simplification_method, max_nodes=max_nodes)
+        cached = cache.get_path_set(simplified_key)
+        if cached is not None:
+            print(f"Cache: simplificação reaproveitada (epsilon={epsilon}).")
+            polylines_para_finalizar = cached[0]
+            epsilon = None # Pula o cálculo abaixo
+
+    if epsilon is not None:
+        use_vw = simplification_method == "vw"
+        print(f"Simplificação {'Visvalingam–Whyatt' if use_vw else 'RDP Customizada'} HABILITADA com epsilon: {epsilon}")
+        try:
+            # A significância (RDP) ou área efetiva (VW) de cada contorno é calculada
+            # só na primeira vez; mudar o epsilon depois disso é apenas um filtro linear.
+            missing = [index for index in selected_indices if index not in significance_cache]
+            if missing:
+                report(10, "Calculando área efetiva VW" if use_vw else "Calculando significância RDP")
+                # Todos os contornos que faltam de uma vez, em paralelo (core/parallel_paths.py)
+                missing_path_set = raw_path_set.subset(missing)
+                if use_vw:
+                    flat_significance = node_optimization.compute_path_set_effective_area(missing_path_set)
+                else:
+                    flat_significance = node_optimization.compute_path_set_significance(missing_path_set)
+                offsets = missing_path_set.offsets.tolist()
+                for position, contour_index in enumerate(missing):
+                    significance_cache[contour_index] = flat_significance[offsets[position]:offsets[position + 1]]
+            significances = [significance_cache[index] for index in selected_indices]
+            if max_nodes is not None:
+                # Orçamento global: os contornos selecionados disputam os mesmos max_nodes nós
+                simplified_polylines = node_optimization.apply_node_budget(
+                    polylines_base, max_nodes=max_nodes, method=simplification_method,
+                    priorities=significances, min_priority=epsilon)
+            elif use_vw:
+                simplified_polylines = node_optimization.apply_visvalingam_simplification(
+                    polylines_base, area_threshold=epsilon, effective_areas=significances)
+            else:
+                simplified_polylines = node_optimization.apply_rdp_with_significance(
+                    polylines_base,
+                    significances,
+                    epsilon=epsilon
+                )
+            if simplified_polylines is None or not simplified_polylines:
+                print("Aviso: Simplificação Customizada resultou em dados vazios ou falhou. Usando vetores detalhados.")
+            else:
+                polylines_para_finalizar = simplified_polylines
+                cache.put_path_set(simplified_key, simplified_polylines)
+        except Exception as e:
+            simplification_error = str(e)
+    elif simplified_key is None:
+        print("Simplificação Customizada DESABILITADA.")
+
+    report(75, "Ajustando curvas")
+    final_renderable_paths = curve_fitter.fit_curves_to_paths(polylines_para_finalizar, tolerance=bezier_tolerance)
+    # O preview desenha as curvas ajustadas amostradas como polilinhas
+    if final_renderable_paths is None or isinstance(final_renderable_paths, PathSet):
+        preview_paths = final_renderable_paths
+    else:
+        preview_paths = PathSet.from_contours(curve_fitter.flatten_structured_paths(final_renderable_paths))
+    return {"polylines": polylines_para_finalizar, "final_paths": final_renderable_paths,
+            "preview_paths": preview_paths,
+            "num_selected": len(selected_indices), "simplification_error": simplification_error}
 
 
 class MainWindow(QMainWindow):
@@ -86,6 +241,12 @@ class MainWindow(QMainWindow):
         self.save_svg_button.clicked.connect(self.save_svg_dialog)
         self.save_svg_button.setEnabled(False)
         self.action_button_layout.addWidget(self.save_svg_button)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setObjectName("progress_bar")
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setVisible(False)
+        self.action_button_layout.addWidget(self.progress_bar)
         
         self.controls_panel_layout.addWidget(self.action_buttons_group_container)
 
@@ -106,6 +267,16 @@ class MainWindow(QMainWindow):
         self.show_bw_checkbox.stateChanged.connect(self.preview_needs_update.emit)
         self.show_bw_checkbox.setEnabled(False)
         self.general_controls_layout.addWidget(self.show_bw_checkbox)
+
+        self.compound_paths_checkbox = QCheckBox("Caminhos Compostos (Furos)")
+        self.compound_paths_checkbox.setToolTip("Cada contorno externo leva os seus furos em um único caminho (preenchimento evenodd).")
+        self.compound_paths_checkbox.stateChanged.connect(self.trigger_redetect_on_control_change)
+        self.general_controls_layout.addWidget(self.compound_paths_checkbox)
+
+        self.subpixel_contours_checkbox = QCheckBox("Contornos Sub-pixel")
+        self.subpixel_contours_checkbox.setToolTip("Extrai os contornos com marching squares (coordenadas entre os pixels): menos nós para a mesma fidelidade.")
+        self.subpixel_contours_checkbox.stateChanged.connect(self.trigger_redetect_on_control_change)
+        self.general_controls_layout.addWidget(self.subpixel_contours_checkbox)
         self.general_controls_layout.addStretch(1) # Empurra os controles gerais para a esquerda dentro do seu QHBoxLayout
 
         self.controls_panel_layout.addWidget(self.general_controls_group_container)
@@ -114,12 +285,22 @@ class MainWindow(QMainWindow):
         self.simplification_controls_layout = QFormLayout()
         self.simplification_controls_layout.setSpacing(8)
 
-        self.enable_custom_simplification_checkbox = QCheckBox("Habilitar Simplificação RDP")
+        self.enable_custom_simplification_checkbox = QCheckBox("Habilitar Simplificação")
         self.enable_custom_simplification_checkbox.setToolTip("Ativa/Desativa o algoritmo de simplificação de Nô de Vetores.")
         self.enable_custom_simplification_checkbox.setChecked(False)
         self.enable_custom_simplification_checkbox.stateChanged.connect(self.trigger_reprocess_on_control_change)
         self.simplification_controls_layout.addRow(self.enable_custom_simplification_checkbox)
 
+        self.simplification_method_combo = QComboBox()
+        self.simplification_method_combo.addItem("RDP (Douglas–Peucker)", "rdp")
+        self.simplification_method_combo.addItem("Visvalingam–Whyatt", "vw")
+        self.simplification_method_combo.setToolTip("RDP limita a distância ao contorno; Visvalingam–Whyatt remove primeiro os vértices de menor área (degraus e picos).")
+        self.simplification_method_combo.setEnabled(False)
+        self.enable_custom_simplification_checkbox.toggled.connect(self.simplification_method_combo.setEnabled)
+        self.simplification_method_combo.currentIndexChanged.connect(self._update_tolerance_tooltip)
+        self.simplification_method_combo.currentIndexChanged.connect(self.trigger_reprocess_on_control_change)
+        self.simplification_controls_layout.addRow("Algoritmo:", self.simplification_method_combo)
+
         self.custom_epsilon_input = QDoubleSpinBox()
         self.custom_epsilon_input.setToolTip("Define o valor de tolerância (epsilon) para o algoritmo RDP.")
         self.custom_epsilon_input.setSuffix("")
@@ -133,6 +314,35 @@ class MainWindow(QMainWindow):
         self.custom_epsilon_input.valueChanged.connect(self.trigger_reprocess_on_control_change)
         self.simplification_controls_layout.addRow("Tolerância (ε):", self.custom_epsilon_input)
 
+        self.max_nodes_input = QSpinBox()
+        self.max_nodes_input.setToolTip("Total máximo de nós entre todos os contornos selecionados, distribuídos pela significância de cada vértice (0 = sem limite).")
+        self.max_nodes_input.setMinimum(0)
+        self.max_nodes_input.setMaximum(10_000_000)
+        self.max_nodes_input.setSingleStep(100)
+        self.max_nodes_input.setSpecialValueText("Sem limite")
+        self.max_nodes_input.setEnabled(False)
+        self.enable_custom_simplification_checkbox.toggled.connect(self.max_nodes_input.setEnabled)
+        self.max_nodes_input.valueChanged.connect(self.trigger_reprocess_on_control_change)
+        self.simplification_controls_layout.addRow("Máx. de nós:", self.max_nodes_input)
+
+        self.enable_bezier_fitting_checkbox = QCheckBox("Ajustar Curvas Bézier")
+        self.enable_bezier_fitting_checkbox.setToolTip("Substitui as linhas por curvas Bézier cúbicas dentro da tolerância de erro.")
+        self.enable_bezier_fitting_checkbox.setChecked(False)
+        self.enable_bezier_fitting_checkbox.stateChanged.connect(self.trigger_reprocess_on_control_change)
+        self.simplification_controls_layout.addRow(self.enable_bezier_fitting_checkbox)
+
+        self.bezier_tolerance_input = QDoubleSpinBox()
+        self.bezier_tolerance_input.setToolTip("Distância máxima, em pixels, entre as curvas e o contorno.")
+        self.bezier_tolerance_input.setMinimum(0.10)
+        self.bezier_tolerance_input.setMaximum(20.0)
+        self.bezier_tolerance_input.setSingleStep(0.1)
+        self.bezier_tolerance_input.setValue(curve_fitter.DEFAULT_BEZIER_TOLERANCE)
+        self.bezier_tolerance_input.setDecimals(2)
+        self.bezier_tolerance_input.setEnabled(False)
+        self.enable_bezier_fitting_checkbox.toggled.connect(self.bezier_tolerance_input.setEnabled)
+        self.bezier_tolerance_input.valueChanged.connect(self.trigger_reprocess_on_control_change)
+        self.simplification_controls_layout.addRow("Tolerância Bézier:", self.bezier_tolerance_input)
+
         self.controls_panel_layout.addLayout(self.simplification_controls_layout)
 
         # Adiciona um espaçador para empurrar os controles para cima no painel esquerdo
@@ -142,7 +352,6 @@ class MainWindow(QMainWindow):
         self.image_preview_label = ClickableImageLabel()
         self.image_preview_label.setObjectName("imagePreview") # Para QSS
         self.image_preview_label.imageClicked.connect(self.handle_preview_image_click)
-        self.image_preview_label.viewChanged.connect(self.preview_needs_update.emit)
 
         # --- 4. ADICIONAR PAINEL DE CONTROLES E IMAGEM AO LAYOUT PRINCIPAL ---
         self.main_app_layout.addWidget(self.controls_panel_widget)    # Painel da esquerda
@@ -152,11 +361,34 @@ class MainWindow(QMainWindow):
         self.loaded_image_cv: np.ndarray | None = None
         self.threshold_image_for_preview: np.ndarray | None = None
         self.raw_contours: list | None = None
+        self.raw_path_set: PathSet | None = None # Os mesmos contornos, em buffer plano
+        self.contour_label_map: ContourLabelMap | None = None # Índice do contorno por pixel (cliques)
         self.raw_contour_selection_states: list[bool] = []
-        self.vectorized_polylines_from_selection: list[list[tuple[int, int]]] | None = None
-        self.final_renderable_paths: list[list[tuple]] | None = None
+        self.vectorized_polylines_from_selection: PathSet | None = None
+        self.final_renderable_paths: list[list[tuple]] | PathSet | None = None
+        self.processed_preview_paths: PathSet | None = None # Caminhos finais (curvas amostradas) para o preview
+        # Significância RDP / área efetiva VW por índice de contorno bruto, calculadas uma vez por detecção
+        self.rdp_significance_cache: dict[int, np.ndarray] = {}
+        self.vw_area_cache: dict[int, np.ndarray] = {}
         self._current_image_filepath: str | None = None
+        # Prévia rápida (imagem reduzida + contornos dela) exibida até a detecção completa terminar
+        self.low_res_preview: dict | None = None
         self.preview_mode = "idle"
+        # Camadas do preview (ver update_preview_display)
+        self.contour_overlay: ContourOverlay | None = None
+        self._preview_base_source: np.ndarray | None = None
+        self._overlay_source: tuple | None = None
+
+        # Detecção e processamento rodam em segundo plano; um pedido novo cancela o anterior
+        self.background_runner = BackgroundRunner(self)
+        # Resultados por etapa (detecção, simplificação), por hash da imagem + parâmetros
+        self.pipeline_cache = PipelineCache(pipeline_cache.default_cache_dir())
+        self.detection_cache_key: str | None = None
+        # Debounce: mudanças seguidas nos controles geram um único reprocessamento
+        self.reprocess_debounce_timer = QTimer(self)
+        self.reprocess_debounce_timer.setSingleShot(True)
+        self.reprocess_debounce_timer.setInterval(150)
+        self.reprocess_debounce_timer.timeout.connect(self.process_selected_action)
         
         self.preview_needs_update.connect(self.update_preview_display)
         self.reset_ui_states_for_new_image()
@@ -164,10 +396,18 @@ class MainWindow(QMainWindow):
     # --- Outros Métodos da Classe MainWindow ---
     def reset_ui_states_for_new_image(self):
         self.raw_contours = None; self.raw_contour_selection_states = []
+        self.raw_path_set = None
+        self.contour_label_map = None
+        self.detection_cache_key = None
+        self.rdp_significance_cache = {}
+        self.vw_area_cache = {}
         self.threshold_image_for_preview = None
         self.vectorized_polylines_from_selection = None
         self.final_renderable_paths = None
+        self.processed_preview_paths = None
+        self.low_res_preview = None
         self.preview_mode = "idle"
+        self.contour_overlay = None; self._preview_base_source = None; self._overlay_source = None
         if self.image_preview_label:
             self.image_preview_label.clearOriginalImageSize()
             self.image_preview_label.setPixmap(QPixmap())
@@ -195,20 +435,14 @@ class MainWindow(QMainWindow):
            len(self.raw_contours) != len(self.raw_contour_selection_states):
             return
 
-        click_pt = (image_click_pos.x(), image_click_pos.y())
-        best_match_index, min_area_for_match = -1, float('inf')
-
-        for i, contour in enumerate(self.raw_contours):
-            distance = cv2.pointPolygonTest(contour, click_pt, False) 
-            if distance >= 0: 
-                area = cv2.contourArea(contour)
-                if area < min_area_for_match: 
-                    min_area_for_match = area
-                    best_match_index = i
+        if self.contour_label_map is None:
+            return
+        # Menor contorno que contém o ponto (ver core/label_map.py)
+        best_match_index = self.contour_label_map.label_at(image_click_pos.x(), image_click_pos.y())
         
         if best_match_index != -1:
             self.raw_contour_selection_states[best_match_index] = not self.raw_contour_selection_states[best_match_index]
-            self.preview_needs_update.emit()
+            self.repaint_contour_overlay(best_match_index)
 
     def open_image_dialog(self):
         last_input_dir = file_manager.get_last_input_directory() or os.path.expanduser("~")
@@ -222,23 +456,57 @@ class MainWindow(QMainWindow):
             self.full_image_processing_pipeline(file_path)
 
     def full_image_processing_pipeline(self, file_path: str):
-        self.loaded_image_cv = image_loader.load_image(file_path)
+        # Resultados de processamento da imagem anterior deixam de valer
+        self.reprocess_debounce_timer.stop()
+        self.background_runner.cancel("processing")
+
+        self.loaded_image_cv = None
         self._current_image_filepath = file_path
         self.reset_ui_states_for_new_image() 
+        self.image_preview_label.setText("Processando...")
+
+        preview_reduction = _preview_reduction_for(file_path)
+        if preview_reduction > 1:
+            self.background_runner.submit(
+                "preview", _preview_detection_job, file_path, preview_reduction, 5,
+                on_finished=lambda result: self._on_preview_finished(file_path, result),
+                on_error=lambda message: print(f"Aviso: prévia rápida falhou ({message})."))
+        else:
+            self.background_runner.cancel("preview")
+        self.background_runner.submit(
+            "detection", _detection_job, file_path, 5, self.compound_paths_checkbox.isChecked(),
+            self.subpixel_contours_checkbox.isChecked(), self.pipeline_cache,
+            on_finished=lambda result: self._on_detection_finished(file_path, result),
+            on_error=lambda message: self._on_background_error("Erro na Detecção", message),
+            on_progress=self._on_background_progress)
+
+    def _on_preview_finished(self, file_path: str, preview_result: dict | None):
+        # A detecção completa pode ter terminado antes (ex.: veio do cache)
+        if preview_result is None or self.loaded_image_cv is not None or file_path != self._current_image_filepath:
+            return
+        self.low_res_preview = preview_result
+        self.preview_mode = "low_res_preview"
+        self.preview_needs_update.emit()
 
-        if self.loaded_image_cv is None:
+    def _on_detection_finished(self, file_path: str, detection_result: dict | None):
+        self.progress_bar.setVisible(False)
+        self.background_runner.cancel("preview")
+        self.low_res_preview = None
+        if detection_result is None:
             QMessageBox.warning(self, "Erro ao Carregar", f"Não foi possível carregar a imagem de: {file_path}")
             self._current_image_filepath = None
             self.reset_button.setEnabled(False)
+            self.preview_mode = "idle"
+            self.update_preview_display()
+            self.image_preview_label.setText("Nenhuma imagem.")
             return
 
+        self.loaded_image_cv = detection_result["image"]
         self.reset_button.setEnabled(True)
 
-        detection_result = contour_detection.detect_contours(self.loaded_image_cv, blur_ksize_val=5)
-        if detection_result:
-            self.raw_contours, self.threshold_image_for_preview = detection_result
-        else:
-            self.raw_contours, self.threshold_image_for_preview = None, None
+        self.raw_contours = detection_result["contours"]
+        self.detection_cache_key = detection_result["detection_key"]
+        self.threshold_image_for_preview = detection_result["threshold_image"]
         
         if self.threshold_image_for_preview is not None:
             self.show_bw_checkbox.setEnabled(True)
@@ -248,6 +516,8 @@ class MainWindow(QMainWindow):
             self.preview_mode = "idle"
             self.process_selected_button.setEnabled(False)
         else:
+            self.raw_path_set = detection_result["raw_path_set"]
+            self.contour_label_map = detection_result["label_map"]
             self.raw_contour_selection_states = [True] * len(self.raw_contours)
             self.preview_mode = "selecting_contours"
             self.process_selected_button.setEnabled(True)
@@ -259,53 +529,76 @@ class MainWindow(QMainWindow):
             print("Processar Ação: Nenhum contorno selecionado para processar.")
             return
         
-        selected_raw_contours = [
-            self.raw_contours[i] for i, is_selected in enumerate(self.raw_contour_selection_states) if is_selected]
+        selected_indices = [i for i, is_selected in enumerate(self.raw_contour_selection_states) if is_selected]
         
-        if not selected_raw_contours:
+        if not selected_indices or self.raw_path_set is None:
             print("Processar Ação: Nenhum contorno efetivamente selecionado após filtragem.")
             return
 
-        polylines_base = vectorization.vectorize_from_contours(selected_raw_contours)
-        if not polylines_base:
-            QMessageBox.warning(self, "Erro de Vetorização", "Falha ao vetorizar os contornos selecionados.")
-            return
-
-        polylines_para_finalizar = polylines_base
-
+        epsilon_val = None
+        max_nodes = None
+        simplification_method = self.simplification_method_combo.currentData()
         if self.enable_custom_simplification_checkbox.isChecked():
             epsilon_val = self.custom_epsilon_input.value()
-            print(f"Simplificação RDP Customizada HABILITADA com epsilon: {epsilon_val}")
-            try:
-                simplified_polylines = node_optimization.apply_custom_rdp_simplification(
-                    polylines_base,
-                    epsilon=epsilon_val
-                )
-                if simplified_polylines is None or not simplified_polylines:
-                    print("Aviso: Simplificação Customizada resultou em dados vazios ou falhou. Usando vetores detalhados.")
-                else:
-                    polylines_para_finalizar = simplified_polylines
-            except ImportError:
-                QMessageBox.warning(self, "Erro de Módulo", "Módulo 'node_optimization' não pôde ser importado. Simplificação não aplicada.")
-            except Exception as e:
-                QMessageBox.warning(self, "Erro de Simplificação", f"Ocorreu um erro durante a simplificação customizada: {e}")
-        else:
-            print("Simplificação Customizada DESABILITADA.")
-        
-        self.vectorized_polylines_from_selection = polylines_para_finalizar
-            
-        self.final_renderable_paths = curve_fitter.fit_curves_to_paths(self.vectorized_polylines_from_selection)
+            max_nodes = self.max_nodes_input.value() or None
+        bezier_tolerance = None
+        if self.enable_bezier_fitting_checkbox.isChecked():
+            bezier_tolerance = self.bezier_tolerance_input.value()
+
+        # Os dados são capturados aqui, na thread da interface; o worker não toca em widgets.
+        # O cache de significância é por imagem (um dict novo a cada imagem carregada).
+        self.background_runner.submit(
+            "processing", _processing_job, self.raw_path_set, selected_indices, epsilon_val,
+            self.vw_area_cache if simplification_method == "vw" else self.rdp_significance_cache,
+            bezier_tolerance, self.pipeline_cache, self.detection_cache_key,
+            simplification_method=simplification_method, max_nodes=max_nodes,
+            on_finished=self._on_processing_finished,
+            on_error=lambda message: self._on_background_error("Erro de Processamento", message),
+            on_progress=self._on_background_progress)
+
+    def _on_processing_finished(self, result: dict):
+        self.progress_bar.setVisible(False)
+        if result["simplification_error"] is not None:
+            QMessageBox.warning(self, "Erro de Simplificação",
+                                f"Ocorreu um erro durante a simplificação customizada: {result['simplification_error']}")
+
+        self.vectorized_polylines_from_selection = result["polylines"]
+        self.final_renderable_paths = result["final_paths"]
+        self.processed_preview_paths = result["preview_paths"]
         
         if self.final_renderable_paths is not None:
             self.preview_mode = "showing_processed"
             self.save_svg_button.setEnabled(True)
-            print(f"Processamento concluído: {len(selected_raw_contours)} contornos originais -> {len(self.final_renderable_paths)} caminhos finais.")
+            print(f"Processamento concluído: {result['num_selected']} contornos originais -> {len(self.final_renderable_paths)} caminhos finais.")
         else:
             QMessageBox.warning(self, "Erro Pós-Processamento", "Falha ao converter caminhos para a estrutura final SVG.")
             self.save_svg_button.setEnabled(False)
         
         self.preview_needs_update.emit()
 
+    def _on_background_progress(self, percent: int, message: str):
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(f"{message} (%p%)" if message else "%p%")
+
+    def _on_background_error(self, title: str, message: str):
+        self.progress_bar.setVisible(False)
+        QMessageBox.warning(self, title, message)
+        if self.loaded_image_cv is None:
+            self._current_image_filepath = None
+            self.image_preview_label.setText("Nenhuma imagem.")
+
+    def _update_tolerance_tooltip(self):
+        if self.simplification_method_combo.currentData() == "vw":
+            self.custom_epsilon_input.setToolTip("Área mínima (px²) do triângulo de um vértice mantido pelo Visvalingam–Whyatt.")
+        else:
+            self.custom_epsilon_input.setToolTip("Define o valor de tolerância (epsilon) para o algoritmo RDP.")
+
+    def trigger_redetect_on_control_change(self):
+        """ Chamado quando muda um parâmetro da detecção: refaz a detecção da imagem atual. """
+        if self._current_image_filepath:
+            self.full_image_processing_pipeline(self._current_image_filepath)
+
     def trigger_reprocess_on_control_change(self):
         """ Chamado quando o checkbox de simplificação ou o valor de epsilon mudam. """
         # Debug prints (opcional, pode remover depois)
@@ -326,7 +619,8 @@ class MainWindow(QMainWindow):
             
             if self.preview_mode == "selecting_contours" or self.preview_mode == "showing_processed":
                 print(f"Controle de simplificação mudou. Re-processando automaticamente.")
-                self.process_selected_action()
+                # Várias mudanças seguidas (ex.: segurar a seta do spinbox) geram um único processamento
+                self.reprocess_debounce_timer.start()
             # else:
             #     print("  Condição de preview_mode não atendida para reprocessar.")
         # else:
@@ -338,51 +632,77 @@ class MainWindow(QMainWindow):
 
 
     def update_preview_display(self):
-        current_base_image_for_drawing = None
-        display_original_w, display_original_h = 0, 0
-
+        # O preview tem duas camadas: a imagem base (original ou P&B), enviada ao
+        # label só quando a base muda, e a camada de contornos (ContourOverlay), redesenhada
+        # inteira só quando o modo ou os dados mudam. Cliques repintam só a caixa do contorno
+        # (repaint_contour_overlay) e zoom/pan apenas recompõem as camadas no label.
         if self.show_bw_checkbox.isChecked() and self.threshold_image_for_preview is not None:
-            if len(self.threshold_image_for_preview.shape) == 2:
-                 current_base_image_for_drawing = cv2.cvtColor(self.threshold_image_for_preview, cv2.COLOR_GRAY2BGR)
-            else:
-                 current_base_image_for_drawing = self.threshold_image_for_preview.copy()
-            display_original_h, display_original_w = self.threshold_image_for_preview.shape[:2]
+            base_image = self.threshold_image_for_preview
         elif self.loaded_image_cv is not None:
-            current_base_image_for_drawing = self.loaded_image_cv.copy()
-            display_original_h, display_original_w, _ = self.loaded_image_cv.shape
+            base_image = self.loaded_image_cv
+        elif self.low_res_preview is not None:
+            base_image = self.low_res_preview["image"]
         else:
             self.image_preview_label.setText("Nenhuma imagem carregada.")
             self.image_preview_label.setPixmap(QPixmap())
             self.image_preview_label.clearOriginalImageSize()
+            self.contour_overlay = None; self._preview_base_source = None; self._overlay_source = None
             return
 
-        if self.preview_mode == "selecting_contours" and self.raw_contours:
-            if len(self.raw_contours) == len(self.raw_contour_selection_states):
-                for i, contour in enumerate(self.raw_contours):
-                    color = (0, 255, 0) if self.raw_contour_selection_states[i] else (0, 0, 255)
-                    cv2.drawContours(current_base_image_for_drawing, [contour], -1, color, 1)
-        
-        elif self.preview_mode == "showing_processed" and self.vectorized_polylines_from_selection:
-            for path_polyline in self.vectorized_polylines_from_selection:
-                if len(path_polyline) > 1:
-                    np_path = np.array(path_polyline, dtype=np.int32).reshape((-1, 1, 2))
-                    # Cor alterada para os vetores processados para melhor distinção
-                    cv2.polylines(current_base_image_for_drawing, [np_path], False, (255, 128, 0), 1) 
-
-        try:
-            q_image = QImage(current_base_image_for_drawing.data,
-                             current_base_image_for_drawing.shape[1], 
-                             current_base_image_for_drawing.shape[0], 
-                             current_base_image_for_drawing.strides[0],
-                             QImage.Format_BGR888)
-            pixmap_to_set_on_label = QPixmap.fromImage(q_image)
-
-            self.image_preview_label.setOriginalImageSize(display_original_w, display_original_h)
-            self.image_preview_label.setPixmap(pixmap_to_set_on_label)
-        except Exception as e:
-            print(f"Erro ao converter imagem para display: {e}")
-            self.image_preview_label.setText("Erro ao exibir imagem.")
+        display_original_h, display_original_w = base_image.shape[:2]
+        if base_image is not self._preview_base_source:
+            try:
+                # O label monta a pirâmide em blocos sobre o próprio array (sem cópia);
+                # a prévia reduzida é exibida no tamanho da imagem inteira
+                logical_size = self.low_res_preview["full_size"] if self.preview_mode == "low_res_preview" else None
+                self.image_preview_label.setImage(base_image, logical_size)
+                self._preview_base_source = base_image
+            except Exception as e:
+                print(f"Erro ao converter imagem para display: {e}")
+                self.image_preview_label.setText("Erro ao exibir imagem.")
+                return
+
+        if self.contour_overlay is None or \
+           (self.contour_overlay.width, self.contour_overlay.height) != (display_original_w, display_original_h):
+            self.contour_overlay = ContourOverlay(display_original_w, display_original_h)
+            self._overlay_source = None
+
+        overlay_data = {"selecting_contours": self.raw_contours, "showing_processed": self.processed_preview_paths,
+                        "low_res_preview": self.low_res_preview}.get(self.preview_mode)
+        if self._overlay_source is None or self._overlay_source[0] != self.preview_mode or \
+           self._overlay_source[1] is not overlay_data:
+            self._render_contour_overlay()
+            self._overlay_source = (self.preview_mode, overlay_data)
+        self.image_preview_label.setOverlay(self.contour_overlay)
+
+    def _contour_overlay_colors(self) -> list[tuple]:
+        return [SELECTED_COLOR if is_selected else UNSELECTED_COLOR for is_selected in self.raw_contour_selection_states]
+
+    def _render_contour_overlay(self):
+        """Redesenha a camada de contornos inteira para o modo atual."""
+        if self.preview_mode == "selecting_contours" and self.raw_contours and \
+           len(self.raw_contours) == len(self.raw_contour_selection_states):
+            self.contour_overlay.draw_contours(self.raw_contours, self._contour_overlay_colors())
+        elif self.preview_mode == "showing_processed" and self.processed_preview_paths:
+            # Views (n, 1, 2) do buffer do PathSet, desenhadas em uma única chamada
+            drawable_paths = [p for p in self.processed_preview_paths.as_cv_contours() if len(p) > 1]
+            self.contour_overlay.draw_polylines(drawable_paths, PROCESSED_COLOR)
+        elif self.preview_mode == "low_res_preview" and self.low_res_preview is not None:
+            preview_contours = self.low_res_preview["contours"]
+            self.contour_overlay.draw_contours(preview_contours, [SELECTED_COLOR] * len(preview_contours))
+        else:
+            self.contour_overlay.clear()
 
+    def repaint_contour_overlay(self, contour_index: int):
+        """Repinta só a caixa de um contorno na camada (após mudar a seleção dele)."""
+        if self.contour_overlay is None or self.contour_label_map is None or \
+           self._overlay_source is None or self._overlay_source[0] != "selecting_contours":
+            self.preview_needs_update.emit()
+            return
+        repainted = self.contour_overlay.repaint_region(
+            self.contour_label_map.bbox(contour_index), self._contour_overlay_colors())
+        if repainted is not None:
+            self.image_preview_label.updateOverlayRegion(*repainted)
 
     def draw_original_image_on_preview(self): 
         if self.loaded_image_cv is None:
@@ -391,11 +711,9 @@ class MainWindow(QMainWindow):
             self.image_preview_label.clearOriginalImageSize()
             return
         
-        h_orig, w_orig, _ = self.loaded_image_cv.shape
-        q_image = QImage(self.loaded_image_cv.data, w_orig, h_orig, self.loaded_image_cv.strides[0], QImage.Format_BGR888)
-        pixmap = QPixmap.fromImage(q_image)
-        self.image_preview_label.setOriginalImageSize(w_orig, h_orig)
-        self.image_preview_label.setPixmap(pixmap)
+        self.image_preview_label.setImage(self.loaded_image_cv)
+        self.image_preview_label.setOverlay(None)
+        self._preview_base_source = self.loaded_image_cv; self._overlay_source = None
 
     def save_svg_dialog(self):
         if not self.final_renderable_paths:
@@ -415,26 +733,39 @@ class MainWindow(QMainWindow):
             suggested_filename_base = f"{name}_vetorizado_falcon" 
             if self.enable_custom_simplification_checkbox.isChecked():
                 suggested_filename_base += "_simplificado"
+            if self.enable_bezier_fitting_checkbox.isChecked():
+                suggested_filename_base += "_bezier"
         
         suggested_filepath = os.path.join(last_output_dir, f"{suggested_filename_base}.svg")
         options = QFileDialog.Options()
         file_path, _ = QFileDialog.getSaveFileName(self, "Salvar Arquivo SVG", suggested_filepath,
-                                                   "Arquivos SVG (*.svg);;Todos os Arquivos (*)",
+                                                   "Arquivos SVG (*.svg);;SVG Comprimido (*.svgz);;Todos os Arquivos (*)",
                                                    options=options)
         if file_path:
-            if not file_path.lower().endswith(".svg"):
+            if not file_path.lower().endswith((".svg", ".svgz")):
                 file_path += ".svg"
             
             current_dir = os.path.dirname(file_path)
             file_manager.set_last_output_directory(current_dir)
             
+            # O .svgz é para distribuição: usa também a codificação compacta do 'd'
             success = exporter.export_to_svg(self.final_renderable_paths, file_path,
-                                             image_width=img_w, image_height=img_h)
+                                             image_width=img_w, image_height=img_h,
+                                             compact=file_path.lower().endswith(".svgz"))
             if success:
                 QMessageBox.information(self, "Sucesso!", f"Arquivo SVG salvo em:\n{file_path}")
             else:
                 QMessageBox.critical(self, "Erro ao Salvar", "Ocorreu um erro ao tentar salvar o arquivo SVG.")
 
+    def closeEvent(self, event):
+        # Descarta resultados pendentes e espera os workers antes de destruir a janela
+        self.reprocess_debounce_timer.stop()
+        self.background_runner.cancel("detection")
+        self.background_runner.cancel("processing")
+        self.background_runner.cancel("preview")
+        self.background_runner.wait_for_done()
+        super().closeEvent(event)
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     # Bloco de teste para carregar QSS se este arquivo for executado diretamente
@@ -0,0 +1,111 @@
+# gui/preview_layers.py
+from collections import OrderedDict
+from itertools import groupby
+
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage, QPixmap
+
+from .image_pyramid import TileGrid, DEFAULT_TILE_SIZE, DEFAULT_MAX_TILES
+
+# Cores (B, G, R, A) da camada de contornos
+SELECTED_COLOR = (0, 255, 0, 255)
+UNSELECTED_COLOR = (0, 0, 255, 255)
+PROCESSED_COLOR = (255, 128, 0, 255)
+
+class ContourOverlay(TileGrid):
+    """
+    Camada de contornos, separada da imagem base e pintada por cima dela.
+
+    Guarda só os contornos (e as cores e caixas de cada um); nenhum buffer do
+    tamanho da imagem existe. Como a ImagePyramid, a camada é dividida em níveis
+    e blocos: cada bloco é desenhado na resolução do seu nível quando é pedido,
+    só com os contornos que o cruzam, e fica em um LRU limitado. Memória e tempo
+    de pintura dependem da área visível, não do tamanho da imagem.
+    """
+    def __init__(self, width: int, height: int, tile_size: int = DEFAULT_TILE_SIZE,
+                 max_tiles: int = DEFAULT_MAX_TILES):
+        super().__init__(width, height, tile_size)
+        self.max_tiles = max_tiles
+        self._contours: list[np.ndarray] = []
+        self._colors: list[tuple] = []
+        self._closed = True
+        self._boxes = np.zeros((0, 4)) # (x0, y0, x1, y1) de cada contorno, inclusivos
+        self._tiles: OrderedDict[tuple[int, int, int], QPixmap] = OrderedDict()
+
+    def clear(self):
+        self._set_paths([], [], True)
+
+    def draw_contours(self, contours: list, colors: list[tuple]):
+        """Redesenha a camada inteira: cada contorno com a sua cor, na ordem do índice."""
+        self._set_paths(list(contours), list(colors), True)
+
+    def draw_polylines(self, polylines: list[np.ndarray], color: tuple):
+        self._set_paths(list(polylines), [color] * len(polylines), False)
+
+    def _set_paths(self, contours: list, colors: list[tuple], closed: bool):
+        self._contours, self._colors, self._closed = contours, colors, closed
+        self._boxes = np.zeros((0, 4))
+        if contours:
+            points = np.concatenate([np.asarray(c).reshape(-1, 2) for c in contours]).astype(np.float64)
+            starts = np.cumsum([0] + [len(np.asarray(c).reshape(-1, 2)) for c in contours[:-1]])
+            self._boxes = np.hstack([np.minimum.reduceat(points, starts), np.maximum.reduceat(points, starts)])
+        self._tiles.clear()
+
+    def _tile_box(self, index: int, column: int, row: int) -> tuple[float, float, float, float]:
+        """Retângulo (x0, y0, x1, y1) da camada coberto pelo bloco, com a folga de um pixel do nível."""
+        level_h, level_w = self.level_shape(index)
+        scale_x, scale_y = level_w / self.width, level_h / self.height
+        x0, y0 = column * self.tile_size, row * self.tile_size
+        return ((x0 - 1) / scale_x, (y0 - 1) / scale_y,
+                (x0 + self.tile_size + 1) / scale_x, (y0 + self.tile_size + 1) / scale_y)
+
+    def tile(self, index: int, column: int, row: int) -> QPixmap:
+        key = (index, column, row)
+        pixmap = self._tiles.get(key)
+        if pixmap is not None:
+            self._tiles.move_to_end(key)
+            return pixmap
+        level_h, level_w = self.level_shape(index)
+        scale = np.array([level_w / self.width, level_h / self.height])
+        x0, y0 = column * self.tile_size, row * self.tile_size
+        block = np.zeros((min(self.tile_size, level_h - y0), min(self.tile_size, level_w - x0), 4), dtype=np.uint8)
+        bx0, by0, bx1, by1 = self._tile_box(index, column, row)
+        boxes = self._boxes
+        hits = np.flatnonzero((boxes[:, 0] <= bx1) & (boxes[:, 2] >= bx0) & (boxes[:, 1] <= by1) & (boxes[:, 3] >= by0))
+        # Na ordem do índice (o último contorno fica por cima), uma chamada por sequência de mesma cor
+        for color, run in groupby(hits.tolist(), key=lambda i: self._colors[i]):
+            polylines = [np.rint(np.asarray(self._contours[i]).reshape(-1, 2) * scale - (x0, y0)).astype(np.int32)
+                         for i in run]
+            cv2.polylines(block, polylines, self._closed, color, 1)
+        # fromImage copia os pixels: o bloco NumPy pode ser descartado em seguida
+        pixmap = QPixmap.fromImage(QImage(block.data, block.shape[1], block.shape[0], block.strides[0],
+                                          QImage.Format_ARGB32))
+        self._tiles[key] = pixmap
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return pixmap
+
+    def repaint_region(self, bbox: tuple[int, int, int, int], colors: list[tuple]) -> tuple[int, int, int, int] | None:
+        """
+        Troca as cores e descarta só os blocos guardados (em qualquer nível) que
+        cruzam o retângulo bbox (x, y, largura, altura); eles são redesenhados na
+        próxima pintura.
+
+        Returns:
+            tuple | None: O retângulo efetivamente repintado (recortado à camada).
+        """
+        self._colors = list(colors)
+        x0, y0 = max(int(bbox[0]), 0), max(int(bbox[1]), 0)
+        x1, y1 = min(int(bbox[0] + bbox[2]), self.width), min(int(bbox[1] + bbox[3]), self.height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        for key in list(self._tiles):
+            tx0, ty0, tx1, ty1 = self._tile_box(*key)
+            if tx0 < x1 and tx1 > x0 and ty0 < y1 and ty1 > y0:
+                del self._tiles[key]
+        return x0, y0, x1 - x0, y1 - y0
+
+    @property
+    def cached_tiles(self) -> int:
+        return len(self._tiles)
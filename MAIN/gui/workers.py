@@ -0,0 +1,96 @@
+# gui/workers.py
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TaskCancelled(Exception):
+    """Levantada por uma tarefa quando percebe que foi substituída por uma mais nova."""
+
+
+class WorkerSignals(QObject):
+    # (geração, porcentagem 0-100, mensagem)
+    progress = pyqtSignal(int, int, str)
+    # (geração, resultado)
+    finished = pyqtSignal(int, object)
+    # (geração, mensagem de erro)
+    error = pyqtSignal(int, str)
+    # Emitido sempre ao final, depois de finished/error (inclusive se cancelada)
+    done = pyqtSignal()
+
+
+class _PipelineTask(QRunnable):
+    def __init__(self, runner: 'BackgroundRunner', channel: str, generation: int, function, args, kwargs):
+        super().__init__()
+        self.runner = runner; self.channel = channel; self.generation = generation
+        self.function = function; self.args = args; self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def is_cancelled(self) -> bool:
+        return not self.runner.is_current(self.channel, self.generation)
+
+    def report(self, percent: int, message: str = ""):
+        if self.is_cancelled():
+            raise TaskCancelled()
+        self.signals.progress.emit(self.generation, int(percent), message)
+
+    def run(self):
+        try:
+            result = self.function(*self.args, report=self.report, is_cancelled=self.is_cancelled, **self.kwargs)
+            if not self.is_cancelled():
+                self.signals.finished.emit(self.generation, result)
+        except TaskCancelled:
+            pass
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.error.emit(self.generation, f"{type(e).__name__}: {e}")
+        finally:
+            self.signals.done.emit()
+
+
+class BackgroundRunner(QObject):
+    """
+    Executa etapas do pipeline em um QThreadPool, fora da thread da interface.
+
+    Cada "canal" (ex.: 'detection', 'processing') tem um contador de geração.
+    Submeter uma tarefa nova incrementa a geração do canal, o que cancela a
+    anterior: ela para no próximo report()/is_cancelled() e seu resultado é
+    descartado, então só o pedido mais recente chega à interface.
+
+    A função executada recebe os argumentos dados mais dois keywords:
+    report(percent, message) e is_cancelled().
+    """
+    def __init__(self, parent=None, max_threads: int | None = None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        if max_threads is not None: self._pool.setMaxThreadCount(max_threads)
+        self._generations: dict[str, int] = {}
+        self._active_tasks: set[_PipelineTask] = set() # Mantém os QObjects de sinais vivos
+
+    def submit(self, channel: str, function, *args, on_finished=None, on_error=None, on_progress=None, **kwargs) -> int:
+        generation = self._generations.get(channel, 0) + 1
+        self._generations[channel] = generation
+        task = _PipelineTask(self, channel, generation, function, args, kwargs)
+        # Os slots recebem só o payload, e apenas se a geração ainda for a atual
+        if on_finished is not None:
+            task.signals.finished.connect(lambda gen, result: self.is_current(channel, gen) and on_finished(result))
+        if on_error is not None:
+            task.signals.error.connect(lambda gen, message: self.is_current(channel, gen) and on_error(message))
+        if on_progress is not None:
+            task.signals.progress.connect(
+                lambda gen, percent, message: self.is_current(channel, gen) and on_progress(percent, message))
+        # Liberada na thread da interface, depois que os sinais anteriores foram entregues
+        task.signals.done.connect(lambda: self._active_tasks.discard(task))
+        self._active_tasks.add(task)
+        self._pool.start(task)
+        return generation
+
+    def cancel(self, channel: str):
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+
+    def is_current(self, channel: str, generation: int) -> bool:
+        return self._generations.get(channel, 0) == generation
+
+    def is_busy(self) -> bool:
+        return bool(self._active_tasks)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
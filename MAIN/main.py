@@ -1,9 +1,18 @@
 import sys
 import os
-from PyQt5.QtWidgets import QApplication
-from gui.main_window import MainWindow # Certifique-se que esta importação está correta
+import multiprocessing
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # Necessário para o pool de processos no executável congelado
+
+    # Modo sem interface: "main.py batch ..." / "main.py bench ..." não importam Qt
+    if len(sys.argv) > 1 and sys.argv[1] in ("batch", "bench"):
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
+    from PyQt5.QtWidgets import QApplication
+    from gui.main_window import MainWindow # Certifique-se que esta importação está correta
+
     app = QApplication(sys.argv)
 
     # --- CÓDIGO PARA CARREGAR O ARQUIVO QSS ---
@@ -12,7 +21,7 @@ if __name__ == '__main__':
 
     if os.path.exists(path_to_qss):
         qss_file_to_load = path_to_qss
-    
+
     if qss_file_to_load:
         try:
             # MODIFICAÇÃO AQUI vvvvvvvvvvvvvvvvvvvvvvvvvvvvvv
@@ -29,4 +38,4 @@ if __name__ == '__main__':
 
     main_window_instance = MainWindow()
     main_window_instance.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os
+import sys
+
+# Os módulos do projeto são importados como 'core.*' e 'utils.*' (como em main.py),
+# então a pasta MAIN/ precisa estar no path independentemente de onde o pytest roda.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,83 @@
+import os
+
+import cv2
+import numpy as np
+
+from utils import batch_processing
+from utils.pipeline_cache import PipelineCache
+
+
+def _write_images(directory) -> None:
+    (directory / "sub").mkdir()
+    for index, path in enumerate([directory / "a.png", directory / "b.jpg", directory / "sub" / "c.png"]):
+        image = np.full((80, 100, 3), 255, np.uint8)
+        cv2.circle(image, (30 + 10 * index, 40), 20, (0, 0, 0), -1)
+        cv2.rectangle(image, (60, 10), (90, 70), (20, 20, 20), 3)
+        cv2.imwrite(str(path), image)
+    (directory / "notes.txt").write_text("não é imagem")
+
+
+def test_collect_input_files(tmp_path):
+    _write_images(tmp_path)
+    flat = batch_processing.collect_input_files([str(tmp_path)])
+    assert [out for _, out in flat] == ["a.svg", "b.svg"]
+
+    recursive = batch_processing.collect_input_files([str(tmp_path)], recursive=True)
+    assert sorted(out for _, out in recursive) == ["a.svg", "b.svg", os.path.join("sub", "c.svg")]
+
+    globbed = batch_processing.collect_input_files([str(tmp_path / "*.png"), str(tmp_path / "a.png")])
+    assert [out for _, out in globbed] == ["a.svg"]
+
+
+def test_parameters_hash_depends_on_values_only():
+    params = dict(batch_processing.DEFAULT_PIPELINE_PARAMETERS)
+    reordered = dict(reversed(list(params.items())))
+    assert batch_processing.parameters_hash(params) == batch_processing.parameters_hash(reordered)
+    assert batch_processing.parameters_hash(params) != \
+        batch_processing.parameters_hash({**params, "epsilon": 1.0})
+
+
+def test_run_batch_processes_then_skips_up_to_date(tmp_path):
+    (tmp_path / "in").mkdir()
+    _write_images(tmp_path / "in")
+    output_dir = tmp_path / "out"
+
+    summary = batch_processing.run_batch([str(tmp_path / "in")], str(output_dir), {"epsilon": 1.0},
+                                         workers=2, timeout=60, recursive=True)
+    assert (summary["processed"], summary["failed"], summary["timed_out"]) == (3, 0, 0)
+    assert (output_dir / "sub" / "c.svg").read_text().startswith("<?xml")
+
+    again = batch_processing.run_batch([str(tmp_path / "in")], str(output_dir), {"epsilon": 1.0},
+                                       workers=2, recursive=True)
+    assert (again["processed"], again["skipped"]) == (0, 3)
+
+    changed = batch_processing.run_batch([str(tmp_path / "in")], str(output_dir), {"epsilon": 2.0},
+                                         workers=2, recursive=True)
+    assert (changed["processed"], changed["skipped"]) == (3, 0)
+
+    visvalingam = batch_processing.run_batch([str(tmp_path / "in")], str(output_dir),
+                                             {"epsilon": 2.0, "simplification": "vw"}, workers=2, recursive=True)
+    assert (visvalingam["processed"], visvalingam["failed"]) == (3, 0)
+
+
+def test_run_batch_honours_svg_byte_budget(tmp_path):
+    (tmp_path / "in").mkdir()
+    _write_images(tmp_path / "in")
+    output_dir = tmp_path / "out"
+    summary = batch_processing.run_batch([str(tmp_path / "in")], str(output_dir), {"max_svg_bytes": 1500},
+                                         workers=1, recursive=True)
+    assert (summary["processed"], summary["failed"]) == (3, 0)
+    assert all(path.stat().st_size <= 1500 for path in output_dir.rglob("*.svg"))
+
+
+def test_budget_simplification_is_cached(tmp_path, monkeypatch):
+    _write_images(tmp_path)
+    cache = PipelineCache(str(tmp_path / "cache"))
+    parameters = {**batch_processing.DEFAULT_PIPELINE_PARAMETERS, "max_nodes": 40}
+    first = batch_processing.process_image_file(str(tmp_path / "a.png"), str(tmp_path / "a.svg"), parameters, cache)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("o orçamento deveria vir do cache")
+    monkeypatch.setattr(batch_processing, "_apply_budget", fail)
+    second = batch_processing.process_image_file(str(tmp_path / "a.png"), str(tmp_path / "a.svg"), parameters, cache)
+    assert second["nodes"] == first["nodes"] <= 40
@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+
+from utils import benchmark
+
+
+def test_corpus_is_deterministic():
+    for name in benchmark.CORPUS:
+        first = benchmark.generate_image(name, scale=0.05)
+        assert first.dtype == np.uint8 and first.ndim == 3
+        assert np.array_equal(first, benchmark.generate_image(name, scale=0.05))
+    assert not np.array_equal(benchmark.generate_image("line_art", 0.1, seed=0),
+                              benchmark.generate_image("line_art", 0.1, seed=1))
+
+
+def test_suite_report_and_baseline_comparison(tmp_path):
+    report_path = tmp_path / "report.json"
+    baseline_path = tmp_path / "baseline.json"
+    assert benchmark.run_benchmark(["text", "halftone"], scale=0.1, repeats=1, output_path=str(report_path),
+                                   baseline_path=str(baseline_path), update_baseline=True) == 0
+    report = json.loads(report_path.read_text())
+    result = report["images"]["halftone"]
+    assert set(result["stages"]) == set(benchmark.STAGES)
+    assert result["contours"] > 0 and result["svg_bytes"] > 0
+    assert result["nodes"]["detected"] >= result["nodes"]["simplified"] > 0
+    assert benchmark.compare_to_baseline(report, json.loads(baseline_path.read_text())) == ([], [])
+
+    # Mais nós e um SVG maior que a linha de base: regressão
+    regressed = json.loads(report_path.read_text())
+    regressed["images"]["text"]["nodes"]["fitted"] *= 2
+    regressed["images"]["text"]["stages"]["fit_curves_to_paths"]["seconds"] += 10.0
+    regressions, advisories = benchmark.compare_to_baseline(regressed, report)
+    assert any(m.startswith("text/nodes") for m in regressions) and advisories == []
+    assert any(m.startswith("text/fit_curves_to_paths/seconds") for m in regressions)
+    # Em outra máquina, o tempo só gera aviso; os nós continuam regressão
+    other_machine = {**regressed, "machine": {**regressed["machine"], "cpus": 64}}
+    regressions, advisories = benchmark.compare_to_baseline(other_machine, report)
+    assert [m.split(":")[0] for m in regressions] == ["text/nodes"]
+    assert any(m.startswith("text/fit_curves_to_paths/seconds") for m in advisories)
+    # Melhorias não contam; parâmetros ou repetições diferentes tornam a linha de base incompatível
+    assert benchmark.compare_to_baseline(report, regressed) == ([], [])
+    assert "incompatível" in benchmark.compare_to_baseline({**report, "scale": 0.5}, report)[0][0]
+    assert "'repeats'" in benchmark.compare_to_baseline({**report, "repeats": 5}, report)[0][0]
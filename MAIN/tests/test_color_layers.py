@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+
+from core import color_layers
+from core.path_set import PATH_HOLE
+from utils import exporter
+
+
+def _logo() -> np.ndarray:
+    image = np.full((120, 160, 3), 255, np.uint8)
+    cv2.circle(image, (50, 60), 35, (40, 40, 200), -1) # Anel vermelho
+    cv2.circle(image, (50, 60), 15, (255, 255, 255), -1)
+    cv2.rectangle(image, (100, 20), (150, 100), (200, 120, 20), -1) # Retângulo azul
+    return image
+
+
+def test_quantize_colors_recovers_flat_palette():
+    labels, palette = color_layers.quantize_colors(_logo(), 3)
+
+    assert labels.shape == (120, 160) and labels.dtype == np.uint8
+    assert sorted(map(tuple, palette.tolist())) == sorted([(255, 255, 255), (40, 40, 200), (200, 120, 20)])
+    assert tuple(palette[0]) == (255, 255, 255) # Mais frequente primeiro
+    assert np.array_equal(palette[labels][60, 50], [255, 255, 255]) and np.array_equal(palette[labels][60, 20], [40, 40, 200])
+
+
+def test_layers_are_compound_paths_with_holes(tmp_path):
+    for use_processes in (False, True):
+        layers = color_layers.trace_color_layers(_logo(), 3, blur_ksize=1, use_processes=use_processes)
+        by_fill = {layer["fill"]: layer["paths"] for layer in layers}
+        assert set(by_fill) == {"#ffffff", "#c82828", "#1478c8"}
+        ring = by_fill["#c82828"]
+        assert len(ring) == 2 and not ring.is_hole(0) and ring.is_hole(1)
+        assert list(ring.compound_offsets()) == [0, 2]
+        # Fundo: um externo e dois furos (anel e retângulo); o miolo do anel é outro externo
+        background = by_fill["#ffffff"]
+        assert int(np.count_nonzero(background.flags & PATH_HOLE)) == 2 and len(background.compound_offsets()) == 3
+
+    output = tmp_path / "logo.svg"
+    assert exporter.export_color_layers_to_svg(layers, str(output), 160, 120, compact=True)
+    svg = output.read_text()
+    assert svg.count("<g ") == 3 and svg.count("<path ") == 4
+    assert '<g fill="#c82828" fill-rule="evenodd" stroke="none"><path d="m' in svg
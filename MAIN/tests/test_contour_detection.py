@@ -0,0 +1,80 @@
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+
+from core import contour_detection
+
+
+def _synthetic_scan(height: int, width: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 255, np.uint8)
+    for _ in range(150):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        radius = int(rng.integers(3, 60))
+        color = tuple(int(v) for v in rng.integers(0, 200, 3))
+        cv2.circle(image, center, radius, color, int(rng.integers(-1, 5)))
+    noise = rng.integers(0, 50, image.shape, dtype=np.uint8)
+    return cv2.add(image, noise)
+
+
+def _as_sorted_keys(contours: list) -> list[bytes]:
+    return sorted(np.asarray(c, dtype=np.int32).reshape(-1, 2).tobytes() for c in contours)
+
+
+def test_otsu_from_histogram_matches_opencv():
+    gray = cv2.cvtColor(_synthetic_scan(120, 90), cv2.COLOR_BGR2GRAY)
+    expected, _ = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    histogram = np.bincount(gray.ravel(), minlength=256)
+    assert contour_detection._otsu_threshold_from_histogram(histogram) == expected
+
+
+@pytest.mark.parametrize("tile_size", [1, 7, 64, 1000])
+@pytest.mark.parametrize("blur_ksize", [1, 5, 9])
+def test_tiled_detection_matches_full_image(tile_size, blur_ksize):
+    image = _synthetic_scan(150, 170) if tile_size > 1 else _synthetic_scan(40, 50)
+    contours, threshold_image = contour_detection.detect_contours(image, blur_ksize)
+    tiled_contours, tiled_threshold = contour_detection.detect_contours(
+        image, blur_ksize, tile_size=tile_size, max_workers=2)
+
+    assert np.array_equal(threshold_image, tiled_threshold)
+    assert _as_sorted_keys(contours) == _as_sorted_keys(tiled_contours)
+
+
+def test_component_spanning_every_tile_is_traced_without_a_full_size_buffer():
+    image = np.full((1200, 1200, 3), 255, np.uint8)
+    cv2.rectangle(image, (2, 2), (1197, 1197), (0, 0, 0), 3) # Moldura: um componente em todos os blocos
+    cv2.line(image, (0, 600), (1199, 600), (0, 0, 0), 2)
+    contours, _ = contour_detection.detect_contours(image, 1)
+    contour_detection.detect_contours(image[:100, :100], 1, tile_size=32) # Aquece imports preguiçosos
+
+    tracemalloc.start()
+    try:
+        tiled_contours, _ = contour_detection.detect_contours(image, 1, tile_size=64, max_workers=1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert _as_sorted_keys(contours) == _as_sorted_keys(tiled_contours)
+    # A imagem limiarizada (1 byte/pixel) mais o que cada bloco guarda; só os rótulos
+    # de um recorte do tamanho da moldura seriam 4 bytes/pixel
+    assert peak < 3 * 1200 * 1200
+
+
+def test_tiled_detection_handles_none():
+    assert contour_detection.detect_contours(None, tile_size=64) == (None, None)
+
+
+def test_compound_detection_groups_holes_after_their_outer_contour():
+    image = np.full((100, 220, 3), 255, np.uint8)
+    cv2.circle(image, (50, 50), 40, (0, 0, 0), 12) # anel: externo + furo
+    cv2.rectangle(image, (130, 20), (200, 80), (0, 0, 0), -1)
+    contours, hole_mask, threshold_image = contour_detection.detect_compound_contours(image, 1)
+
+    assert threshold_image is not None
+    assert hole_mask.tolist() == [False, True, False] or hole_mask.tolist() == [False, False, True]
+    outer_index = int(np.flatnonzero(hole_mask)[0]) - 1
+    assert cv2.contourArea(contours[outer_index]) > cv2.contourArea(contours[outer_index + 1])
+    # Sem hierarquia (RETR_LIST) o anel também vira dois contornos, mas sem a relação entre eles
+    list_contours, _ = contour_detection.detect_contours(image, 1)
+    assert _as_sorted_keys(list_contours) == _as_sorted_keys(contours)
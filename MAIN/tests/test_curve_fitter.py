@@ -0,0 +1,64 @@
+import numpy as np
+
+from core import curve_fitter
+from core.path_set import PathSet
+
+
+def _pixel_circle(cx=200, cy=150, radius=80, count=400) -> np.ndarray:
+    angles = np.linspace(0, 2 * np.pi, count, endpoint=False)
+    points = np.rint(np.column_stack((cx + radius * np.cos(angles), cy + radius * np.sin(angles)))).astype(int)
+    keep = np.any(points != np.roll(points, 1, axis=0), axis=1)
+    return points[keep]
+
+
+def _distance_to_curve(points: np.ndarray, path_segments: list[tuple]) -> np.ndarray:
+    """Distância de cada ponto à curva amostrada (distância ponto-segmento)."""
+    sampled = curve_fitter.flatten_structured_paths([path_segments], samples_per_curve=64)[0]
+    starts, directions = sampled[:-1], np.diff(sampled, axis=0)
+    lengths_sq = np.maximum((directions ** 2).sum(axis=1), 1e-12)
+    t = np.clip(((points[:, None, :] - starts) * directions).sum(axis=2) / lengths_sq, 0.0, 1.0)
+    closest = starts + t[..., None] * directions
+    return np.sqrt(((points[:, None, :] - closest) ** 2).sum(axis=2)).min(axis=1)
+
+
+def test_bezier_fit_respects_tolerance_and_reduces_nodes():
+    circle = _pixel_circle()
+    for tolerance in (0.75, 1.0, 2.0):
+        segments = curve_fitter.fit_bezier_curves(circle, tolerance=tolerance)
+
+        assert segments[0][0] == 'M'
+        assert any(command == 'C' for command, *_ in segments)
+        assert segments[-1][-1] == segments[0][1] # Fechado: termina no ponto inicial
+        assert len(segments) * 5 <= len(circle)
+        assert _distance_to_curve(circle.astype(float), segments).max() <= tolerance + 0.05
+
+
+def test_bezier_fit_keeps_corners():
+    square = [(10, 10), (60, 10), (110, 10), (110, 60), (110, 110), (60, 110), (10, 110), (10, 60)]
+    segments = curve_fitter.fit_bezier_curves(square, tolerance=1.0)
+
+    assert [command for command, *_ in segments] == ['M', 'L', 'L', 'L', 'L']
+    assert {segment[-1] for segment in segments} == {(10, 10), (110, 10), (110, 110), (10, 110)}
+
+
+def test_fit_curves_to_paths_with_tolerance_uses_path_flags():
+    open_arc = _pixel_circle()[:120]
+    path_set = PathSet.from_contours([_pixel_circle(), open_arc])
+    path_set.flags[1] = 0 # Caminho aberto
+
+    fitted = curve_fitter.fit_curves_to_paths(path_set, tolerance=1.0)
+
+    assert len(fitted) == 2
+    assert fitted[0][-1][-1] == fitted[0][0][1]
+    assert fitted[1][0][1] == tuple(open_arc[0].tolist())
+    assert fitted[1][-1][-1] == tuple(open_arc[-1].tolist())
+    # Sem tolerância, o PathSet continua sendo devolvido como está
+    assert curve_fitter.fit_curves_to_paths(path_set) is path_set
+
+
+def test_flatten_structured_paths():
+    paths = [[('M', (0, 0)), ('L', (10, 0)), ('C', (10, 5), (5, 10), (0, 10))]]
+    flattened = curve_fitter.flatten_structured_paths(paths, samples_per_curve=4)
+
+    assert flattened[0].shape == (6, 2)
+    assert np.allclose(flattened[0][[0, 1, -1]], [(0, 0), (10, 0), (0, 10)])
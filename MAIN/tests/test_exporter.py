@@ -0,0 +1,184 @@
+import numpy as np
+import svgwrite
+
+from core.path_set import PathSet, PATH_HOLE
+from utils import exporter
+
+
+def _sample_path_set() -> PathSet:
+    rng = np.random.default_rng(11)
+    contours = [np.cumsum(rng.integers(-5, 6, size=(int(rng.integers(1, 40)), 2)), axis=0) + 200
+                for _ in range(60)]
+    path_set = PathSet.from_contours([c.reshape(-1, 1, 2).astype(np.int32) for c in contours])
+    path_set.flags[::3] = 0 # Alguns caminhos abertos (sem 'Z')
+    return path_set
+
+
+def _svgwrite_reference(d_strings, filepath, size, view_box, stroke_color, stroke_width, fill_color):
+    """Como o exportador montava o SVG antes (DOM do svgwrite)."""
+    dwg = svgwrite.Drawing(filepath, size=size, profile='tiny')
+    dwg.viewbox(*view_box)
+    for d_string in d_strings:
+        dwg.add(dwg.path(d=d_string, stroke=stroke_color, stroke_width=stroke_width, fill=fill_color))
+    dwg.save()
+
+
+def test_streaming_export_matches_svgwrite_output(tmp_path):
+    path_set = _sample_path_set()
+    structured = [[('M', (1.5, 2)), ('C', (3, 4), (5.25, 6), (7, 8)), ('Q', (9, 10), (11, 12)), ('L', (13, 14))],
+                  [('M', (20, 20)), ('L', (30, 20))]]
+    cases = [
+        (path_set, (640, 480), ("640px", "480px"), (0.0, 0.0, 640.0, 480.0)),
+        (path_set, (None, None), None, None),
+        (structured, (None, None), ("40px", "30px"), (0.0, 0.0, 40.0, 30.0)),
+    ]
+    for data, (width, height), size, view_box in cases:
+        if size is None: # Sem tamanho da imagem: maior coordenada + 10
+            max_x, max_y = (data.coords.max(axis=0) + 10).tolist()
+            size, view_box = (f"{max_x}px", f"{max_y}px"), (0.0, 0.0, float(max_x), float(max_y))
+        output, reference = tmp_path / "stream.svg", tmp_path / "reference.svg"
+        assert exporter.export_to_svg(data, str(output), width, height,
+                                      stroke_color='#336699', stroke_width='1.5', fill_color='none')
+        d_strings = (exporter._path_set_d_strings(data) if isinstance(data, PathSet)
+                     else exporter._structured_d_strings(data))
+        _svgwrite_reference(d_strings, str(reference), size, view_box, '#336699', '1.5', 'none')
+        assert output.read_bytes() == reference.read_bytes()
+
+
+def test_path_set_formatting_is_chunked(monkeypatch):
+    path_set = _sample_path_set()
+    expected = list(exporter._path_set_d_strings(path_set))
+    monkeypatch.setattr(exporter, "_FORMAT_CHUNK_POINTS", 16)
+    assert list(exporter._path_set_d_strings(path_set)) == expected
+    assert expected[1].startswith("M") and expected[1].endswith(" Z") and not expected[0].endswith("Z")
+
+
+def test_stream_writer_removes_partial_file_on_error(tmp_path):
+    output = tmp_path / "partial.svg"
+    try:
+        with exporter.SvgStreamWriter(str(output), "10px", "10px", (0, 0, 10, 10)) as writer:
+            writer.write_path("M0,0 L1,1 Z")
+            raise RuntimeError("falha no meio da exportação")
+    except RuntimeError:
+        pass
+    assert not output.exists()
+
+
+def _parse_compact_d(d_string: str) -> list[list[tuple[str, list[tuple[float, float]]]]]:
+    """Interpreta um 'd' relativo (m, l, h, v, c, q, z) de volta para pontos absolutos por segmento."""
+    import re
+    tokens = re.findall(r"[mlhvcqz]|-?(?:\d+\.?\d*|\.\d+)", d_string)
+    arity = {'m': 2, 'l': 2, 'h': 1, 'v': 1, 'c': 6, 'q': 4, 'z': 0}
+    segments, position, command, index = [], (0.0, 0.0), None, 0
+    subpath_start = position
+    while index < len(tokens):
+        if tokens[index].isalpha():
+            command = tokens[index]
+            index += 1
+            if command == 'z':
+                segments.append(('z', []))
+                position = subpath_start # 'z' volta ao início do subcaminho
+                continue
+        elif command == 'm':
+            command = 'l' # Pares depois de 'm' são 'l' implícitos
+        values = [float(v) for v in tokens[index:index + arity[command]]]
+        index += arity[command]
+        x, y = position
+        if command == 'h':
+            points = [(x + values[0], y)]
+        elif command == 'v':
+            points = [(x, y + values[0])]
+        else:
+            points = [(x + values[i], y + values[i + 1]) for i in range(0, len(values), 2)]
+        segments.append((command, points))
+        if command == 'm':
+            subpath_start = points[0]
+        position = points[-1]
+    return segments
+
+
+def test_compact_encoding_round_trips_path_set():
+    path_set = _sample_path_set()
+    compact = list(exporter._compact_path_set_d_strings(path_set, precision=0))
+    plain = list(exporter._path_set_d_strings(path_set))
+    assert len(compact) == len(plain)
+    assert sum(map(len, compact)) < 0.6 * sum(map(len, plain))
+
+    for d_string, path, closed in zip(compact, path_set, path_set.flags & 1):
+        assert " ," not in d_string and ", " not in d_string
+        segments = _parse_compact_d(d_string)
+        points = np.array([p for command, pts in segments for p in pts])
+        deduplicated = path[np.r_[True, np.any(np.diff(path, axis=0) != 0, axis=1)]]
+        if closed and len(deduplicated) > 1 and np.array_equal(deduplicated[0], deduplicated[-1]):
+            deduplicated = deduplicated[:-1]
+        assert np.array_equal(points, deduplicated)
+        assert (segments[-1][0] == 'z') == bool(closed)
+
+
+def test_compact_encoding_of_curves_and_axis_runs():
+    structured = [[('M', (10, 20)), ('L', (15, 20)), ('L', (15, 17)), ('L', (15.5, 15.75)),
+                   ('C', (16, 15), (17.1, 14), (18, 14))]]
+    d_string = next(exporter._compact_structured_d_strings(structured, precision=2))
+    assert d_string == "m10 20h5v-3l.5-1.25c.5-.75 1.6-1.75 2.5-1.75z"
+
+    segments = _parse_compact_d(d_string)
+    assert segments[-2][1] == [(16.0, 15.0), (17.1, 14.0), (18.0, 14.0)]
+    assert next(exporter._compact_structured_d_strings(structured, precision=0)).startswith("m10 20h5v-3l1-1")
+
+
+def test_svgz_output_is_gzip_compressed(tmp_path):
+    import gzip
+    path_set = _sample_path_set()
+    plain, compressed = tmp_path / "plain.svg", tmp_path / "compressed.svgz"
+    assert exporter.export_to_svg(path_set, str(plain), 640, 480, compact=True)
+    assert exporter.export_to_svg(path_set, str(compressed), 640, 480, compact=True)
+    assert gzip.decompress(compressed.read_bytes()) == plain.read_bytes()
+    assert compressed.stat().st_size < plain.stat().st_size
+
+
+def test_holes_are_written_as_subpaths_of_the_outer_path():
+    outer = np.array([[0, 0], [40, 0], [40, 30], [0, 30]], np.int32).reshape(-1, 1, 2)
+    hole = np.array([[10, 10], [10, 20], [20, 20]], np.int32).reshape(-1, 1, 2)
+    other = np.array([[50, 5], [60, 5], [60, 15]], np.int32).reshape(-1, 1, 2)
+    path_set = PathSet.from_contours([outer, hole, other])
+    path_set.flags[1] |= PATH_HOLE
+
+    plain = list(exporter._path_set_d_strings(path_set))
+    assert plain == ["M0,0 L40,0 L40,30 L0,30 Z M10,10 L10,20 L20,20 Z", "M50,5 L60,5 L60,15 Z"]
+    compact = list(exporter._compact_path_set_d_strings(path_set, precision=0))
+    assert len(compact) == 2
+    points = [p for command, pts in _parse_compact_d(compact[0]) for p in pts]
+    assert points == [tuple(map(float, p)) for p in np.concatenate([outer, hole]).reshape(-1, 2).tolist()]
+
+    structured = [[('M', (0, 0)), ('L', (40, 0)), ('L', (40, 30)), ('Z',), ('M', (10, 10)), ('L', (10, 20))]]
+    assert next(exporter._structured_d_strings(structured)) == "M0,0 L40,0 L40,30 Z M10,10 L10,20 Z"
+    compact_structured = next(exporter._compact_structured_d_strings(structured, precision=0))
+    assert [p for command, pts in _parse_compact_d(compact_structured) for p in pts] == \
+        [(0.0, 0.0), (40.0, 0.0), (40.0, 30.0), (10.0, 10.0), (10.0, 20.0)]
+
+
+def test_compound_paths_get_evenodd_fill_rule(tmp_path):
+    outer = np.array([[0, 0], [40, 0], [40, 30], [0, 30]], np.int32).reshape(-1, 1, 2)
+    hole = np.array([[10, 10], [10, 20], [20, 20]], np.int32).reshape(-1, 1, 2)
+    path_set = PathSet.from_contours([outer, hole])
+
+    assert exporter.export_to_svg(path_set, str(tmp_path / "plain.svg"), image_width=50, image_height=40)
+    assert "fill-rule" not in (tmp_path / "plain.svg").read_text()
+
+    path_set.flags[1] |= PATH_HOLE
+    assert exporter.export_to_svg(path_set, str(tmp_path / "compound.svg"), image_width=50, image_height=40,
+                                  fill_color="black")
+    svg = (tmp_path / "compound.svg").read_text()
+    assert svg.count("<path ") == 1
+    assert 'fill="black" fill-rule="evenodd" stroke="black"' in svg
+
+
+def test_byte_estimate_matches_exported_size(tmp_path):
+    path_set = _sample_path_set()
+    path_set.flags[1::4] |= PATH_HOLE
+    float_path_set = path_set.with_coords(path_set.coords / 3.0)
+    for paths, style in ((path_set, {}), (float_path_set, {"fill_color": "#ff00aa", "stroke_width": "0.5"})):
+        filepath = tmp_path / "sized.svg"
+        assert exporter.export_to_svg(paths, str(filepath), image_width=640, image_height=480, **style)
+        expected = exporter.svg_fixed_bytes(paths, 640, 480, **style) + int(exporter.svg_vertex_bytes(paths).sum())
+        assert filepath.stat().st_size == expected
@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+
+from core.label_map import ContourLabelMap
+
+
+def _contours() -> list[np.ndarray]:
+    image = np.zeros((120, 160), np.uint8)
+    cv2.rectangle(image, (5, 5), (150, 110), 255, 3) # Moldura: contorno externo e interno
+    cv2.circle(image, (50, 55), 25, 255, -1)
+    cv2.circle(image, (50, 55), 10, 0, -1) # Furo dentro do círculo
+    cv2.rectangle(image, (100, 30), (130, 80), 255, -1)
+    contours, _ = cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    return list(contours)
+
+
+def _reference_label(contours, x, y) -> int:
+    """Busca original: menor contorno (pointPolygonTest >= 0) por área."""
+    best, best_area = -1, float('inf')
+    for index, contour in enumerate(contours):
+        if cv2.pointPolygonTest(contour, (x, y), False) >= 0:
+            area = cv2.contourArea(contour)
+            if area < best_area:
+                best, best_area = index, area
+    return best
+
+
+def _assert_matches_reference(label_map, contours):
+    height, width = label_map.shape
+    for y in range(0, height, 3):
+        for x in range(0, width, 3):
+            assert label_map.label_at(x, y) == _reference_label(contours, x, y), (x, y)
+
+
+def test_label_map_matches_point_polygon_search():
+    contours = _contours()
+    label_map = ContourLabelMap(contours, (120, 160))
+
+    assert label_map.labels.dtype == np.int16
+    _assert_matches_reference(label_map, contours)
+    assert label_map.label_at(-1, 10) == -1 and label_map.label_at(10, 500) == -1
+
+
+def test_update_contour_repaints_only_affected_region():
+    contours = _contours()
+    label_map = ContourLabelMap(contours, (120, 160))
+    untouched = label_map.labels[:, :90].copy()
+
+    square = next(i for i, c in enumerate(contours) if cv2.boundingRect(c)[0] == 100)
+    moved = contours[square] + np.array([5, 10], dtype=np.int32)
+    label_map.update_contour(square, moved)
+    contours[square] = moved
+    _assert_matches_reference(label_map, contours)
+    assert np.array_equal(label_map.labels[:, :90], untouched)
+
+    label_map.update_contour(square, None)
+    assert not np.any(label_map.labels == square)
+    remaining = [c if i != square else np.array([[[-50, -50]]], dtype=np.int32) for i, c in enumerate(contours)]
+    _assert_matches_reference(label_map, remaining)
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+from core import contour_detection
+from core.marching_squares import _cycles, trace_isolines
+from core.path_set import PATH_CLOSED
+
+
+def _signed_area(points: np.ndarray) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def test_circle_isoline_is_subpixel_and_closed():
+    field = np.zeros((60, 70), np.float32)
+    cv2.circle(field, (35, 30), 20, 1.0, -1)
+    field = cv2.GaussianBlur(field, (5, 5), 0)
+    path_set = trace_isolines(field, 0.5)
+
+    assert len(path_set) == 1 and path_set.flags[0] == PATH_CLOSED
+    points = path_set[0]
+    assert np.any(points != np.rint(points)) # vértices entre os pixels
+    radius = np.hypot(points[:, 0] - 35, points[:, 1] - 30)
+    assert np.abs(radius - 20).max() < 0.6
+    # Passos de no máximo uma célula, inclusive do último vértice de volta ao primeiro
+    steps = np.abs(np.diff(np.vstack([points, points[:1]]), axis=0))
+    assert steps.max() <= 1.0
+
+
+def test_holes_and_borders_are_closed_with_opposite_orientation():
+    field = np.zeros((40, 50), np.float32)
+    field[:, :20] = 1.0 # encosta na borda da imagem
+    field[10:30, 28:46] = 1.0
+    field[15:25, 33:41] = 0.0 # furo
+    path_set = trace_isolines(field, 0.5)
+
+    areas = sorted((_signed_area(path) for path in path_set), key=abs)
+    assert len(areas) == 3
+    assert np.sign(areas[0]) != np.sign(areas[1]) == np.sign(areas[2])
+    assert abs(areas[0]) == pytest.approx(9 * 7 + 0.5 * (2 * 9 + 2 * 7) + 0.5)
+
+
+def test_saddle_cells_follow_the_cell_center():
+    field = np.array([[1, 0], [0, 1]], np.float32)
+    assert len(trace_isolines(field, 0.5)) == 2 # centro (0.5) não está acima do nível: cantos separados
+    assert len(trace_isolines(field, 0.4)) == 1
+
+
+def test_cycles_start_at_the_smallest_node():
+    next_node = np.array([3, 0, 4, 1, 2])
+    order, offsets = _cycles(next_node)
+    assert order.tolist() == [0, 3, 1, 2, 4]
+    assert offsets.tolist() == [0, 3, 5]
+
+
+def test_subpixel_detection_matches_threshold_regions():
+    image = np.full((80, 100, 3), 255, np.uint8)
+    cv2.circle(image, (30, 40), 20, (0, 0, 0), -1, lineType=cv2.LINE_AA)
+    cv2.rectangle(image, (60, 15), (90, 65), (40, 40, 40), -1)
+    path_set, threshold_image = contour_detection.detect_subpixel_contours(image, 5)
+    _, expected_threshold = contour_detection.detect_contours(image, 5)
+
+    assert np.array_equal(threshold_image, expected_threshold)
+    assert len(path_set) == 2 and path_set.coords.dtype == np.float64
+    assert contour_detection.detect_subpixel_contours(None) == (None, None)
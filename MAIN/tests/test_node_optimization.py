@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+
+from core import node_optimization
+from core.path_set import PathSet
+
+
+def _reference_rdp(points_complex, epsilon):
+    """Implementação recursiva original (números complexos), usada como referência."""
+    if not points_complex or len(points_complex) < 3:
+        return points_complex
+
+    def perpendicular_distance(pt, line_start, line_end):
+        if line_start == line_end:
+            return abs(pt - line_start)
+        line_vec = line_end - line_start
+        pt_vec = pt - line_start
+        numerator = abs(line_vec.real * pt_vec.imag - line_vec.imag * pt_vec.real)
+        return numerator / abs(line_vec)
+
+    max_dist, index = 0.0, 0
+    for i in range(1, len(points_complex) - 1):
+        dist = perpendicular_distance(points_complex[i], points_complex[0], points_complex[-1])
+        if dist > max_dist:
+            index, max_dist = i, dist
+    if max_dist > epsilon:
+        left = _reference_rdp(points_complex[:index + 1], epsilon)
+        right = _reference_rdp(points_complex[index:], epsilon)
+        return left[:-1] + right
+    return [points_complex[0], points_complex[-1]]
+
+
+def _reference_simplification(polylines, epsilon):
+    result = []
+    for polyline in polylines:
+        if len(polyline) < 2:
+            result.append(polyline)
+            continue
+        simplified = _reference_rdp([complex(x, y) for x, y in polyline], epsilon)
+        result.append([(int(round(p.real)), int(round(p.imag))) for p in simplified])
+    return result
+
+
+def _random_polylines(count: int = 30, seed: int = 1) -> list[list[tuple]]:
+    rng = np.random.default_rng(seed)
+    polylines = []
+    for _ in range(count):
+        n = int(rng.integers(1, 80))
+        steps = rng.integers(-3, 4, size=(n, 2))
+        polylines.append([tuple(p) for p in np.cumsum(steps, axis=0).tolist()])
+    # Casos degenerados: colinear, pontos repetidos, início == fim
+    polylines.append([(0, 0), (1, 0), (2, 0), (3, 0)])
+    polylines.append([(5, 5), (5, 5), (5, 5)])
+    polylines.append([(0, 0), (4, 3), (8, 0), (4, -3), (0, 0)])
+    return polylines
+
+
+@pytest.mark.parametrize("epsilon", [0.0, 0.3, 1.0, 1.5, 4.0])
+def test_significance_filter_matches_recursive_rdp(epsilon):
+    polylines = _random_polylines()
+    expected = _reference_simplification(polylines, epsilon)
+    significances = [node_optimization.compute_rdp_significance(p) for p in polylines]
+    result = node_optimization.apply_rdp_with_significance(polylines, significances, epsilon=epsilon)
+    assert result == expected
+
+
+def test_significance_keeps_endpoints():
+    significance = node_optimization.compute_rdp_significance([(0, 0), (1, 5), (2, 0)])
+    assert np.isinf(significance[0]) and np.isinf(significance[-1])
+    assert significance[1] == pytest.approx(5.0)
+
+
+@pytest.mark.parametrize("epsilon", [0.0, 0.3, 1.0, 1.5, 4.0])
+def test_iterative_rdp_is_identical_to_recursive_version(epsilon):
+    polylines = _random_polylines(seed=7)
+    assert node_optimization.apply_custom_rdp_simplification(polylines, epsilon=epsilon) == \
+        _reference_simplification(polylines, epsilon)
+
+    rng = np.random.default_rng(3)
+    floats = [complex(x, y) for x, y in rng.normal(0, 10, size=(200, 2))]
+    assert node_optimization.rdp_custom(floats, epsilon) == _reference_rdp(floats, epsilon)
+
+
+def test_iterative_rdp_handles_long_contours():
+    # Uma espiral longa estouraria o limite de recursão da versão recursiva
+    t = np.linspace(0, 400 * np.pi, 20000)
+    spiral = np.stack([t * np.cos(t), t * np.sin(t)], axis=1)
+    keep = node_optimization.rdp_keep_mask(spiral, epsilon=0.5)
+    assert keep[0] and keep[-1]
+    assert 2 < keep.sum() < len(spiral)
+
+
+def _reference_visvalingam(polyline, area_threshold):
+    """VW ingênuo: remove o menor triângulo e recalcula todos, guardando a área efetiva de cada vértice."""
+    points = [tuple(float(v) for v in p) for p in polyline]
+    alive = list(range(len(points)))
+    effective_area = [np.inf] * len(points)
+    last_area = 0.0
+    while len(alive) > 2:
+        areas = [0.5 * abs((points[b][0] - points[a][0]) * (points[c][1] - points[a][1])
+                           - (points[c][0] - points[a][0]) * (points[b][1] - points[a][1]))
+                 for a, b, c in zip(alive, alive[1:], alive[2:])]
+        smallest = int(np.argmin(areas))
+        last_area = max(last_area, areas[smallest])
+        effective_area[alive.pop(smallest + 1)] = last_area
+    return [tuple(p) for p, area in zip(polyline, effective_area) if area > area_threshold]
+
+
+@pytest.mark.parametrize("area_threshold", [0.0, 0.5, 1.0, 3.0])
+def test_visvalingam_matches_naive_removal(area_threshold):
+    polylines = _random_polylines(seed=11)
+    polylines.append([((i + 1) // 2, i // 2) for i in range(21)]) # escada de pixels
+    result = node_optimization.apply_visvalingam_simplification(polylines, area_threshold=area_threshold)
+    assert result == [_reference_visvalingam(p, area_threshold) for p in polylines]
+    assert node_optimization.SIMPLIFICATION_METHODS["vw"](polylines, area_threshold) == result
+
+
+def test_visvalingam_target_nodes_is_exact():
+    polylines = _random_polylines(seed=5)
+    path_set = PathSet.from_polylines(polylines, dtype=np.float64)
+    areas = node_optimization.compute_path_set_effective_area(path_set, workers=1)
+    endpoints = int(np.isinf(areas).sum())
+    for target in (0, endpoints, endpoints + 17, path_set.total_points, path_set.total_points + 5):
+        simplified = node_optimization.apply_visvalingam_simplification(path_set, target_nodes=target,
+                                                                        effective_areas=areas)
+        assert simplified.total_points == min(max(target, endpoints), path_set.total_points)
+        assert len(simplified) == len(path_set)
+
+    # A área efetiva nunca diminui na ordem de remoção: um limiar maior mantém um subconjunto
+    kept_small = areas > 1.0
+    assert not (areas > 4.0)[~kept_small].any()
+
+
+@pytest.mark.parametrize("method", ["rdp", "vw"])
+def test_node_budget_is_met_exactly_and_favours_significant_vertices(method):
+    path_set = PathSet.from_polylines(_random_polylines(seed=13), dtype=np.float64)
+    priority = node_optimization.SIGNIFICANCE_METHODS[method](path_set, workers=1)
+    endpoints = int(np.isinf(priority).sum())
+
+    simplified = node_optimization.apply_node_budget(path_set, max_nodes=endpoints + 40, method=method)
+    assert simplified.total_points == endpoints + 40 and len(simplified) == len(path_set)
+    kept = node_optimization.budget_keep_mask(priority, max_nodes=endpoints + 40)
+    assert priority[kept].min() >= priority[~kept].max()
+
+    # Orçamento em bytes: o maior prefixo da fila que cabe
+    vertex_bytes = np.arange(len(priority)) % 7 + 5
+    kept = node_optimization.budget_keep_mask(priority, vertex_bytes=vertex_bytes, max_bytes=1000)
+    assert vertex_bytes[kept].sum() <= 1000
+    # O limiar mínimo continua valendo junto com o orçamento
+    kept = node_optimization.budget_keep_mask(priority, max_nodes=10 ** 6, min_priority=1.0)
+    assert np.array_equal(kept, priority > 1.0)
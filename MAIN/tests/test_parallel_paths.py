@@ -0,0 +1,50 @@
+import cv2
+import numpy as np
+import pytest
+
+from core import curve_fitter, node_optimization, parallel_paths
+from core.path_set import PathSet, PATH_HOLE
+
+
+def _path_set(seed: int = 0) -> PathSet:
+    rng = np.random.default_rng(seed)
+    image = np.zeros((300, 400), np.uint8)
+    for _ in range(60):
+        center = (int(rng.integers(0, 400)), int(rng.integers(0, 300)))
+        cv2.circle(image, center, int(rng.integers(3, 50)), 255, int(rng.integers(-1, 4)))
+    contours, _ = cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_NONE)
+    path_set = PathSet.from_contours(list(contours))
+    path_set.flags[1::7] |= PATH_HOLE
+    return path_set
+
+
+def test_balanced_chunks_cover_all_paths_in_order():
+    offsets = np.cumsum([0, 500, 1, 1, 1, 300, 300, 2, 400])
+    chunks = parallel_paths.balanced_chunks(offsets, 4)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(offsets) - 1
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+    assert all(start < end for start, end in chunks)
+    assert parallel_paths.balanced_chunks(np.zeros(1, np.int64), 4) == []
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_results_match_serial(workers):
+    path_set = _path_set()
+
+    serial = node_optimization.apply_custom_rdp_simplification(path_set, epsilon=1.0, workers=1)
+    parallel = node_optimization.apply_custom_rdp_simplification(path_set, epsilon=1.0, workers=workers)
+    assert np.array_equal(serial.coords, parallel.coords) and np.array_equal(serial.offsets, parallel.offsets)
+    assert np.array_equal(serial.flags, parallel.flags)
+
+    assert np.array_equal(node_optimization.compute_path_set_significance(path_set, workers=1),
+                          node_optimization.compute_path_set_significance(path_set, workers=workers))
+
+    assert curve_fitter.fit_curves_to_paths(serial, tolerance=1.0, workers=1) == \
+        curve_fitter.fit_curves_to_paths(serial, tolerance=1.0, workers=workers)
+
+
+def test_small_inputs_and_daemon_processes_run_serially(monkeypatch):
+    assert parallel_paths.resolve_workers(None, 10) == 1
+    assert parallel_paths.resolve_workers(4, 10) == 4
+    monkeypatch.setattr(parallel_paths.multiprocessing.current_process(), "daemon", True, raising=False)
+    assert parallel_paths.resolve_workers(4, 10 ** 9) == 1
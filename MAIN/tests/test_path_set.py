@@ -0,0 +1,64 @@
+import numpy as np
+
+from core import curve_fitter, node_optimization, vectorization
+from core.path_set import PATH_CLOSED, PATH_SELECTED, PathSet
+from utils import exporter
+
+
+def _mock_contours() -> list[np.ndarray]:
+    rng = np.random.default_rng(5)
+    contours = [np.array([[[10, 10]], [[20, 10]], [[20, 20]], [[10, 20]]], dtype=np.int32),
+                np.array([[[30, 30]]], dtype=np.int32)]
+    for _ in range(10):
+        points = np.cumsum(rng.integers(-4, 5, size=(int(rng.integers(2, 60)), 2)), axis=0) + 100
+        contours.append(points.reshape(-1, 1, 2).astype(np.int32))
+    return contours
+
+
+def test_from_contours_builds_flat_buffer():
+    contours = _mock_contours()
+    path_set = PathSet.from_contours(contours)
+
+    assert len(path_set) == len(contours)
+    assert path_set.coords.dtype == np.int32
+    assert path_set.total_points == sum(len(c) for c in contours)
+    for path, contour in zip(path_set, contours):
+        assert np.array_equal(path, contour.reshape(-1, 2))
+    assert all(path_set.is_closed(i) for i in range(len(path_set)))
+    # Os caminhos são views do buffer
+    assert np.shares_memory(path_set[3], path_set.coords)
+
+
+def test_subset_and_filter_points():
+    path_set = PathSet.from_contours(_mock_contours())
+    path_set.set_selected(2, True)
+    subset = path_set.subset([2, 0, 5])
+    assert subset.to_polylines() == [path_set.to_polylines()[i] for i in (2, 0, 5)]
+    assert list(subset.flags) == [PATH_CLOSED | PATH_SELECTED, PATH_CLOSED, PATH_CLOSED]
+
+    keep = np.zeros(path_set.total_points, dtype=bool)
+    keep[::2] = True
+    filtered = path_set.filter_points(keep)
+    expected = [[p for j, p in enumerate(poly) if keep[path_set.offsets[i] + j]]
+                for i, poly in enumerate(path_set.to_polylines())]
+    assert filtered.to_polylines() == expected
+
+
+def test_path_set_pipeline_matches_list_pipeline(tmp_path):
+    contours = _mock_contours()
+    polylines = vectorization.vectorize_from_contours(contours)
+    path_set = vectorization.vectorize_from_contours(contours, as_path_set=True)
+    assert path_set.to_polylines() == polylines
+
+    simplified_list = node_optimization.apply_custom_rdp_simplification(polylines, epsilon=1.5)
+    simplified_set = node_optimization.apply_custom_rdp_simplification(path_set, epsilon=1.5)
+    assert simplified_set.to_polylines() == simplified_list
+
+    significances = [node_optimization.compute_rdp_significance(p) for p in path_set]
+    from_index = node_optimization.apply_rdp_with_significance(path_set, significances, epsilon=1.5)
+    assert from_index.to_polylines() == simplified_list
+
+    list_svg, set_svg = tmp_path / "list.svg", tmp_path / "set.svg"
+    assert exporter.export_to_svg(curve_fitter.fit_curves_to_paths(simplified_list), str(list_svg), 200, 200)
+    assert exporter.export_to_svg(curve_fitter.fit_curves_to_paths(simplified_set), str(set_svg), 200, 200)
+    assert list_svg.read_bytes() == set_svg.read_bytes()
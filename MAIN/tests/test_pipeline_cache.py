@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+import pytest
+
+from core import contour_detection
+from core.path_set import PathSet
+from utils import pipeline_cache
+from utils.pipeline_cache import PipelineCache
+
+
+def _image() -> np.ndarray:
+    image = np.full((120, 160, 3), 255, np.uint8)
+    cv2.circle(image, (50, 60), 30, (0, 0, 0), -1)
+    cv2.rectangle(image, (100, 20), (150, 100), (30, 30, 30), 4)
+    return image
+
+
+def test_stage_key_depends_on_input_and_parameters():
+    key = PipelineCache.stage_key("detection", "abc", blur_ksize=5, tile_size=None)
+    assert key == PipelineCache.stage_key("detection", "abc", tile_size=None, blur_ksize=5)
+    assert key != PipelineCache.stage_key("detection", "abc", blur_ksize=7, tile_size=None)
+    assert key != PipelineCache.stage_key("detection", "abd", blur_ksize=5, tile_size=None)
+    assert pipeline_cache.content_hash(np.zeros((2, 3))) != pipeline_cache.content_hash(np.zeros((3, 2)))
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = PipelineCache(max_memory_bytes=3 * 800)
+    for name in "abc":
+        cache.put(name, {"data": np.zeros(100)}, persist=False) # 800 bytes cada
+    assert cache.get("a") is not None # 'a' passa a ser o mais recente
+    cache.put("d", {"data": np.zeros(100)}, persist=False)
+
+    assert cache.get("b") is None
+    assert all(cache.get(name) is not None for name in "acd")
+
+
+def test_disk_entries_survive_a_new_instance_and_are_pruned(tmp_path):
+    path_set = PathSet.from_polylines([[(0, 0), (5, 0), (5, 5)], [(1, 1), (2, 2)]])
+    PipelineCache(str(tmp_path)).put_path_set("paths", path_set, extra=np.arange(3))
+
+    restored, extras = PipelineCache(str(tmp_path)).get_path_set("paths")
+    assert restored.to_polylines() == path_set.to_polylines()
+    assert np.array_equal(extras["extra"], np.arange(3))
+
+    small = PipelineCache(str(tmp_path), max_disk_bytes=1)
+    small.put("other", {"data": np.arange(10)})
+    assert list(tmp_path.glob("*.npz")) == [] # Tudo acima do limite é removido
+
+
+def test_detection_is_reused_for_same_pixels(tmp_path, monkeypatch):
+    cv2.imwrite(str(tmp_path / "a.png"), _image())
+    cv2.imwrite(str(tmp_path / "b.png"), _image()) # Outro arquivo, mesmos pixels
+    cache = PipelineCache(str(tmp_path / "cache"))
+
+    image, image_hash = cache.load_image(str(tmp_path / "a.png"))
+    paths, threshold, key = pipeline_cache.detect_and_vectorize(cache, image, image_hash, blur_ksize=5)
+    contours, expected_threshold = contour_detection.detect_contours(image, blur_ksize_val=5)
+    assert paths.to_polylines() == PathSet.from_contours(contours).to_polylines()
+    assert np.array_equal(threshold, expected_threshold)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("a detecção deveria vir do cache")
+    monkeypatch.setattr(contour_detection, "detect_contours", fail)
+    fresh_cache = PipelineCache(str(tmp_path / "cache")) # Só o disco
+    other_image, other_hash = fresh_cache.load_image(str(tmp_path / "b.png"))
+    assert other_hash == image_hash
+    cached_paths, cached_threshold, cached_key = pipeline_cache.detect_and_vectorize(
+        fresh_cache, other_image, other_hash, blur_ksize=5)
+    assert cached_key == key
+    assert cached_paths.to_polylines() == paths.to_polylines()
+    assert np.array_equal(cached_threshold, threshold)
+
+    with pytest.raises(AssertionError): # Outro kernel: a detecção roda de novo
+        pipeline_cache.detect_and_vectorize(fresh_cache, other_image, other_hash, blur_ksize=7)
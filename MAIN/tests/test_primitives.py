@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+import pytest
+
+from core import contour_detection, primitives
+from core.path_set import PathSet, PATH_HOLE
+from utils import exporter
+
+
+def _drawing() -> np.ndarray:
+    image = np.full((300, 400, 3), 255, np.uint8)
+    cv2.circle(image, (80, 80), 50, (0, 0, 0), -1)
+    cv2.ellipse(image, (250, 80), (70, 35), 30, 0, 360, (0, 0, 0), -1)
+    cv2.rectangle(image, (40, 170), (160, 260), (0, 0, 0), -1)
+    cv2.fillPoly(image, [np.array([[250, 170], [350, 200], [300, 280]])], (0, 0, 0))
+    cv2.putText(image, "S", (180, 250), cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 0), 8)
+    return image
+
+
+def test_shapes_are_recognized_and_the_rest_stays_a_path():
+    contours, _ = contour_detection.detect_contours(_drawing(), 1)
+    shapes, remaining = primitives.recognize_primitives(PathSet.from_contours(contours))
+
+    by_type = {shape["type"]: shape for shape in shapes}
+    assert sorted(by_type) == ["circle", "ellipse", "polygon", "rect"] and len(remaining) == 1
+    circle = by_type["circle"]
+    assert (circle["cx"], circle["cy"]) == pytest.approx((80, 80), abs=0.2) and circle["r"] == pytest.approx(50, abs=1)
+    ellipse = by_type["ellipse"]
+    assert (ellipse["rx"], ellipse["ry"], ellipse["angle"]) == pytest.approx((70, 35, 30), abs=0.5)
+    assert (by_type["rect"]["width"], by_type["rect"]["height"]) == (120, 90)
+    assert len(by_type["polygon"]["points"]) == 3
+
+
+def test_ellipse_fit_reports_the_major_axis_first():
+    t = np.linspace(0, 2 * np.pi, 90, endpoint=False)
+    cases = [(80, 40, 30), (40, 80, 30), (70, 35, -75), (50, 20, 89), (30, 29, 0)]
+    rings = []
+    for width, height, angle in cases:
+        ellipse = np.stack([width * np.cos(t), height * np.sin(t)], axis=1)
+        rotation = np.radians(angle)
+        cos, sin = np.cos(rotation), np.sin(rotation)
+        rings.append(ellipse @ np.array([[cos, sin], [-sin, cos]]) + [200, 100])
+    offsets = np.arange(len(rings) + 1) * len(t)
+    _, semi_axes, angles, error = primitives.fit_ellipses(np.concatenate(rings), offsets)
+
+    assert np.all(error < 1e-6)
+    for (width, height, angle), axes, fitted_angle in zip(cases, semi_axes, angles):
+        major, minor, major_angle = (width, height, angle) if width >= height else (height, width, angle + 90)
+        assert axes == pytest.approx((major, minor))
+        assert (fitted_angle - major_angle + 90) % 180 - 90 == pytest.approx(0, abs=1e-6)
+        assert -90 <= fitted_angle < 90
+
+
+def test_square_corners_do_not_pass_for_a_circle():
+    square = PathSet.from_polylines([[(0, 0), (40, 0), (40, 40), (0, 40)], [(0, 0), (30, 10), (60, 0)]])
+    square.flags[1] = 0 # Aberto: quase uma reta, mas fora da tolerância
+    samples = primitives._ring_samples(square.subset([0]))
+    assert primitives.fit_circles(samples, np.array([0, 8]))[2][0] > 4
+    shapes, remaining = primitives.recognize_primitives(square)
+    assert [shape["type"] for shape in shapes] == ["rect"] and len(remaining) == 1
+
+    compound = PathSet.from_polylines([[(0, 0), (40, 0), (40, 40), (0, 40)], [(10, 10), (20, 10), (20, 20)]])
+    compound.flags[1] |= PATH_HOLE
+    assert primitives.recognize_primitives(compound)[0] == [] # Caminhos compostos ficam como estão
+
+
+def test_export_writes_native_elements_with_exact_size(tmp_path):
+    contours, _ = contour_detection.detect_contours(_drawing(), 1)
+    shapes, remaining = primitives.recognize_primitives(PathSet.from_contours(contours))
+    output = tmp_path / "shapes.svg"
+    assert exporter.export_to_svg(remaining, str(output), 400, 300, primitives=shapes)
+
+    svg = output.read_text()
+    assert svg.count("<path") == 1 and '<circle cx="80" cy="80" r="' in svg
+    assert '<rect height="90" width="120" x="40" y="170" fill="none"' in svg
+    assert 'transform="rotate(' in svg and "<polygon points=" in svg
+    size = exporter.svg_fixed_bytes(remaining, 400, 300, primitives=shapes) + exporter.svg_vertex_bytes(remaining).sum()
+    assert output.stat().st_size == size
+
+    circles = [shape for shape in shapes if shape["type"] == "circle"]
+    assert exporter.export_to_svg(None, str(output), 400, 300, primitives=circles)
+    assert output.read_text().count("<circle") == 1 and "<path" not in output.read_text()
@@ -0,0 +1,120 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from core import shape_dedup
+from core.path_set import PathSet, PATH_HOLE
+from utils import batch_processing, exporter
+
+
+def _rotate(points: np.ndarray, angle: float) -> np.ndarray:
+    cos, sin = np.cos(angle), np.sin(angle)
+    return points @ np.array([[cos, sin], [-sin, cos]])
+
+
+def _halftone() -> np.ndarray:
+    image = np.full((200, 300, 3), 255, np.uint8)
+    for column in range(9):
+        for row in range(5):
+            cv2.rectangle(image, (10 + 32 * column, 10 + 30 * row), (22 + 32 * column, 24 + 30 * row), (0, 0, 0), -1)
+    cv2.putText(image, "o o", (40, 190), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 0), 2)
+    return image
+
+
+def test_translated_copies_share_one_representative():
+    square = [(0, 0), (6, 0), (6, 6), (0, 6)]
+    hole = [(2, 2), (2, 4), (4, 4)]
+    paths = [[(x + dx, y) for x, y in ring] for dx in (0, 20, 40) for ring in (square, hole)]
+    path_set = PathSet.from_polylines(paths + [[(0, 30), (5, 30), (0, 35)]])
+    path_set.flags[1:6:2] |= PATH_HOLE
+    classes, remaining = shape_dedup.deduplicate_paths(path_set)
+
+    assert len(classes) == 1 and classes.instance_count == 3 and len(remaining) == 1
+    assert classes.representatives.flags.tolist() == path_set.flags[:2].tolist() # Externo + furo
+    assert classes.transforms.tolist() == [[0, 0, 0, 1], [20, 0, 0, 1], [40, 0, 0, 1]]
+    assert shape_dedup.deduplicate_paths(path_set.subset([0, 6]))[0].instance_count == 0
+
+
+def test_similarity_recovers_rotation_and_scale():
+    base = np.array([(0, 0), (10, 0), (10, 4), (3, 4), (3, 12), (0, 12)], float)
+    copies = [base + [100, 50], _rotate(base, np.pi / 2) + [40, 40], 2 * _rotate(base, np.pi / 3) + [200, 100]]
+    path_set = PathSet.from_polylines([copy.tolist() for copy in copies], dtype=np.float64)
+
+    assert len(shape_dedup.deduplicate_paths(path_set)[0]) == 0
+    classes, remaining = shape_dedup.deduplicate_paths(path_set, rotation=True, scale=True)
+    assert classes.instance_count == 3 and len(remaining) == 0
+    # O representante é a maior ocorrência: o erro da simplificação não cresce nas outras
+    assert classes.transforms[:, 3].tolist() == pytest.approx([0.5, 0.5, 1.0])
+    representative = classes.representatives[0]
+    for (x, y, angle, factor), copy in zip(classes.transforms, copies):
+        placed = factor * _rotate(representative, np.radians(angle)) + [x, y]
+        assert np.abs(placed - copy).max() < 1e-9
+
+
+def test_similar_but_different_shapes_are_not_merged():
+    def rectangle(width, height, x, y):
+        return [(x, y), (x + width, y), (x + width, y + height), (x, y + height)]
+
+    for width, height in ((1000, 500), (100, 50)):
+        # Proporções próximas caem na mesma chave da grade relativa ao tamanho
+        stretched = PathSet.from_polylines([rectangle(width, height, 0, 0),
+                                            rectangle(width * 1.06, height, 0, 2 * height)], dtype=np.float64)
+        classes, remaining = shape_dedup.deduplicate_paths(stretched, rotation=True, scale=True)
+        assert len(classes) == 0 and len(remaining) == 2
+
+    # Uma cópia exata em outra escala continua na classe; a esticada fica de fora
+    path_set = PathSet.from_polylines([rectangle(1000, 500, 0, 0), rectangle(1060, 500, 0, 600),
+                                       rectangle(500, 250, 0, 1200)], dtype=np.float64)
+    classes, remaining = shape_dedup.deduplicate_paths(path_set, rotation=True, scale=True)
+    assert classes.instance_count == 2 and remaining.to_polylines() == path_set.subset([1]).to_polylines()
+    assert classes.transforms[:, 3].tolist() == pytest.approx([1.0, 0.5])
+
+
+def test_export_writes_symbols_and_uses(tmp_path):
+    (tmp_path / "in").mkdir()
+    cv2.imwrite(str(tmp_path / "in" / "dots.png"), _halftone())
+    output = tmp_path / "out" / "dots.svg"
+
+    batch_processing.run_batch([str(tmp_path / "in")], str(tmp_path / "out"), {"epsilon": 1.0}, workers=1)
+    plain_size = os.path.getsize(output)
+    summary = batch_processing.run_batch([str(tmp_path / "in")], str(tmp_path / "out"),
+                                         {"epsilon": 1.0, "dedup": "translation"}, workers=1)
+    assert (summary["processed"], summary["failed"]) == (1, 0)
+
+    svg = output.read_text()
+    assert svg.count("<symbol") == 3 and svg.count("<use") == 45 + 2 + 2 # Quadrados e o "o" (externo e furo)
+    assert '<use x="10" y="10" xlink:href="#s' in svg
+    assert os.path.getsize(output) < 0.6 * plain_size
+
+    rotated = exporter._use_placements(np.array([[1.5, 2, 90, 2], [3, 4, 0, 1]]))
+    assert list(rotated) == ['transform="translate(1.5 2) rotate(90) scale(2)"', 'x="3" y="4"']
+
+
+def _dark_rows(svg: str, column: int) -> int:
+    """Linhas escuras de uma coluna do SVG rasterizado pelo QtSvg."""
+    QtSvg = pytest.importorskip("PyQt5.QtSvg")
+    from PyQt5.QtGui import QImage, QPainter
+    # O QtSvg (perfil Tiny) não conhece <symbol>; sem viewBox e com overflow visível,
+    # um <g> em <defs> é usado pelo <use> exatamente da mesma forma
+    svg = svg.replace('<symbol id="s0" overflow="visible">', '<g id="s0">').replace("</symbol>", "</g>")
+    image = QImage(120, 60, QImage.Format_Grayscale8)
+    image.fill(255)
+    painter = QPainter(image)
+    QtSvg.QSvgRenderer(svg.encode("utf-8")).render(painter)
+    painter.end()
+    pixels = np.frombuffer(image.constBits().asstring(image.byteCount()), np.uint8)
+    return int(np.count_nonzero(pixels.reshape(60, image.bytesPerLine())[:, column] < 128))
+
+
+def test_scaled_uses_keep_the_stroke_width(tmp_path):
+    square = PathSet.from_polylines([[(0, 0), (10, 0), (10, 10), (0, 10)]])
+    output = tmp_path / "scaled.svg"
+    symbols = [{"paths": square, "transforms": np.array([[5.0, 5, 0, 1], [40, 5, 0, 4]])}]
+    assert exporter.export_to_svg(None, str(output), 120, 60, stroke_width="2", symbols=symbols)
+
+    svg = output.read_text()
+    assert 'vector-effect="non-scaling-stroke"' in svg and 'scale(4)' in svg
+    # Coluna que só cruza as arestas horizontais: traço de 2 px nas duas ocorrências
+    assert _dark_rows(svg, 10) == _dark_rows(svg, 60) == 4
@@ -0,0 +1,78 @@
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from core import color_layers, shared_arcs
+from core.path_set import PathSet, PATH_CLOSED
+from utils import batch_processing
+
+
+def _signed_area(points: np.ndarray) -> float:
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _blobs() -> np.ndarray:
+    rng = np.random.default_rng(1)
+    image = np.zeros((90, 120, 3), np.uint8)
+    for color in [(255, 0, 0), (0, 255, 0), (0, 0, 255)]:
+        for _ in range(6):
+            center = (int(rng.integers(0, 120)), int(rng.integers(0, 90)))
+            cv2.circle(image, center, int(rng.integers(8, 30)), color, -1)
+    return image
+
+
+def _edges(path_set: PathSet) -> list[tuple]:
+    edges = []
+    for points in path_set:
+        for start, end in zip(points, np.roll(points, -1, axis=0)):
+            edges.append(tuple(sorted((tuple(start.tolist()), tuple(end.tolist())))))
+    return edges
+
+
+def test_squares_sharing_an_edge_split_into_arcs():
+    left = [(0, 0), (10, 0), (10, 10), (0, 10)]
+    right = [(10, 0), (20, 0), (20, 10), (10, 10)]
+    path_set = PathSet.from_polylines([left, right])
+    path_set.flags[:] = PATH_CLOSED
+    shared = shared_arcs.build_shared_arcs(path_set)
+
+    assert (len(shared.arcs), shared.shared_count) == (3, 1)
+    assembled = shared.assemble(shared.arcs)
+    for original, rebuilt in zip(path_set, assembled):
+        assert sorted(map(tuple, original.tolist())) == sorted(map(tuple, rebuilt.tolist()))
+        assert abs(_signed_area(rebuilt)) == abs(_signed_area(original))
+
+
+def test_label_boundaries_partition_the_image():
+    layers = color_layers.trace_color_layers(_blobs(), 4, blur_ksize=1, shared_boundaries=True)
+    # Com evenodd, cada camada é um único composto; os anéis alternam de orientação
+    total = sum(abs(sum(_signed_area(points) for points in layer["paths"])) for layer in layers)
+    assert total == 90 * 120
+
+
+def test_shared_boundaries_stay_identical_after_simplification():
+    layers = color_layers.trace_color_layers(_blobs(), 4, blur_ksize=1, shared_boundaries=True)
+    results = shared_arcs.simplify_shared_arcs([layer["paths"] for layer in layers], 2.0)
+    assert sum(result.total_points for result in results) < sum(layer["paths"].total_points for layer in layers)
+
+    # Toda aresta interna aparece exatamente duas vezes (uma por região vizinha): sem frestas
+    counts = Counter(edge for result in results for edge in _edges(result))
+    for (start, end), count in counts.items():
+        on_border = any(start[axis] == end[axis] and start[axis] in (-0.5, size - 0.5)
+                        for axis, size in ((0, 120), (1, 90)))
+        assert count == (1 if on_border else 2)
+
+    curves = shared_arcs.simplify_shared_arcs([layer["paths"] for layer in layers], 2.0, bezier_tolerance=1.0)
+    assert [len(paths) for paths in curves] == [len(layer["paths"].compound_offsets()) - 1 for layer in layers]
+
+
+def test_run_batch_with_topology(tmp_path):
+    (tmp_path / "in").mkdir()
+    cv2.imwrite(str(tmp_path / "in" / "blobs.png"), _blobs())
+    summary = batch_processing.run_batch([str(tmp_path / "in")], str(tmp_path / "out"),
+                                         {"colors": 4, "topology": True, "epsilon": 1.0, "bezier_tolerance": 1.0},
+                                         workers=1)
+    assert (summary["processed"], summary["failed"]) == (1, 0)
+    assert (tmp_path / "out" / "blobs.svg").read_text().count("<path") == 4
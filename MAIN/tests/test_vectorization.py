@@ -0,0 +1,35 @@
+import numpy as np
+
+from core import vectorization
+from core.path_set import PathSet, PATH_CLOSED, PATH_HOLE
+
+
+def _contours() -> list[np.ndarray]:
+    return [np.array([[[10, 10]], [[20, 10]], [[20, 20]], [[10, 20]]], dtype=np.int32),
+            np.array([[[12, 12]], [[12, 18]], [[18, 18]]], dtype=np.int32),
+            np.array([[[30, 30]], [[40, 30]], [[35, 40]]], dtype=np.int32)]
+
+
+def test_vectorize_to_tuples_and_path_set():
+    contours = _contours()
+    paths = vectorization.vectorize_from_contours(contours)
+    assert paths[0] == [(10, 10), (20, 10), (20, 20), (10, 20)]
+
+    path_set = vectorization.vectorize_from_contours(contours, as_path_set=True)
+    assert isinstance(path_set, PathSet)
+    assert path_set.to_polylines() == paths
+    assert (path_set.flags == PATH_CLOSED).all()
+
+
+def test_hole_mask_marks_holes():
+    path_set = vectorization.vectorize_from_contours(_contours(), as_path_set=True,
+                                                     hole_mask=np.array([False, True, False]))
+    assert path_set.flags.tolist() == [PATH_CLOSED, PATH_CLOSED | PATH_HOLE, PATH_CLOSED]
+    assert path_set.compound_parents().tolist() == [0, 0, 2]
+
+
+def test_empty_and_path_set_inputs():
+    assert vectorization.vectorize_from_contours(None) is None
+    assert vectorization.vectorize_from_contours([]) is None
+    path_set = PathSet.from_contours(_contours())
+    assert vectorization.vectorize_from_contours(path_set, as_path_set=True) is path_set
@@ -0,0 +1,450 @@
+# utils/batch_processing.py
+#
+# Processamento em lote, sem interface gráfica (nada aqui importa Qt):
+#   carregar -> detect_contours -> vectorize_from_contours -> RDP ou VW (opcional,
+#   por limiar ou orçamento global de nós/bytes)
+#   -> fit_curves_to_paths -> export_to_svg
+# (no modo paleta, a detecção é trace_color_layers e cada camada de cor passa
+# por RDP e ajuste de curvas e é exportada como um <g> preenchido)
+# para cada imagem, em um pool de processos com timeout por arquivo.
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+MANIFEST_FILENAME = ".falcon_batch.json"
+
+# Parâmetros que afetam o SVG gerado (e, portanto, o hash de "atualizado")
+DEFAULT_PIPELINE_PARAMETERS = {
+    "blur_ksize": 5,
+    "tile_size": None,
+    "colors": None, # None = contornos de um único limiar; K = modo paleta com K cores
+    "compound": False, # Caminhos compostos: contorno externo + furos (RETR_CCOMP, evenodd)
+    "subpixel": False, # Contornos sub-pixel (marching squares) em vez do findContours
+    "simplification": "rdp", # "rdp" (Douglas–Peucker) ou "vw" (Visvalingam–Whyatt)
+    "epsilon": None, # None = sem simplificação; distância (px) no RDP, área mínima (px²) no VW
+    "max_nodes": None, # Orçamento global: total máximo de nós (None = sem limite)
+    "max_svg_bytes": None, # Orçamento global: tamanho máximo do SVG (não compacto, sem Bézier)
+    "primitives": None, # Tolerância (px) do reconhecimento de círculos, elipses, retângulos... (None = desligado)
+    "dedup": None, # Formas repetidas como <symbol>/<use>: "translation" ou "similarity" (+ rotação e escala)
+    "topology": False, # Simplifica uma vez cada arco compartilhado entre caminhos vizinhos (core/shared_arcs.py)
+    "bezier_tolerance": None, # None = sem ajuste de Bézier (só 'M'/'L')
+    "stroke_color": "black",
+    "stroke_width": "1",
+    "fill_color": "none",
+    "compact": False, # 'd' relativo com 'h'/'v' e separadores mínimos
+    "precision": 2, # Casas decimais no modo compacto
+    "svgz": False, # Grava .svgz (gzip) em vez de .svg
+}
+
+def parameters_hash(parameters: dict) -> str:
+    """Hash estável dos parâmetros do pipeline, usado para decidir se um SVG está atualizado."""
+    canonical = json.dumps(parameters, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def collect_input_files(inputs: list[str], recursive: bool = False) -> list[tuple[str, str]]:
+    """
+    Expande diretórios, padrões glob e arquivos em uma lista de imagens.
+
+    Returns:
+        list[tuple[str, str]]: Pares (caminho da imagem, caminho relativo usado para o SVG de saída).
+    """
+    collected = []
+    seen = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            pattern = os.path.join(entry, "**", "*") if recursive else os.path.join(entry, "*")
+            root = entry
+            candidates = glob.glob(pattern, recursive=recursive)
+        else:
+            candidates = glob.glob(entry, recursive=recursive) if glob.has_magic(entry) else [entry]
+            root = None
+        for path in sorted(candidates):
+            if not os.path.isfile(path) or not path.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            absolute = os.path.abspath(path)
+            if absolute in seen:
+                continue
+            seen.add(absolute)
+            relative = os.path.relpath(path, root) if root else os.path.basename(path)
+            collected.append((path, os.path.splitext(relative)[0] + ".svg"))
+    return collected
+
+def process_image_file(input_path: str, output_path: str, parameters: dict, cache=None) -> dict:
+    """
+    Executa o pipeline completo para uma imagem e grava o SVG.
+
+    Com um PipelineCache, a detecção e a simplificação são reaproveitadas
+    quando a imagem (pelo conteúdo) e os parâmetros dessas etapas não mudaram.
+
+    Returns:
+        dict: Estatísticas do arquivo (contornos, nós, bytes do SVG, tempo).
+
+    Raises:
+        RuntimeError: Se alguma etapa falhar.
+    """
+    # Importados aqui para que o processo principal da CLI não pague o custo do OpenCV
+    from utils import image_loader, exporter, pipeline_cache
+    from core import node_optimization, curve_fitter, shared_arcs, primitives, shape_dedup
+
+    started = time.perf_counter()
+    image_hash = None
+    if cache is not None:
+        loaded = cache.load_image(input_path)
+        image, image_hash = loaded if loaded is not None else (None, None)
+    else:
+        image = image_loader.load_image(input_path)
+    if image is None:
+        raise RuntimeError(f"não foi possível carregar a imagem '{input_path}'")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    image_height, image_width = image.shape[:2]
+
+    simplify = node_optimization.SIMPLIFICATION_METHODS[parameters["simplification"]]
+    budgeted = parameters["max_nodes"] is not None or parameters["max_svg_bytes"] is not None
+    # O orçamento global escolhe nós por caminho, o que quebraria arcos compartilhados: ele tem prioridade
+    topology = parameters["topology"] and parameters["epsilon"] is not None and not budgeted
+    if parameters["topology"] and budgeted:
+        print("Aviso: --topology é ignorado com orçamento global (--max-nodes/--max-svg-bytes).")
+    if parameters["colors"]:
+        layers, _ = pipeline_cache.trace_color_layers(cache, image, image_hash, parameters["colors"],
+                                                      blur_ksize=parameters["blur_ksize"],
+                                                      shared_boundaries=parameters["topology"])
+        if not layers:
+            raise RuntimeError("nenhum contorno detectado")
+        contour_count = sum(len(layer["paths"]) for layer in layers)
+        if parameters["primitives"] is not None:
+            print("Aviso: primitivas não se aplicam ao modo paleta (cada camada é um único caminho composto).")
+        if parameters["dedup"] is not None:
+            print("Aviso: a deduplicação de formas não se aplica ao modo paleta.")
+        if budgeted:
+            _apply_budget_to_layers(layers, parameters)
+        if topology:
+            # Camadas vizinhas compartilham as bordas: cada arco é simplificado (e ajustado) uma única vez
+            results = shared_arcs.simplify_shared_arcs(
+                [layer["paths"] for layer in layers], parameters["epsilon"], method=parameters["simplification"],
+                bezier_tolerance=parameters["bezier_tolerance"])
+            for layer, paths in zip(layers, results):
+                layer["paths"] = paths
+        else:
+            for layer in layers:
+                paths = layer["paths"]
+                if parameters["epsilon"] is not None and not budgeted:
+                    paths = simplify(paths, parameters["epsilon"])
+                layer["paths"] = curve_fitter.fit_curves_to_paths(paths, tolerance=parameters["bezier_tolerance"])
+        if not exporter.export_color_layers_to_svg(layers, output_path, image_width=image_width, image_height=image_height,
+                                                   compact=parameters["compact"], precision=parameters["precision"]):
+            raise RuntimeError(f"falha ao exportar '{output_path}'")
+        return {
+            "contours": contour_count,
+            "nodes": sum(_node_count(layer["paths"]) for layer in layers),
+            "svg_bytes": os.path.getsize(output_path),
+            "seconds": time.perf_counter() - started,
+        }
+
+    paths, _, detection_key = pipeline_cache.detect_and_vectorize(
+        cache, image, image_hash, blur_ksize=parameters["blur_ksize"], tile_size=parameters["tile_size"],
+        compound=parameters["compound"], subpixel=parameters["subpixel"])
+    if paths is None:
+        raise RuntimeError("nenhum contorno detectado")
+    contour_count = len(paths)
+    shapes = []
+    if parameters["primitives"] is not None:
+        # Círculos, retângulos etc. saem como elementos nativos; só o resto segue para simplificação e Bézier
+        shapes, paths = primitives.recognize_primitives(paths, parameters["primitives"])
+    shape_classes = None
+    if parameters["dedup"] is not None and budgeted:
+        print("Aviso: a deduplicação de formas é ignorada com orçamento global (--max-nodes/--max-svg-bytes).")
+    elif parameters["dedup"] is not None:
+        # Só um representante por classe passa pela simplificação e pelo Bézier
+        similarity = parameters["dedup"] == "similarity"
+        shape_classes, paths = shape_dedup.deduplicate_paths(paths, rotation=similarity, scale=similarity)
+
+    if topology:
+        # Sem Bézier, o PathSet remontado já é a sequência 'M' + 'L' de cada caminho
+        final_paths = shared_arcs.simplify_shared_arcs([paths], parameters["epsilon"],
+                                                       method=parameters["simplification"],
+                                                       bezier_tolerance=parameters["bezier_tolerance"])[0]
+    elif parameters["epsilon"] is not None or budgeted:
+        byte_budget = None # O estilo muda o tamanho das tags <path>, e portanto quantos nós cabem
+        if parameters["max_svg_bytes"] is not None:
+            byte_budget = [parameters[name] for name in ("max_svg_bytes", "stroke_color", "stroke_width", "fill_color")]
+        simplified_key = pipeline_cache.simplification_key(
+            detection_key, parameters["epsilon"], method=parameters["simplification"],
+            max_nodes=parameters["max_nodes"], max_svg_bytes=byte_budget, primitives=parameters["primitives"],
+            dedup=None if budgeted else parameters["dedup"])
+        cached = cache.get_path_set(simplified_key) if cache is not None else None
+        if cached is not None:
+            paths = cached[0]
+        else:
+            if budgeted:
+                paths = _apply_budget(paths, parameters, image_width, image_height, shapes)
+            else:
+                paths = simplify(paths, parameters["epsilon"])
+            if cache is not None:
+                cache.put_path_set(simplified_key, paths)
+    if not topology:
+        final_paths = curve_fitter.fit_curves_to_paths(paths, tolerance=parameters["bezier_tolerance"])
+    symbols = []
+    if shape_classes is not None and len(shape_classes):
+        representatives = shape_classes.representatives
+        if parameters["epsilon"] is not None:
+            representatives = simplify(representatives, parameters["epsilon"])
+        symbols = shape_classes.symbols(curve_fitter.fit_curves_to_paths(
+            representatives, tolerance=parameters["bezier_tolerance"]))
+
+    if not exporter.export_to_svg(final_paths, output_path, image_width=image_width, image_height=image_height,
+                                  stroke_color=parameters["stroke_color"],
+                                  stroke_width=parameters["stroke_width"],
+                                  fill_color=parameters["fill_color"],
+                                  compact=parameters["compact"], precision=parameters["precision"],
+                                  primitives=shapes, symbols=symbols):
+        raise RuntimeError(f"falha ao exportar '{output_path}'")
+
+    return {
+        "contours": contour_count,
+        "nodes": _node_count(final_paths) + sum(_node_count(symbol["paths"]) for symbol in symbols),
+        "svg_bytes": os.path.getsize(output_path),
+        "seconds": time.perf_counter() - started,
+    }
+
+def _apply_budget(paths, parameters: dict, image_width: int, image_height: int, shapes: list[dict] | None = None):
+    """Simplificação por orçamento global (max_nodes / max_svg_bytes); epsilon, se houver, é o limiar mínimo."""
+    from utils import exporter
+    from core import node_optimization
+    max_bytes = vertex_bytes = None
+    if parameters["max_svg_bytes"] is not None:
+        fixed_bytes = exporter.svg_fixed_bytes(paths, image_width, image_height, parameters["stroke_color"],
+                                               parameters["stroke_width"], parameters["fill_color"],
+                                               primitives=shapes, precision=parameters["precision"])
+        max_bytes = parameters["max_svg_bytes"] - fixed_bytes
+        vertex_bytes = exporter.svg_vertex_bytes(paths)
+    return node_optimization.apply_node_budget(paths, max_nodes=parameters["max_nodes"], max_bytes=max_bytes,
+                                               vertex_bytes=vertex_bytes, method=parameters["simplification"],
+                                               min_priority=parameters["epsilon"])
+
+def _apply_budget_to_layers(layers: list[dict], parameters: dict):
+    """Orçamento de nós dividido entre todas as camadas do modo paleta (uma única fila global)."""
+    from core import node_optimization
+    from core.path_set import PathSet
+    if parameters["max_svg_bytes"] is not None:
+        print("Aviso: max_svg_bytes não se aplica ao modo paleta; usando só max_nodes.")
+        if parameters["max_nodes"] is None:
+            return
+    combined = PathSet.concatenate([layer["paths"] for layer in layers])
+    simplified = node_optimization.apply_node_budget(combined, max_nodes=parameters["max_nodes"],
+                                                     method=parameters["simplification"],
+                                                     min_priority=parameters["epsilon"])
+    start = 0
+    for layer in layers:
+        count = len(layer["paths"])
+        layer["paths"] = simplified.subset(list(range(start, start + count)))
+        start += count
+
+def _node_count(final_paths) -> int:
+    from core.path_set import PathSet
+    if final_paths is None:
+        return 0
+    return int(final_paths.total_points) if isinstance(final_paths, PathSet) else sum(map(len, final_paths))
+
+# --- Manifesto (pular arquivos atualizados) ---
+
+def _load_manifest(output_dir: str) -> dict:
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Aviso: manifesto '{manifest_path}' ignorado ({e}).")
+        return {}
+
+def _save_manifest(output_dir: str, manifest: dict):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    temporary_path = manifest_path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temporary_path, manifest_path)
+
+def is_up_to_date(manifest: dict, relative_output: str, input_path: str,
+                  output_path: str, params_digest: str) -> bool:
+    """O SVG está atualizado se existe, é mais novo que a imagem e foi gerado com os mesmos parâmetros."""
+    entry = manifest.get(relative_output)
+    if not entry or not os.path.exists(output_path):
+        return False
+    input_mtime = os.path.getmtime(input_path)
+    return (entry.get("params_hash") == params_digest and
+            entry.get("input_mtime") == input_mtime and
+            os.path.getmtime(output_path) >= input_mtime)
+
+# --- Pool de processos com timeout por arquivo ---
+#
+# Cada worker tem o seu próprio Pipe: o processo principal sabe exatamente qual
+# arquivo cada worker está processando e desde quando. Se um arquivo passa do
+# timeout, só aquele worker é encerrado (sem corromper filas compartilhadas) e
+# outro é criado no lugar.
+
+def _worker_main(connection, verbose: bool, cache_dir: str | None = None):
+    # Aquece o worker: o import do OpenCV/NumPy não deve contar no timeout do primeiro arquivo
+    from core import contour_detection, vectorization, node_optimization, curve_fitter # noqa: F401
+    from utils import image_loader, exporter # noqa: F401
+    from utils.pipeline_cache import PipelineCache
+    # Só o disco é compartilhado entre os workers; a memória guarda pouco (cada imagem passa uma vez)
+    cache = PipelineCache(cache_dir, max_memory_bytes=64 * 1024 * 1024) if cache_dir else None
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        input_path, output_path, parameters = task
+        connection.send(("started", None)) # O timeout conta a partir daqui
+        try:
+            if verbose:
+                stats = process_image_file(input_path, output_path, parameters, cache)
+            else:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = process_image_file(input_path, output_path, parameters, cache)
+            connection.send(("ok", stats))
+        except Exception as e:
+            connection.send(("error", f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    def __init__(self, context, verbose: bool, cache_dir: str | None = None):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, verbose, cache_dir), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.task = None
+        self.started_at: float | None = None
+
+    def submit(self, task):
+        self.task = task
+        self.started_at = None
+        self.connection.send(task[1:])
+
+    def stop(self, force: bool = False):
+        if force:
+            self.process.terminate()
+        else:
+            with contextlib.suppress(OSError):
+                self.connection.send(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+def run_batch(inputs: list[str], output_dir: str, parameters: dict | None = None,
+              workers: int | None = None, timeout: float | None = None,
+              recursive: bool = False, force: bool = False, verbose: bool = False,
+              cache_dir: str | None = None) -> dict:
+    """
+    Processa um lote de imagens em paralelo.
+
+    Args:
+        inputs (list[str]): Diretórios, padrões glob ou arquivos de imagem.
+        output_dir (str): Diretório onde os SVGs (e o manifesto) são gravados.
+        parameters (dict | None): Parâmetros do pipeline (ver DEFAULT_PIPELINE_PARAMETERS).
+        workers (int | None): Tamanho do pool de processos (padrão: número de CPUs).
+        timeout (float | None): Tempo máximo, em segundos, por arquivo.
+        recursive (bool): Percorre subdiretórios.
+        force (bool): Reprocessa mesmo os arquivos já atualizados.
+        verbose (bool): Mostra a saída das etapas do pipeline.
+        cache_dir (str | None): Diretório do cache de etapas (ver utils/pipeline_cache.py),
+            compartilhado pelos processos. Com --force, a detecção ainda vem do cache.
+
+    Returns:
+        dict: Resumo com contagens, tempo total e imagens por segundo.
+    """
+    parameters = {**DEFAULT_PIPELINE_PARAMETERS, **(parameters or {})}
+    params_digest = parameters_hash(parameters)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    manifest = _load_manifest(output_dir)
+    tasks = []
+    skipped = 0
+    for input_path, relative_output in collect_input_files(inputs, recursive):
+        if parameters["svgz"]:
+            relative_output += "z"
+        output_path = os.path.join(output_dir, relative_output)
+        if not force and is_up_to_date(manifest, relative_output, input_path, output_path, params_digest):
+            skipped += 1
+            continue
+        tasks.append((relative_output, input_path, output_path, parameters))
+
+    summary = {"total": len(tasks) + skipped, "processed": 0, "skipped": skipped, "failed": 0,
+               "timed_out": 0, "nodes": 0, "svg_bytes": 0, "failures": []}
+    print(f"Lote: {summary['total']} imagens ({skipped} já atualizadas), {min(workers, max(1, len(tasks)))} processos.")
+
+    started = time.perf_counter()
+    if tasks:
+        context = multiprocessing.get_context()
+        pending = list(reversed(tasks))
+        pool = [_Worker(context, verbose, cache_dir) for _ in range(min(workers, len(tasks)))]
+        try:
+            while pending or any(w.task is not None for w in pool):
+                for worker in pool:
+                    if worker.task is None and pending:
+                        worker.submit(pending.pop())
+
+                busy = [w for w in pool if w.task is not None]
+                ready = wait([w.connection for w in busy], timeout=0.2)
+                for index, worker in enumerate(pool):
+                    if worker.task is None:
+                        continue
+                    relative_output, input_path = worker.task[0], worker.task[1]
+                    if worker.connection in ready:
+                        try:
+                            status, payload = worker.connection.recv()
+                        except EOFError:
+                            status, payload = "error", "o processo de trabalho terminou inesperadamente"
+                            worker.stop(force=True)
+                            pool[index] = worker = _Worker(context, verbose, cache_dir)
+                        if status == "started":
+                            worker.started_at = time.monotonic()
+                            continue
+                        if status == "ok":
+                            summary["processed"] += 1
+                            summary["nodes"] += payload["nodes"]
+                            summary["svg_bytes"] += payload["svg_bytes"]
+                            manifest[relative_output] = {"params_hash": params_digest,
+                                                         "input_mtime": os.path.getmtime(input_path)}
+                            print(f"  OK   {input_path} -> {relative_output} "
+                                  f"({payload['nodes']} nós, {payload['seconds']:.2f} s)")
+                        else:
+                            summary["failed"] += 1
+                            summary["failures"].append((input_path, payload))
+                            print(f"  ERRO {input_path}: {payload}")
+                        worker.task = None
+                    elif (timeout is not None and worker.started_at is not None and
+                          time.monotonic() - worker.started_at > timeout):
+                        summary["timed_out"] += 1
+                        summary["failures"].append((input_path, f"timeout de {timeout} s"))
+                        print(f"  TIMEOUT {input_path} (> {timeout} s)")
+                        worker.stop(force=True)
+                        pool[index] = _Worker(context, verbose, cache_dir)
+        finally:
+            for worker in pool:
+                worker.stop(force=worker.task is not None)
+            _save_manifest(output_dir, manifest)
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = elapsed
+    summary["images_per_second"] = summary["processed"] / elapsed if elapsed > 0 else 0.0
+    print(f"Resumo: {summary['processed']} processadas, {summary['skipped']} puladas, "
+          f"{summary['failed']} com erro, {summary['timed_out']} com timeout em {elapsed:.2f} s "
+          f"({summary['images_per_second']:.2f} imagens/s, {summary['nodes']} nós, "
+          f"{summary['svg_bytes'] / 1024:.1f} KiB de SVG).")
+    return summary
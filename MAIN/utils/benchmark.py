@@ -0,0 +1,382 @@
+# utils/benchmark.py
+#
+# Suíte de benchmark de ponta a ponta (sem Qt). Gera um corpus sintético
+# determinístico (texto, line art, scans ruidosos, retículas com muitos
+# contornos e telas muito grandes), mede cada etapa do pipeline separadamente
+# (tempo, pico de memória), conta nós e bytes do SVG, grava um relatório JSON
+# e compara com uma linha de base guardada:
+#
+#   python main.py bench                          # compara com benchmarks/baseline.json
+#   python main.py bench --images text halftone --scale 0.5 -o relatorio.json
+#   python main.py bench --update-baseline        # grava a nova linha de base
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+try:
+    from core import contour_detection, curve_fitter, node_optimization, vectorization
+    from utils import exporter
+except ModuleNotFoundError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core import contour_detection, curve_fitter, node_optimization, vectorization
+    from utils import exporter
+
+REPORT_VERSION = 2 # 2: tempo de cada etapa é a mediana das repetições
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     "benchmarks", "baseline.json")
+
+STAGES = ("detect_contours", "vectorize_from_contours", "apply_custom_rdp_simplification",
+          "fit_curves_to_paths", "export_to_svg")
+
+DEFAULT_PARAMETERS = {
+    "blur_ksize": 5,
+    "epsilon": 1.0,
+    "bezier_tolerance": 1.0,
+    "compact": False,
+}
+
+# Aumento relativo tolerado antes de acusar regressão, por métrica
+DEFAULT_TOLERANCES = {
+    "seconds": 0.50,
+    "peak_bytes": 0.20,
+    "nodes": 0.01,
+    "svg_bytes": 0.01,
+}
+# Diferenças absolutas abaixo destas são ruído de medição, não regressão
+_MIN_SECONDS_DELTA = 0.10
+_MIN_PEAK_BYTES_DELTA = 4 * 1024 * 1024
+
+# --- Corpus sintético ---
+#
+# Cada imagem sai de um gerador com semente fixa: o mesmo nome, escala e
+# semente produzem sempre os mesmos pixels.
+
+_WORDS = ("falcon", "vetor", "contorno", "curva", "bezier", "limiar", "pixel", "caminho", "nó", "escala",
+          "FALCON", "SVG", "RDP", "Otsu", "2048", "x=3.14", "#42")
+_FONTS = (cv2.FONT_HERSHEY_SIMPLEX, cv2.FONT_HERSHEY_DUPLEX, cv2.FONT_HERSHEY_COMPLEX,
+          cv2.FONT_HERSHEY_TRIPLEX, cv2.FONT_HERSHEY_SCRIPT_SIMPLEX)
+
+def _text_image(height: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    image = np.full((height, width, 3), 255, np.uint8)
+    y = 40
+    while y < height - 20:
+        font_scale = float(rng.uniform(0.6, 1.8))
+        font = _FONTS[int(rng.integers(len(_FONTS)))]
+        line = " ".join(_WORDS[int(i)] for i in rng.integers(len(_WORDS), size=12))
+        cv2.putText(image, line, (20, y), font, font_scale, (0, 0, 0), int(rng.integers(1, 4)), cv2.LINE_AA)
+        y += int(40 * font_scale) + 12
+    return image
+
+def _line_art_image(height: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    image = np.full((height, width, 3), 255, np.uint8)
+    for _ in range(max(1, height * width // 10_000)):
+        kind = int(rng.integers(4))
+        thickness = int(rng.integers(1, 5))
+        x, y = int(rng.integers(width)), int(rng.integers(height))
+        if kind == 0:
+            cv2.line(image, (x, y), (int(rng.integers(width)), int(rng.integers(height))), (0, 0, 0), thickness, cv2.LINE_AA)
+        elif kind == 1:
+            steps = np.cumsum(rng.normal(0, 15, (int(rng.integers(5, 40)), 2)), axis=0) + (x, y)
+            cv2.polylines(image, [steps.astype(np.int32)], False, (0, 0, 0), thickness, cv2.LINE_AA)
+        elif kind == 2:
+            axes = (int(rng.integers(5, 120)), int(rng.integers(5, 120)))
+            cv2.ellipse(image, (x, y), axes, float(rng.uniform(0, 180)), 0, 360, (0, 0, 0), thickness, cv2.LINE_AA)
+        else:
+            cv2.rectangle(image, (x, y), (x + int(rng.integers(10, 200)), y + int(rng.integers(10, 200))), (0, 0, 0), thickness)
+    return image
+
+def _noisy_scan_image(height: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    # Papel com iluminação irregular, texto e figuras, ruído de sensor e um leve desfoque
+    gradient = np.linspace(200, 245, width, dtype=np.float32)[None, :] + np.linspace(0, 10, height, dtype=np.float32)[:, None]
+    image = np.repeat(gradient[:, :, None], 3, axis=2).astype(np.uint8)
+    ink = _text_image(height, width, rng) < 128
+    image[ink] = 40
+    for _ in range(max(1, height * width // 100_000)):
+        center = (int(rng.integers(width)), int(rng.integers(height)))
+        color = tuple(int(v) for v in rng.integers(0, 180, 3))
+        cv2.circle(image, center, int(rng.integers(5, 80)), color, int(rng.integers(-1, 4)))
+    noisy = image.astype(np.float32) + rng.normal(0, 12, image.shape).astype(np.float32)
+    return cv2.GaussianBlur(np.clip(noisy, 0, 255).astype(np.uint8), (3, 3), 0)
+
+def _halftone_image(height: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    # Retícula: um ponto por célula, com raio modulado por um padrão suave (milhares de contornos)
+    image = np.full((height, width, 3), 255, np.uint8)
+    pitch = 10
+    phase = rng.uniform(0, 2 * np.pi, 2)
+    for y in range(pitch // 2, height, pitch):
+        for x in range(pitch // 2, width, pitch):
+            tone = 0.5 + 0.25 * np.sin(x / 90.0 + phase[0]) + 0.25 * np.cos(y / 70.0 + phase[1])
+            radius = int(round(tone * pitch * 0.6))
+            if radius > 0:
+                cv2.circle(image, (x, y), radius, (0, 0, 0), -1)
+    return image
+
+def _large_canvas_image(height: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    # Tela enorme e esparsa: o custo é dominado pelo tamanho da imagem, não pelos contornos
+    image = np.full((height, width, 3), 255, np.uint8)
+    for _ in range(150):
+        center = (int(rng.integers(width)), int(rng.integers(height)))
+        if rng.integers(2):
+            cv2.circle(image, center, int(rng.integers(10, 300)), (0, 0, 0), int(rng.integers(-1, 12)))
+        else:
+            cv2.putText(image, _WORDS[int(rng.integers(len(_WORDS)))], center, cv2.FONT_HERSHEY_DUPLEX,
+                        float(rng.uniform(2, 10)), (0, 0, 0), int(rng.integers(2, 12)))
+    return image
+
+# nome -> (gerador, (altura, largura) na escala 1.0)
+CORPUS = {
+    "text": (_text_image, (1200, 1600)),
+    "line_art": (_line_art_image, (1500, 2000)),
+    "noisy_scan": (_noisy_scan_image, (1754, 1240)), # A4 a 150 dpi
+    "halftone": (_halftone_image, (1000, 1000)),
+    "large_canvas": (_large_canvas_image, (6000, 8000)),
+}
+
+def generate_image(name: str, scale: float = 1.0, seed: int = 0) -> np.ndarray:
+    """Gera a imagem BGR do corpus `name` (determinística para o mesmo nome, escala e semente)."""
+    generator, (height, width) = CORPUS[name]
+    rng = np.random.default_rng([seed, sorted(CORPUS).index(name)])
+    return generator(max(16, int(round(height * scale))), max(16, int(round(width * scale))), rng)
+
+# --- Medição ---
+#
+# Pico de memória por etapa: no Linux, o pico de RSS do processo (VmHWM) é
+# zerado antes de cada etapa escrevendo "5" em /proc/self/clear_refs, o que
+# inclui as alocações do OpenCV e não custa nada. Sem esse recurso, uma
+# execução extra sob tracemalloc mede só as alocações do Python e do NumPy.
+# Em ambos os casos, processos auxiliares (pool de core/parallel_paths.py) não entram.
+
+_STATUS_PATH = "/proc/self/status"
+_CLEAR_REFS_PATH = "/proc/self/clear_refs"
+
+def _memory_status() -> tuple[int, int] | None:
+    """(pico de RSS, RSS atual) do processo, em bytes."""
+    try:
+        with open(_STATUS_PATH, "r", encoding="ascii") as f:
+            status = f.read()
+    except OSError:
+        return None
+    peak, current = re.search(r"VmHWM:\s+(\d+)", status), re.search(r"VmRSS:\s+(\d+)", status)
+    return (int(peak.group(1)) * 1024, int(current.group(1)) * 1024) if peak and current else None
+
+def _reset_peak_rss() -> bool:
+    try:
+        with open(_CLEAR_REFS_PATH, "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def memory_method() -> str:
+    """"rss" se o pico de RSS pode ser zerado por etapa, senão "tracemalloc"."""
+    return "rss" if _memory_status() is not None and _reset_peak_rss() else "tracemalloc"
+
+def _run_stages(image: np.ndarray, parameters: dict, svg_path: str, stage_hook) -> dict:
+    """Executa as etapas em sequência; stage_hook(nome) é um context manager em volta de cada uma."""
+    with stage_hook("detect_contours"):
+        contours, _ = contour_detection.detect_contours(image, blur_ksize_val=parameters["blur_ksize"])
+    with stage_hook("vectorize_from_contours"):
+        path_set = vectorization.vectorize_from_contours(contours, as_path_set=True)
+    if path_set is None:
+        return {"contours": 0, "nodes": {"detected": 0, "simplified": 0, "fitted": 0}, "svg_bytes": 0}
+    with stage_hook("apply_custom_rdp_simplification"):
+        simplified = node_optimization.apply_custom_rdp_simplification(path_set, epsilon=parameters["epsilon"])
+    with stage_hook("fit_curves_to_paths"):
+        fitted = curve_fitter.fit_curves_to_paths(simplified, tolerance=parameters["bezier_tolerance"])
+    height, width = image.shape[:2]
+    with stage_hook("export_to_svg"):
+        exporter.export_to_svg(fitted, svg_path, image_width=width, image_height=height, compact=parameters["compact"])
+    return {
+        "contours": len(path_set),
+        "nodes": {"detected": path_set.total_points, "simplified": simplified.total_points,
+                  "fitted": sum(len(path) for path in fitted) if isinstance(fitted, list) else fitted.total_points},
+        "svg_bytes": os.path.getsize(svg_path),
+    }
+
+def benchmark_image(image: np.ndarray, parameters: dict | None = None, repeats: int = 3,
+                    measure_memory: bool = True, verbose: bool = False) -> dict:
+    """
+    Mede as etapas do pipeline para uma imagem.
+
+    O tempo de cada etapa é a mediana de `repeats` execuções. O pico de
+    memória (ver memory_method) é o quanto cada etapa alocou acima do que já
+    estava em uso quando começou.
+
+    Returns:
+        dict: {"width", "height", "contours", "nodes": {"detected", "simplified", "fitted"},
+               "svg_bytes", "stages": {etapa: {"seconds", "peak_bytes"}}, "total_seconds",
+               "memory_method"}.
+    """
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    seconds = {stage: [] for stage in STAGES}
+    peak_bytes = {}
+    method = memory_method() if measure_memory else None
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+    @contextlib.contextmanager
+    def timed(stage):
+        before = _memory_status() if method == "rss" and _reset_peak_rss() else None
+        started = time.perf_counter()
+        yield
+        seconds[stage].append(time.perf_counter() - started)
+        if before is not None:
+            after = _memory_status()
+            if after is not None:
+                peak_bytes[stage] = max(peak_bytes.get(stage, 0), after[0] - before[1])
+
+    @contextlib.contextmanager
+    def traced(stage):
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        yield
+        peak_bytes[stage] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+
+    with tempfile.TemporaryDirectory(prefix="falcon_bench_") as directory, output:
+        svg_path = os.path.join(directory, "benchmark.svg")
+        for _ in range(max(1, repeats)):
+            result = _run_stages(image, parameters, svg_path, timed)
+        if method == "tracemalloc":
+            tracemalloc.start()
+            try:
+                _run_stages(image, parameters, svg_path, traced)
+            finally:
+                tracemalloc.stop()
+
+    height, width = image.shape[:2]
+    stages = {stage: {"seconds": round(float(np.median(seconds[stage])), 6) if seconds[stage] else 0.0,
+                      "peak_bytes": int(peak_bytes.get(stage, 0))} for stage in STAGES}
+    return {"width": width, "height": height, **result, "stages": stages,
+            "total_seconds": round(sum(stage["seconds"] for stage in stages.values()), 6),
+            "memory_method": method}
+
+def _machine() -> dict:
+    return {"platform": platform.platform(), "python": platform.python_version(),
+            "numpy": np.__version__, "opencv": cv2.__version__, "cpus": os.cpu_count()}
+
+def run_suite(names: list[str] | None = None, scale: float = 1.0, repeats: int = 3, seed: int = 0,
+              parameters: dict | None = None, measure_memory: bool = True, verbose: bool = False) -> dict:
+    """
+    Gera o corpus e mede cada imagem. Retorna o relatório (serializável em JSON).
+    """
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    report = {"version": REPORT_VERSION, "scale": scale, "seed": seed, "repeats": repeats,
+              "parameters": parameters, "machine": _machine(), "images": {}}
+    for name in names or list(CORPUS):
+        started = time.perf_counter()
+        image = generate_image(name, scale, seed)
+        generation_seconds = time.perf_counter() - started
+        result = benchmark_image(image, parameters, repeats, measure_memory, verbose)
+        result["generation_seconds"] = round(generation_seconds, 6)
+        report["images"][name] = result
+        print(f"  {name:<13} {result['width']}x{result['height']}  {result['contours']} contornos, "
+              f"{result['nodes']['fitted']} nós, {result['svg_bytes'] / 1024:.1f} KiB, "
+              f"{result['total_seconds']:.3f} s")
+    return report
+
+# --- Relatório e linha de base ---
+
+def save_report(report: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+        f.write("\n")
+
+def load_report(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Aviso: relatório '{path}' ignorado ({e}).")
+        return None
+
+def compare_to_baseline(report: dict, baseline: dict,
+                        tolerances: dict | None = None) -> tuple[list[str], list[str]]:
+    """
+    Compara um relatório com a linha de base. Só as imagens presentes nos dois
+    são comparadas; diminuições (melhorias) nunca contam.
+
+    Nós e bytes do SVG são determinísticos e sempre contam como regressão.
+    Tempo e pico de memória dependem do ambiente: só contam quando o `machine`
+    do relatório é o da linha de base; em outra máquina viram avisos.
+
+    Returns:
+        tuple[list[str], list[str]]: (regressões, avisos), uma mensagem por métrica.
+    """
+    tolerances = {**DEFAULT_TOLERANCES, **(tolerances or {})}
+    for field in ("version", "scale", "seed", "repeats", "parameters"):
+        if report.get(field) != baseline.get(field):
+            return [f"linha de base incompatível: '{field}' difere ({baseline.get(field)!r} != {report.get(field)!r})"], []
+
+    regressions, advisories = [], []
+    same_machine = report.get("machine") == baseline.get("machine")
+    def check(label: str, metric: str, current: float, reference: float, min_delta: float = 0.0):
+        if current > reference * (1.0 + tolerances[metric]) and current - reference > min_delta:
+            change = (current / reference - 1.0) * 100 if reference else float("inf")
+            deterministic = metric in ("nodes", "svg_bytes")
+            (regressions if deterministic or same_machine else advisories).append(
+                f"{label}: {reference:g} -> {current:g} (+{change:.1f}%)")
+
+    for name, reference in baseline.get("images", {}).items():
+        current = report["images"].get(name)
+        if current is None:
+            continue
+        for stage in STAGES:
+            check(f"{name}/{stage}/seconds", "seconds", current["stages"][stage]["seconds"],
+                  reference["stages"][stage]["seconds"], _MIN_SECONDS_DELTA)
+            check(f"{name}/{stage}/peak_bytes", "peak_bytes", current["stages"][stage]["peak_bytes"],
+                  reference["stages"][stage]["peak_bytes"], _MIN_PEAK_BYTES_DELTA)
+        check(f"{name}/total_seconds", "seconds", current["total_seconds"], reference["total_seconds"], _MIN_SECONDS_DELTA)
+        check(f"{name}/nodes", "nodes", current["nodes"]["fitted"], reference["nodes"]["fitted"])
+        check(f"{name}/svg_bytes", "svg_bytes", current["svg_bytes"], reference["svg_bytes"])
+    return regressions, advisories
+
+def run_benchmark(names: list[str] | None = None, scale: float = 1.0, repeats: int = 3,
+                  output_path: str | None = None, baseline_path: str = DEFAULT_BASELINE_PATH,
+                  update_baseline: bool = False, tolerances: dict | None = None,
+                  measure_memory: bool = True, verbose: bool = False) -> int:
+    """
+    Roda a suíte, grava o relatório e compara com a linha de base.
+
+    Returns:
+        int: Código de saída: 0 sem regressões (ou linha de base atualizada/ausente), 1 com regressões.
+            Tempo e memória medidos em outra máquina só geram avisos.
+    """
+    print(f"Benchmark: {len(names or CORPUS)} imagens, escala {scale}, {repeats} repetições.")
+    report = run_suite(names, scale, repeats, measure_memory=measure_memory, verbose=verbose)
+    if output_path:
+        save_report(report, output_path)
+        print(f"Relatório gravado em: {output_path}")
+
+    if update_baseline:
+        save_report(report, baseline_path)
+        print(f"Linha de base atualizada: {baseline_path}")
+        return 0
+    baseline = load_report(baseline_path) if os.path.exists(baseline_path) else None
+    if baseline is None:
+        print(f"Sem linha de base em '{baseline_path}' (use --update-baseline para criar).")
+        return 0
+    if baseline.get("machine") != report["machine"]:
+        print("Aviso: a linha de base foi gravada em outra máquina/ambiente; tempo e memória só geram avisos.")
+
+    regressions, advisories = compare_to_baseline(report, baseline, tolerances)
+    for message in advisories:
+        print(f"  AVISO {message}")
+    if regressions:
+        print(f"{len(regressions)} regressões em relação à linha de base:")
+        for message in regressions:
+            print(f"  REGRESSÃO {message}")
+        return 1
+    print("Sem regressões em relação à linha de base.")
+    return 0
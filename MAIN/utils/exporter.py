@@ -1,78 +1,592 @@
 # utils/exporter.py
-import svgwrite
+import gzip
+import io
 import os
 
-def export_to_svg(structured_paths: list[list[tuple]], # MODIFICADO: Aceita nova estrutura
+import numpy as np
+
+try:
+    from core.path_set import PathSet, PATH_HOLE
+except ModuleNotFoundError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.path_set import PathSet, PATH_HOLE
+
+# Quantidade máxima de pontos convertidos para Python (tolist) de uma vez: mantém
+# a memória da exportação constante, independente do tamanho do PathSet.
+_FORMAT_CHUNK_POINTS = 1 << 16
+
+# Templates '%' por comando de segmento (formatação em lote, um '%' por caminho)
+_SEGMENT_TEMPLATES = {
+    'M': "M%s,%s",
+    'L': "L%s,%s",
+    'Q': "Q%s,%s %s,%s",
+    'C': "C%s,%s %s,%s %s,%s",
+}
+
+DEFAULT_COMPACT_PRECISION = 2 # Casas decimais no modo compacto
+
+def _escape_attribute(value) -> str:
+    """Escapa um valor de atributo XML como o ElementTree (usado pelo svgwrite) faz."""
+    value = str(value)
+    if any(char in value for char in '&<>"\r\n\t'):
+        value = (value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                 .replace('"', "&quot;").replace("\r", "&#13;").replace("\n", "&#10;").replace("\t", "&#09;"))
+    return value
+
+_PATH_PREFIX = '<path d="'
+_SVG_FOOTER = "</svg>"
+
+def _svg_header(width: str, height: str, view_box: tuple) -> str:
+    view_box_string = ",".join(str(float(value)) for value in view_box)
+    return ('<?xml version="1.0" encoding="utf-8" ?>\n'
+            f'<svg baseProfile="tiny" height="{_escape_attribute(height)}" version="1.2" '
+            f'viewBox="{view_box_string}" width="{_escape_attribute(width)}" '
+            'xmlns="http://www.w3.org/2000/svg" xmlns:ev="http://www.w3.org/2001/xml-events" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink"><defs />')
+
+def _style_suffix(stroke_color: str, stroke_width: str, fill_color: str, fill_rule: str | None = None) -> str:
+    """Final de cada <path> (fecha o 'd' e traz os atributos de estilo)."""
+    fill_rule_attribute = f' fill-rule="{_escape_attribute(fill_rule)}"' if fill_rule else ''
+    return (f'" fill="{_escape_attribute(fill_color)}"{fill_rule_attribute} '
+            f'stroke="{_escape_attribute(stroke_color)}" stroke-width="{_escape_attribute(stroke_width)}" />')
+
+class SvgStreamWriter:
+    """
+    Escreve um SVG direto em um arquivo com buffer, um <path> por vez, sem
+    montar o DOM do svgwrite em memória. A saída é byte a byte igual à que o
+    svgwrite gerava (perfil 'tiny', atributos em ordem alfabética).
+
+    Se o caminho termina em '.svgz', a saída é comprimida com gzip à medida
+    que é escrita (mtime fixo no cabeçalho, para saídas reprodutíveis).
+
+    Uso:
+        with SvgStreamWriter(caminho, "640px", "480px", (0, 0, 640, 480)) as writer:
+            writer.begin_style(stroke_color, stroke_width, fill_color)
+            for d_string in ...:
+                writer.write_path(d_string)
+    """
+    def __init__(self, filepath: str, width: str, height: str, view_box: tuple,
+                 buffer_size: int = 1 << 20):
+        self.filepath = filepath
+        if filepath.lower().endswith(".svgz"):
+            compressed = gzip.GzipFile(filepath, "wb", compresslevel=9, mtime=0)
+            self._file = io.TextIOWrapper(io.BufferedWriter(compressed, buffer_size), encoding="utf-8", newline="")
+        else:
+            self._file = open(filepath, "w", encoding="utf-8", newline="", buffering=buffer_size)
+        self._path_suffix = '" />'
+        self.paths_written = 0
+        self.primitives_written = 0
+        self.uses_written = 0
+        self._file.write(_svg_header(width, height, view_box))
+
+    def begin_style(self, stroke_color: str, stroke_width: str, fill_color: str, fill_rule: str | None = None):
+        """Define os atributos de estilo usados pelos próximos <path> (formatados uma única vez)."""
+        self._path_suffix = _style_suffix(stroke_color, stroke_width, fill_color, fill_rule)
+
+    def begin_group(self, attributes: dict):
+        """Abre um <g> (atributos em ordem alfabética); os próximos <path> herdam o estilo dele."""
+        attribute_string = " ".join(f'{name}="{_escape_attribute(value)}"' for name, value in sorted(attributes.items()))
+        self._file.write(f"<g {attribute_string}>")
+        self._path_suffix = '" />'
+
+    def end_group(self):
+        self._file.write("</g>")
+
+    def write_path(self, d_string: str):
+        # O 'd' só contém comandos e números: não precisa de escape
+        self._file.write(_PATH_PREFIX + d_string + self._path_suffix)
+        self.paths_written += 1
+
+    def write_paths(self, d_strings):
+        for d_string in d_strings:
+            self.write_path(d_string)
+
+    def write_primitive(self, element: str):
+        """Escreve uma primitiva (ver _primitive_elements) com o estilo atual."""
+        self._file.write(element + self._path_suffix)
+        self.primitives_written += 1
+
+    def write_symbols(self, symbol_d_strings, non_scaling_stroke=()):
+        """
+        Escreve um <defs> com um <symbol id="sN"> por item de symbol_d_strings
+        (cada um, os 'd' dos <path> do símbolo, com o estilo atual). Sem
+        viewBox, o símbolo fica no referencial de quem o usa; overflow="visible"
+        evita o recorte pela viewport do <use>.
+
+        Os símbolos em non_scaling_stroke (índices) são usados com escala: os
+        <path> deles levam vector-effect="non-scaling-stroke", para o traço
+        manter a espessura do estilo em todas as ocorrências.
+        """
+        style_suffix = self._path_suffix
+        scaled_suffix = style_suffix[:-len(" />")] + ' vector-effect="non-scaling-stroke" />'
+        self._file.write("<defs>")
+        for index, d_strings in enumerate(symbol_d_strings):
+            self._file.write(f'<symbol id="s{index}" overflow="visible">')
+            self._path_suffix = scaled_suffix if index in non_scaling_stroke else style_suffix
+            self.write_paths(d_strings)
+            self._file.write("</symbol>")
+        self._file.write("</defs>")
+        self._path_suffix = style_suffix
+
+    def write_use(self, symbol_index: int, placement: str):
+        """Escreve um <use> do símbolo sN; placement são os atributos de posição (ver _use_placements)."""
+        self._file.write(f'<use {placement} xlink:href="#s{symbol_index}" />')
+        self.uses_written += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.write(_SVG_FOOTER)
+            self._file.close()
+            self._file = None
+
+    def abort(self):
+        """Fecha e remove o arquivo incompleto (usado quando a exportação falha no meio)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+    def __enter__(self) -> 'SvgStreamWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+def _path_set_d_strings(path_set: PathSet):
+    """
+    Gera o atributo 'd' de cada caminho de um PathSet ('M x,y L x,y ... Z').
+
+    A formatação é feita em lote: um único '%' por caminho sobre a lista plana
+    de coordenadas, em vez de uma f-string por segmento. As coordenadas são
+    convertidas para Python em blocos de até _FORMAT_CHUNK_POINTS pontos.
+    Furos (PATH_HOLE) entram no 'd' do caminho externo anterior.
+    """
+    if path_set.has_holes:
+        yield from _group_compound(path_set, _indexed_path_set_d_strings(path_set))
+    else:
+        for _, d_string in _indexed_path_set_d_strings(path_set):
+            yield d_string
+
+def _group_compound(path_set: PathSet, indexed_d_strings):
+    """Junta o 'd' de cada furo ao do caminho externo anterior: um <path> por caminho composto."""
+    holes = ((path_set.flags & PATH_HOLE) != 0).tolist()
+    pending = None
+    for index, d_string in indexed_d_strings:
+        if holes[index] and pending is not None:
+            pending += " " + d_string
+            continue
+        if pending is not None:
+            yield pending
+        pending = d_string
+    if pending is not None:
+        yield pending
+
+def _indexed_path_set_d_strings(path_set: PathSet):
+    offsets = path_set.offsets.tolist()
+    closed = (path_set.flags & 1).astype(bool).tolist()
+    path_count = len(path_set)
+    index = 0
+    while index < path_count:
+        chunk_start = offsets[index]
+        chunk_end_index = index + 1
+        while chunk_end_index < path_count and offsets[chunk_end_index + 1] - chunk_start <= _FORMAT_CHUNK_POINTS:
+            chunk_end_index += 1
+        flat_coords = path_set.coords[chunk_start:offsets[chunk_end_index]].ravel().tolist()
+        for path_index in range(index, chunk_end_index):
+            start, end = offsets[path_index] - chunk_start, offsets[path_index + 1] - chunk_start
+            if end == start:
+                continue
+            template = "M%s,%s" + " L%s,%s" * (end - start - 1)
+            if closed[path_index]:
+                template += " Z"
+            yield path_index, template % tuple(flat_coords[2 * start:2 * end])
+        index = chunk_end_index
+
+def _structured_d_strings(structured_paths: list[list[tuple]]):
+    """
+    Gera o atributo 'd' de cada caminho no formato de segmentos [('CMD', pt1, ...), ...].
+
+    Cada caminho vira um template ('M%s,%s C%s,%s %s,%s %s,%s ... Z') formatado
+    com um único '%' sobre os valores de todos os seus pontos.
+    """
+    for path_segments in structured_paths:
+        if not path_segments:
+            continue
+
+        templates = []
+        values = []
+        for segment_data in path_segments:
+            if segment_data[0] == 'Z' and templates: # Fim de um subcaminho (caminho composto)
+                templates.append("Z")
+                continue
+            template = _SEGMENT_TEMPLATES.get(segment_data[0])
+            if template is None: # O comando 'Z' final é adicionado abaixo para cada path
+                continue
+            templates.append(template)
+            for point in segment_data[1:]:
+                values.append(point[0])
+                values.append(point[1])
+
+        if templates:
+            templates.append("Z") # Garante que cada path individual seja fechado
+            yield " ".join(templates) % tuple(values)
+
+# --- Codificação compacta do atributo 'd' ---
+#
+# Coordenadas arredondadas para `precision` casas e convertidas para inteiros
+# (unidades de 10^-precision): os deslocamentos relativos são calculados sobre
+# esses inteiros, então não há acúmulo de erro de arredondamento. Comandos
+# relativos ('m', 'l', 'h', 'v', 'c', 'q'), repetição implícita do comando,
+# 'h'/'v' nos trechos alinhados aos eixos e separadores só onde necessários
+# ("m10 20h5v-3l.5-1.25z").
+
+def _compact_number_formatter(precision: int):
+    """Retorna uma função (inteiro escalado -> texto mínimo), com cache dos valores repetidos."""
+    scale = 10 ** precision
+    cache = {}
+
+    def format_value(value: int) -> str:
+        text = cache.get(value)
+        if text is None:
+            if precision == 0 or value % scale == 0:
+                text = str(value // scale)
+            else:
+                sign = "-" if value < 0 else ""
+                integer_part, fraction = divmod(abs(value), scale)
+                fraction_text = str(fraction).rjust(precision, "0").rstrip("0")
+                text = f"{sign}{integer_part if integer_part else ''}.{fraction_text}"
+            cache[value] = text
+        return text
+    return format_value
+
+def _compact_join(commands: list[tuple[str, tuple]], format_value) -> str:
+    """
+    Junta [(comando, valores inteiros), ...] omitindo comandos repetidos e
+    separadores dispensáveis ('-' ou um segundo '.' já separam os números).
+    """
+    pieces = []
+    previous_command = None
+    previous_number = None # Último texto numérico emitido (None logo após uma letra)
+    for command, values in commands:
+        # Depois de 'm', pares implícitos são 'l'
+        implicit = command == previous_command or (command == 'l' and previous_command == 'm')
+        if not implicit:
+            pieces.append(command)
+            previous_number = None
+        previous_command = command
+        for value in values:
+            text = format_value(value)
+            if previous_number is not None and not (
+                    text[0] == "-" or (text[0] == "." and "." in previous_number)):
+                pieces.append(" ")
+            pieces.append(text)
+            previous_number = text
+    return "".join(pieces)
+
+def _compact_polyline_commands(points: np.ndarray, closed: bool) -> list[tuple[str, tuple]]:
+    """Comandos compactos de uma polilinha já escalada para inteiros (n, 2)."""
+    deltas = np.diff(points, axis=0)
+    deltas = deltas[np.any(deltas != 0, axis=1)] # Pontos repetidos não desenham nada
+    if closed and len(deltas) and not np.any(points[-1] - points[0]):
+        deltas = deltas[:-1] # O 'z' já volta ao ponto inicial
+    commands = [('m', tuple(points[0].tolist()))]
+    for dx, dy in deltas.tolist():
+        if dy == 0:
+            commands.append(('h', (dx,)))
+        elif dx == 0:
+            commands.append(('v', (dy,)))
+        else:
+            commands.append(('l', (dx, dy)))
+    if closed:
+        commands.append(('z', ()))
+    return commands
+
+def _compact_path_set_d_strings(path_set: PathSet, precision: int = DEFAULT_COMPACT_PRECISION):
+    """Gera o atributo 'd' compacto de cada caminho de um PathSet."""
+    format_value = _compact_number_formatter(precision)
+    scale = 10 ** precision
+    offsets = path_set.offsets.tolist()
+    closed = (path_set.flags & 1).astype(bool).tolist()
+    holes = ((path_set.flags & PATH_HOLE) != 0).tolist()
+    pending = None # Comandos do caminho composto em andamento
+    current_point = None # Ponto corrente ao fim do último subcaminho
+    for index in range(len(path_set)):
+        start, end = offsets[index], offsets[index + 1]
+        if end == start:
+            continue
+        points = path_set.coords[start:end]
+        if np.issubdtype(points.dtype, np.integer):
+            scaled = points.astype(np.int64) * scale
+        else:
+            scaled = np.rint(points * scale).astype(np.int64)
+        commands = _compact_polyline_commands(scaled, closed[index])
+        if holes[index] and pending is not None:
+            # Subcaminho de um caminho composto: o 'm' é relativo ao ponto corrente
+            commands[0] = ('m', tuple((scaled[0] - current_point).tolist()))
+            pending.extend(commands)
+        else:
+            if pending is not None:
+                yield _compact_join(pending, format_value)
+            pending = commands
+        # Depois de um 'z', o ponto corrente volta ao início do subcaminho
+        current_point = scaled[0] if closed[index] else scaled[-1]
+    if pending is not None:
+        yield _compact_join(pending, format_value)
+
+def _compact_structured_d_strings(structured_paths: list[list[tuple]], precision: int = DEFAULT_COMPACT_PRECISION):
+    """Gera o atributo 'd' compacto de cada caminho no formato de segmentos (M, L, Q, C)."""
+    format_value = _compact_number_formatter(precision)
+    scale = 10 ** precision
+    for path_segments in structured_paths:
+        commands = []
+        current = (0, 0)
+        subpath_start = (0, 0)
+        for segment_data in path_segments:
+            command = segment_data[0]
+            if command == 'Z' and commands: # Fim de um subcaminho (caminho composto)
+                commands.append(('z', ()))
+                current = subpath_start
+                continue
+            if command not in _SEGMENT_TEMPLATES:
+                continue
+            points = [(int(round(p[0] * scale)), int(round(p[1] * scale))) for p in segment_data[1:]]
+            if command == 'M':
+                if commands: # Um novo 'M' no meio do caminho é relativo ao ponto atual
+                    commands.append(('m', (points[0][0] - current[0], points[0][1] - current[1])))
+                else:
+                    commands.append(('m', points[0]))
+                subpath_start = points[0]
+            else:
+                dx, dy = points[-1][0] - current[0], points[-1][1] - current[1]
+                if command == 'L':
+                    if dx == 0 and dy == 0:
+                        continue
+                    commands.append(('h', (dx,)) if dy == 0 else ('v', (dy,)) if dx == 0 else ('l', (dx, dy)))
+                else:
+                    relative = []
+                    for x, y in points:
+                        relative.append(x - current[0])
+                        relative.append(y - current[1])
+                    commands.append((command.lower(), tuple(relative)))
+            current = points[-1]
+        if commands:
+            commands.append(('z', ())) # Como no modo normal, cada path é fechado
+            yield _compact_join(commands, format_value)
+
+# --- Primitivas geométricas (ver core/primitives.py) ---
+
+def _primitive_elements(primitives: list[dict], precision: int = DEFAULT_COMPACT_PRECISION):
+    """
+    Gera cada primitiva como '<circle cx="..." ... r="...' (sem fechar o último
+    atributo: o sufixo de estilo do <path> fecha a aspa e a tag). Os valores
+    são arredondados para `precision` casas, como no modo compacto.
+    """
+    format_value = _compact_number_formatter(precision)
+    scale = 10 ** precision
+
+    def number(value) -> str:
+        return format_value(int(round(float(value) * scale)))
+
+    for shape in primitives:
+        kind = shape["type"]
+        if kind == "circle":
+            yield f'<circle cx="{number(shape["cx"])}" cy="{number(shape["cy"])}" r="{number(shape["r"])}'
+        elif kind == "ellipse":
+            center = f'cx="{number(shape["cx"])}" cy="{number(shape["cy"])}"'
+            radii = f'rx="{number(shape["rx"])}" ry="{number(shape["ry"])}'
+            if shape.get("angle"):
+                rotation = f'rotate({number(shape["angle"])} {number(shape["cx"])} {number(shape["cy"])})'
+                yield f'<ellipse {center} {radii}" transform="{rotation}'
+            else:
+                yield f'<ellipse {center} {radii}'
+        elif kind == "rect":
+            yield (f'<rect height="{number(shape["height"])}" width="{number(shape["width"])}" '
+                   f'x="{number(shape["x"])}" y="{number(shape["y"])}')
+        elif kind == "polygon":
+            points = " ".join(f"{number(x)},{number(y)}" for x, y in np.asarray(shape["points"]).tolist())
+            yield f'<polygon points="{points}'
+        elif kind == "line":
+            yield (f'<line x1="{number(shape["x1"])}" x2="{number(shape["x2"])}" '
+                   f'y1="{number(shape["y1"])}" y2="{number(shape["y2"])}')
+
+# --- Formas repetidas (ver core/shape_dedup.py) ---
+
+def _use_placements(transforms: np.ndarray, precision: int = DEFAULT_COMPACT_PRECISION):
+    """
+    Atributos de posição de cada <use>, a partir das linhas (x, y, rotação, escala):
+    x/y quando é só translação, ou um transform com rotate/scale quando preciso.
+    """
+    format_value = _compact_number_formatter(precision)
+    scale = 10 ** precision
+    scaled = np.rint(np.asarray(transforms, dtype=np.float64) * scale).astype(np.int64)
+    for x, y, angle, factor in scaled.tolist():
+        if angle == 0 and factor == scale:
+            yield f'x="{format_value(x)}" y="{format_value(y)}"'
+            continue
+        transform = f"translate({format_value(x)} {format_value(y)})"
+        if angle:
+            transform += f" rotate({format_value(angle)})"
+        if factor != scale:
+            transform += f" scale({format_value(factor)})"
+        yield f'transform="{transform}"'
+
+def _document_size(structured_paths: list[list[tuple]] | PathSet,
+                   image_width: int | None, image_height: int | None) -> tuple[tuple[str, str], list[float]]:
+    """Tamanho ('Wpx', 'Hpx') e viewBox do documento (da imagem ou, sem ela, dos pontos + 10)."""
+    if image_width is not None and image_height is not None:
+        max_x, max_y = image_width, image_height
+    elif isinstance(structured_paths, PathSet):
+        if structured_paths.total_points == 0: max_x, max_y = 100,100
+        else:
+            max_x, max_y = (structured_paths.coords.max(axis=0) + 10).tolist()
+    else: # Fallback
+        # Para calcular o fallback, precisamos extrair todos os pontos finais dos segmentos
+        max_x = max_y = None
+        for path in structured_paths:
+            for seg in path:
+                if seg[0] in _SEGMENT_TEMPLATES and seg[-1]:
+                    x, y = seg[-1][0], seg[-1][1] # Ponto final do segmento (M, L, Q ou C)
+                    max_x = x if max_x is None or x > max_x else max_x
+                    max_y = y if max_y is None or y > max_y else max_y
+        if max_x is None: max_x, max_y = 100,100
+        else:
+            max_x, max_y = max_x + 10, max_y + 10
+    return (f"{max_x}px", f"{max_y}px"), [0.0, 0.0, float(max_x), float(max_y)]
+
+def _d_strings(paths: list[list[tuple]] | PathSet, compact: bool, precision: int):
+    """Gerador do atributo 'd' de cada <path>, conforme o tipo dos caminhos e o modo."""
+    if isinstance(paths, PathSet):
+        return _compact_path_set_d_strings(paths, precision) if compact else _path_set_d_strings(paths)
+    return _compact_structured_d_strings(paths, precision) if compact else _structured_d_strings(paths)
+
+def _has_compound_paths(paths: list[list[tuple]] | PathSet) -> bool:
+    if isinstance(paths, PathSet):
+        return paths.has_holes
+    return any(segment[0] == 'Z' for path in paths for segment in path)
+
+# --- Tamanho do SVG (orçamento em bytes) ---
+#
+# No 'd' não compacto de um PathSet cada vértice custa o mesmo,
+# independentemente dos vizinhos ("M" ou " L" + "x,y"); o " Z" dos caminhos
+# fechados e o espaço que junta um furo ao caminho externo ficam no primeiro
+# vértice, que nunca é removido. O tamanho do arquivo de export_to_svg(paths)
+# é exatamente svg_fixed_bytes(...) + svg_vertex_bytes(paths).sum().
+
+def _joined_holes(path_set: PathSet) -> np.ndarray:
+    """Máscara dos caminhos que _group_compound junta ao 'd' do caminho anterior."""
+    non_empty = np.diff(path_set.offsets) > 0
+    joined = ((path_set.flags & PATH_HOLE) != 0) & non_empty
+    first = np.flatnonzero(non_empty)
+    if len(first) and joined[first[0]]:
+        joined[first[0]] = False # Furo sem caminho externo antes dele vira um <path> próprio
+    return joined
+
+def svg_vertex_bytes(path_set: PathSet) -> np.ndarray:
+    """Bytes de cada vértice no 'd' não compacto gerado por export_to_svg (int64, alinhado com coords)."""
+    if path_set.total_points == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Mesma formatação do '%s' sobre tolist(): str(int) ou repr(float)
+    digits = np.char.str_len(path_set.coords.astype(str)).astype(np.int64)
+    vertex_bytes = digits[:, 0] + digits[:, 1] + 3 # " L" + ","
+    starts = path_set.offsets[:-1][np.diff(path_set.offsets) > 0]
+    vertex_bytes[starts] -= 1 # "M" no lugar de " L"
+    first_vertex = path_set.offsets[:-1]
+    closed = ((path_set.flags & 1) != 0) & (np.diff(path_set.offsets) > 0)
+    np.add.at(vertex_bytes, first_vertex[closed], 2) # " Z"
+    np.add.at(vertex_bytes, first_vertex[_joined_holes(path_set)], 1) # " " entre o externo e o furo
+    return vertex_bytes
+
+def svg_fixed_bytes(path_set: PathSet,
+                    image_width: int | None = None,
+                    image_height: int | None = None,
+                    stroke_color: str = 'black',
+                    stroke_width: str = '1',
+                    fill_color: str = 'none',
+                    fill_rule: str | None = None,
+                    primitives: list[dict] | None = None,
+                    precision: int = DEFAULT_COMPACT_PRECISION) -> int:
+    """
+    Bytes de export_to_svg(path_set, ...) que não dependem dos vértices
+    (cabeçalho, tags <path> e as primitivas, se houver).
+    """
+    if fill_rule is None and path_set.has_holes:
+        fill_rule = "evenodd"
+    dwg_size, view_box_values = _document_size(path_set, image_width, image_height)
+    tag_count = int(np.count_nonzero(np.diff(path_set.offsets) > 0)) - int(_joined_holes(path_set).sum())
+    tag_bytes = len(_PATH_PREFIX) + len(_style_suffix(stroke_color, stroke_width, fill_color, fill_rule).encode("utf-8"))
+    header_bytes = len(_svg_header(dwg_size[0], dwg_size[1], view_box_values).encode("utf-8"))
+    primitive_bytes = sum(len(element) + tag_bytes - len(_PATH_PREFIX)
+                          for element in _primitive_elements(primitives or [], precision))
+    return header_bytes + tag_count * tag_bytes + primitive_bytes + len(_SVG_FOOTER)
+
+def export_to_svg(structured_paths: list[list[tuple]] | PathSet, # MODIFICADO: Aceita nova estrutura
                   filepath: str,
                   image_width: int | None = None,
                   image_height: int | None = None,
                   stroke_color: str = 'black',
                   stroke_width: str = '1',
-                  fill_color: str = 'none') -> bool:
+                  fill_color: str = 'none',
+                  compact: bool = False,
+                  precision: int = DEFAULT_COMPACT_PRECISION,
+                  fill_rule: str | None = None,
+                  primitives: list[dict] | None = None,
+                  symbols: list[dict] | None = None) -> bool:
     """
     Exporta os caminhos (agora com estrutura de segmentos) para um arquivo SVG.
+    Aceita também um PathSet (caminhos 'M'/'L'; 'Z' nos caminhos fechados).
+
+    Caminhos compostos (furos PATH_HOLE de um PathSet, ou subcaminhos separados
+    por ('Z',)) viram um único <path>; nesse caso fill_rule é "evenodd" quando
+    não for informado, para que os furos fiquem vazios.
+
+    Os <path> são escritos em streaming (SvgStreamWriter) à medida que cada
+    atributo 'd' é formatado, sem manter o documento inteiro em memória.
+    Com compact=True, o 'd' usa comandos relativos, 'h'/'v', repetição
+    implícita e `precision` casas decimais. Um filepath '.svgz' gera a saída
+    comprimida com gzip.
+
+    As primitivas de core/primitives.py (<circle>, <ellipse>, <rect>,
+    <polygon>, <line>) são escritas depois dos <path>, com o mesmo estilo.
+
+    Os símbolos de core/shape_dedup.py ({"paths": ..., "transforms": (n, 4)})
+    vão para um <defs>, com o estilo nos <path> de cada <symbol>, e cada
+    ocorrência vira um <use> depois dos <path> e das primitivas.
     """
-    if not structured_paths:
+    if (structured_paths is None or len(structured_paths) == 0) and not primitives and not symbols:
         print("Nenhum caminho estruturado para exportar.")
         return False
+    symbols = symbols or []
+    if structured_paths is None: # Só primitivas e símbolos
+        structured_paths = []
 
     try:
-        # ... (lógica de tamanho e viewbox como antes) ...
-        if image_width is not None and image_height is not None:
-            dwg_size = (f"{image_width}px", f"{image_height}px")
-            view_box_str = f"0 0 {image_width} {image_height}"
-        else: # Fallback
-            # Para calcular o fallback, precisamos extrair todos os pontos finais dos segmentos
-            all_final_points = []
-            for path in structured_paths:
-                for seg in path:
-                    if seg[0] == 'M' or seg[0] == 'L':
-                        all_final_points.append(seg[1])
-                    elif seg[0] == 'Q':
-                        all_final_points.append(seg[2]) # Ponto final da quadrática
-                    elif seg[0] == 'C':
-                        all_final_points.append(seg[3]) # Ponto final da cúbica
-            if not all_final_points: max_x, max_y = 100,100
-            else:
-                max_x = max(p[0] for p in all_final_points if p) + 10
-                max_y = max(p[1] for p in all_final_points if p) + 10
-            dwg_size = (f"{max_x}px", f"{max_y}px")
-            view_box_str = f"0 0 {max_x} {max_y}"
-
+        dwg_size, view_box_values = _document_size(structured_paths, image_width, image_height)
 
-        dwg = svgwrite.Drawing(filepath, size=dwg_size, profile='tiny')
-        view_box_values = [float(v) for v in view_box_str.split()]
-        dwg.viewbox(minx=view_box_values[0], miny=view_box_values[1], 
-                    width=view_box_values[2], height=view_box_values[3])
+        d_strings = _d_strings(structured_paths, compact, precision)
+        if fill_rule is None and (_has_compound_paths(structured_paths)
+                                  or any(_has_compound_paths(symbol["paths"]) for symbol in symbols)):
+            fill_rule = "evenodd"
 
-        for path_segments in structured_paths:
-            if not path_segments:
-                continue
+        with SvgStreamWriter(filepath, dwg_size[0], dwg_size[1], view_box_values) as writer:
+            writer.begin_style(stroke_color, stroke_width, fill_color, fill_rule)
+            if symbols:
+                scaled = {index for index, symbol in enumerate(symbols)
+                          if np.any(np.asarray(symbol["transforms"])[:, 3] != 1)}
+                writer.write_symbols((_d_strings(symbol["paths"], compact, precision) for symbol in symbols),
+                                     non_scaling_stroke=scaled)
+            writer.write_paths(d_strings)
+            for element in _primitive_elements(primitives or [], precision):
+                writer.write_primitive(element)
+            for index, symbol in enumerate(symbols):
+                for placement in _use_placements(symbol["transforms"], precision):
+                    writer.write_use(index, placement)
 
-            d_cmds = []
-            for segment_data in path_segments:
-                cmd = segment_data[0]
-                pts = segment_data[1:] # Resto são pontos ou tuplas de pontos
-
-                if cmd == 'M' or cmd == 'L': # M x,y ou L x,y
-                    d_cmds.append(f"{cmd}{pts[0][0]},{pts[0][1]}")
-                elif cmd == 'Q': # Q cx,cy x,y
-                    d_cmds.append(f"{cmd}{pts[0][0]},{pts[0][1]} {pts[1][0]},{pts[1][1]}")
-                elif cmd == 'C': # C c1x,c1y c2x,c2y x,y
-                    d_cmds.append(f"{cmd}{pts[0][0]},{pts[0][1]} {pts[1][0]},{pts[1][1]} {pts[2][0]},{pts[2][1]}")
-                # O comando 'Z' será adicionado globalmente abaixo para cada path
-            
-            if d_cmds:
-                d_cmds.append("Z") # Garante que cada path individual seja fechado
-                path_element = dwg.path(
-                    d=" ".join(d_cmds),
-                    stroke=stroke_color,
-                    stroke_width=stroke_width,
-                    fill=fill_color
-                )
-                dwg.add(path_element)
-        
-        dwg.save()
         print(f"SVG (com estrutura de path) exportado com sucesso para: {filepath}")
         return True
     except Exception as e:
@@ -81,4 +595,46 @@ def export_to_svg(structured_paths: list[list[tuple]], # MODIFICADO: Aceita nova
         print(traceback.format_exc()) # Imprime mais detalhes do erro
         return False
 
-# ... (if __name__ == '__main__': para teste pode ser atualizado para usar a nova estrutura)
\ No newline at end of file
+def export_color_layers_to_svg(layers: list[dict],
+                               filepath: str,
+                               image_width: int | None = None,
+                               image_height: int | None = None,
+                               compact: bool = False,
+                               precision: int = DEFAULT_COMPACT_PRECISION) -> bool:
+    """
+    Exporta as camadas do modo paleta (ver core/color_layers.py): um <g> por
+    cor, com fill da camada e fill-rule="evenodd", contendo um <path> por
+    caminho composto (externo + furos).
+
+    Args:
+        layers (list[dict]): Camadas na ordem de desenho, cada uma com "fill"
+            ('#rrggbb') e "paths" (PathSet ou caminhos no formato de segmentos).
+    """
+    layers = [layer for layer in layers if layer["paths"] is not None and len(layer["paths"])]
+    if not layers:
+        print("Nenhuma camada de cor para exportar.")
+        return False
+
+    try:
+        if image_width is not None and image_height is not None:
+            dwg_size, view_box_values = _document_size(layers[0]["paths"], image_width, image_height)
+        else:
+            boxes = [_document_size(layer["paths"], None, None)[1] for layer in layers]
+            max_x, max_y = max(box[2] for box in boxes), max(box[3] for box in boxes)
+            dwg_size, view_box_values = (f"{max_x:g}px", f"{max_y:g}px"), [0.0, 0.0, max_x, max_y]
+
+        with SvgStreamWriter(filepath, dwg_size[0], dwg_size[1], view_box_values) as writer:
+            for layer in layers:
+                writer.begin_group({"fill": layer["fill"], "fill-rule": "evenodd", "stroke": "none"})
+                writer.write_paths(_d_strings(layer["paths"], compact, precision))
+                writer.end_group()
+
+        print(f"SVG ({len(layers)} camadas de cor, {writer.paths_written} caminhos) exportado com sucesso para: {filepath}")
+        return True
+    except Exception as e:
+        print(f"Erro ao exportar SVG com camadas de cor: {e}")
+        import traceback
+        print(traceback.format_exc())
+        return False
+
+# ... (if __name__ == '__main__': para teste pode ser atualizado para usar a nova estrutura)
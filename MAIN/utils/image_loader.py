@@ -2,19 +2,29 @@
 import cv2
 import numpy as np
 
-def load_image(file_path: str) -> np.ndarray | None:
+# Fator de redução -> flag de leitura. Com JPEG, o OpenCV reduz já na decodificação
+# (escala da DCT), sem nunca materializar a resolução inteira.
+_READ_FLAGS_BY_REDUCTION = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2,
+                            4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+def load_image(file_path: str, reduction: int = 1) -> np.ndarray | None:
     """
     Carrega uma imagem de um arquivo usando OpenCV.
 
     Args:
         file_path (str): O caminho para o arquivo de imagem.
+        reduction (int): 1 (resolução original), 2, 4 ou 8 — carrega a imagem
+            reduzida por esse fator em cada eixo.
 
     Returns:
         np.ndarray | None: A imagem carregada como um array NumPy (formato BGR)
                            ou None se o carregamento falhar.
     """
+    if reduction not in _READ_FLAGS_BY_REDUCTION:
+        print(f"Erro: Fator de redução inválido ({reduction}); use 1, 2, 4 ou 8.")
+        return None
     try:
-        image = cv2.imread(file_path)
+        image = cv2.imread(file_path, _READ_FLAGS_BY_REDUCTION[reduction])
         if image is None:
             print(f"Erro: Não foi possível carregar a imagem de '{file_path}'. Verifique o caminho e o formato do arquivo.")
             return None
@@ -0,0 +1,330 @@
+# utils/pipeline_cache.py
+#
+# Cache das etapas do pipeline (detecção, vetorização, simplificação), com
+# chaves formadas pelo hash do conteúdo da imagem + parâmetros da etapa.
+# Em memória: LRU limitado por bytes. Em disco: um .npz comprimido por
+# entrada, gravado de forma atômica e removido do mais antigo ao mais novo
+# quando o diretório passa do limite.
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+try:
+    from core.path_set import PathSet
+except ModuleNotFoundError:
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.path_set import PathSet
+
+# Incrementar quando o formato das entradas (ou o resultado de alguma etapa) mudar
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_MEMORY_BYTES = 512 * 1024 * 1024
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+def default_cache_dir() -> str:
+    """Diretório padrão do cache em disco (FALCON_CACHE_DIR ou ~/.cache/falcon)."""
+    return os.environ.get("FALCON_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "falcon")
+
+def content_hash(data) -> str:
+    """Hash (blake2b) do conteúdo de um array (incluindo forma e dtype) ou de bytes."""
+    hasher = hashlib.blake2b(digest_size=16)
+    if isinstance(data, np.ndarray):
+        hasher.update(f"{data.shape}|{data.dtype.str}|".encode("ascii"))
+        data = np.ascontiguousarray(data)
+    hasher.update(memoryview(data).cast("B"))
+    return hasher.hexdigest()
+
+class PipelineCache:
+    """
+    Cache de resultados intermediários do pipeline.
+
+    Cada entrada é um dict de arrays NumPy identificado por stage_key(); as
+    etapas guardam e leem seus resultados com get()/put() (ou com os atalhos
+    get_path_set()/put_path_set()). Seguro para uso a partir de várias threads.
+
+    Args:
+        cache_dir (str | None): Diretório do cache em disco; None mantém só o cache em memória.
+        max_memory_bytes (int): Limite do LRU em memória.
+        max_disk_bytes (int): Limite do diretório em disco.
+    """
+    def __init__(self, cache_dir: str | None = None, max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_disk_bytes: int = DEFAULT_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, dict[str, np.ndarray]] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"Aviso: cache em disco desativado ('{cache_dir}': {e}).")
+                self.cache_dir = None
+
+    @staticmethod
+    def stage_key(stage: str, input_hash: str, **parameters) -> str:
+        """Chave de uma etapa: nome + hash da entrada + parâmetros (em ordem canônica)."""
+        canonical = json.dumps([CACHE_FORMAT_VERSION, stage, input_hash, parameters],
+                               sort_keys=True, separators=(",", ":"), default=str)
+        return f"{stage}-{hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()}"
+
+    # --- Entradas genéricas ---
+
+    def get(self, key: str) -> dict[str, np.ndarray] | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._read_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, arrays: dict[str, np.ndarray], persist: bool = True):
+        entry = {name: np.asarray(array) for name, array in arrays.items()}
+        with self._lock:
+            self._remember(key, entry)
+        if persist:
+            self._write_to_disk(key, entry)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+    def _remember(self, key: str, entry: dict[str, np.ndarray]):
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= sum(a.nbytes for a in previous.values())
+        size = sum(a.nbytes for a in entry.values())
+        if size > self.max_memory_bytes:
+            return # Maior que o cache inteiro: fica só no disco
+        self._memory[key] = entry
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sum(a.nbytes for a in evicted.values())
+
+    # --- Disco ---
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def _read_from_disk(self, key: str) -> dict[str, np.ndarray] | None:
+        if not self.cache_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                entry = {name: data[name] for name in data.files}
+            os.utime(path) # Marca como usado recentemente (a poda remove os mais antigos)
+            return entry
+        except Exception as e:
+            print(f"Aviso: entrada de cache '{path}' ignorada ({e}).")
+            return None
+
+    def _write_to_disk(self, key: str, entry: dict[str, np.ndarray]):
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                np.savez_compressed(f, **entry)
+            os.replace(temporary_path, path)
+        except Exception as e:
+            print(f"Aviso: não foi possível gravar a entrada de cache '{path}' ({e}).")
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+        self._prune_disk()
+
+    def _prune_disk(self):
+        try:
+            files = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npz"):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    files.append((stat.st_mtime, stat.st_size, name))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                total -= size
+            except OSError:
+                pass
+
+    # --- Atalhos para os tipos do pipeline ---
+
+    def get_path_set(self, key: str) -> tuple[PathSet, dict[str, np.ndarray]] | None:
+        """Lê uma entrada gravada com put_path_set(): (PathSet, demais arrays da entrada)."""
+        entry = self.get(key)
+        if entry is None:
+            return None
+        # flags é copiado: é o único array do PathSet alterado no lugar (set_selected)
+        path_set = PathSet(entry["coords"], entry["offsets"], entry["flags"].copy())
+        extras = {name: array for name, array in entry.items() if name not in ("coords", "offsets", "flags")}
+        return path_set, extras
+
+    def put_path_set(self, key: str, path_set: PathSet, persist: bool = True, **extra_arrays):
+        self.put(key, {"coords": path_set.coords, "offsets": path_set.offsets, "flags": path_set.flags.copy(),
+                       **extra_arrays}, persist=persist)
+
+    def load_image(self, file_path: str) -> tuple[np.ndarray, str] | None:
+        """
+        Carrega uma imagem (como image_loader.load_image) e devolve também o hash
+        dos seus pixels. A imagem decodificada fica só no cache em memória, com
+        chave pelo hash dos bytes do arquivo: reabrir o mesmo arquivo não decodifica de novo.
+        """
+        try:
+            with open(file_path, "rb") as f:
+                file_bytes = f.read()
+        except OSError as e:
+            print(f"Erro ao tentar ler o arquivo de imagem '{file_path}': {e}")
+            return None
+        key = self.stage_key("load", content_hash(file_bytes))
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry["image"], str(entry["pixel_hash"])
+            self.misses += 1
+        image = cv2.imdecode(np.frombuffer(file_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"Erro: Não foi possível carregar a imagem de '{file_path}'. Verifique o caminho e o formato do arquivo.")
+            return None
+        pixel_hash = content_hash(image)
+        self.put(key, {"image": image, "pixel_hash": np.array(pixel_hash)}, persist=False)
+        return image, pixel_hash
+
+def detect_and_vectorize(cache: PipelineCache | None, image: np.ndarray, image_hash: str | None,
+                         blur_ksize: int = 5, tile_size: int | None = None,
+                         compound: bool = False, subpixel: bool = False) -> tuple[PathSet | None, np.ndarray | None, str | None]:
+    """
+    Etapas de detecção + vetorização, reaproveitando o cache quando a imagem
+    (pelo hash dos pixels) e os parâmetros de detecção não mudaram. Com
+    compound=True, a detecção usa RETR_CCOMP e os furos ficam marcados com
+    PATH_HOLE logo depois do seu contorno externo. Com subpixel=True, os
+    contornos vêm do marching squares (coordenadas float); compound é ignorado.
+
+    Returns:
+        tuple: (caminhos brutos em PathSet ou None se nada foi detectado,
+                imagem limiarizada ou None, chave da etapa para as etapas seguintes).
+    """
+    try:
+        from core import contour_detection, vectorization
+    except ModuleNotFoundError:
+        import contour_detection, vectorization
+
+    if image_hash is None:
+        image_hash = content_hash(image)
+    if subpixel and compound:
+        print("Aviso: caminhos compostos não são suportados pelo extrator sub-pixel; furos exportados como caminhos separados.")
+        compound = False
+    # compound e subpixel só entram na chave quando ativos: as entradas já gravadas continuam válidas
+    options = {name: True for name, enabled in (("compound", compound), ("subpixel", subpixel)) if enabled}
+    key = PipelineCache.stage_key("detection", image_hash, blur_ksize=blur_ksize, tile_size=tile_size, **options)
+    cached = cache.get_path_set(key) if cache is not None else None
+    if cached is not None:
+        path_set, extras = cached
+        print(f"Cache: detecção reaproveitada ({len(path_set)} contornos).")
+        return (path_set if len(path_set) else None), extras.get("threshold_image"), key
+
+    hole_mask = None
+    if subpixel:
+        contours, threshold_image = contour_detection.detect_subpixel_contours(
+            image, blur_ksize_val=blur_ksize, tile_size=tile_size)
+    elif compound:
+        contours, hole_mask, threshold_image = contour_detection.detect_compound_contours(
+            image, blur_ksize_val=blur_ksize, tile_size=tile_size)
+    else:
+        contours, threshold_image = contour_detection.detect_contours(image, blur_ksize_val=blur_ksize, tile_size=tile_size)
+    path_set = (vectorization.vectorize_from_contours(contours, as_path_set=True, hole_mask=hole_mask)
+                if contours else PathSet.empty())
+    if cache is not None:
+        extras = {"threshold_image": threshold_image} if threshold_image is not None else {}
+        cache.put_path_set(key, path_set, **extras)
+    return (path_set if len(path_set) else None), threshold_image, key
+
+def trace_color_layers(cache: PipelineCache | None, image: np.ndarray, image_hash: str | None,
+                       color_count: int, blur_ksize: int = 5, shared_boundaries: bool = False) -> tuple[list[dict], str]:
+    """
+    Etapa do modo paleta (core/color_layers.trace_color_layers), com cache.
+    Todas as camadas ficam em uma única entrada: um PathSet com os caminhos de
+    todas, mais os limites de cada camada e a paleta.
+
+    Returns:
+        tuple: (camadas, chave da etapa).
+    """
+    try:
+        from core import color_layers
+    except ModuleNotFoundError:
+        import color_layers
+
+    if image_hash is None:
+        image_hash = content_hash(image)
+    # shared_boundaries só entra na chave quando ativo: as entradas já gravadas continuam válidas
+    options = {"shared_boundaries": True} if shared_boundaries else {}
+    key = PipelineCache.stage_key("color_layers", image_hash, colors=color_count, blur_ksize=blur_ksize,
+                                  min_area=color_layers.DEFAULT_MIN_AREA, **options)
+    cached = cache.get_path_set(key) if cache is not None else None
+    if cached is not None:
+        path_set, extras = cached
+        layer_offsets = extras["layer_offsets"].tolist()
+        layers = []
+        for index, (blue, green, red) in enumerate(extras["palette"].tolist()):
+            layers.append({"color": (blue, green, red), "fill": f"#{red:02x}{green:02x}{blue:02x}",
+                           "pixels": int(extras["pixels"][index]),
+                           "paths": path_set.subset(np.arange(layer_offsets[index], layer_offsets[index + 1]))})
+        print(f"Cache: camadas de cor reaproveitadas ({len(layers)} camadas).")
+        return layers, key
+
+    layers = color_layers.trace_color_layers(image, color_count, blur_ksize=blur_ksize,
+                                             shared_boundaries=shared_boundaries)
+    if cache is not None:
+        layer_offsets = np.zeros(len(layers) + 1, dtype=np.int64)
+        np.cumsum([len(layer["paths"]) for layer in layers], out=layer_offsets[1:])
+        cache.put_path_set(key, PathSet.concatenate([layer["paths"] for layer in layers]), layer_offsets=layer_offsets,
+                           palette=np.array([layer["color"] for layer in layers], dtype=np.uint8).reshape(-1, 3),
+                           pixels=np.array([layer["pixels"] for layer in layers], dtype=np.int64))
+    return layers, key
+
+def simplification_key(detection_key: str, epsilon: float | None, selected_indices=None, method: str = "rdp",
+                       max_nodes: int | None = None, max_svg_bytes=None, primitives: float | None = None,
+                       dedup: str | None = None) -> str:
+    """
+    Chave da etapa de simplificação (None em selected_indices = todos os contornos).
+    max_svg_bytes é o orçamento em bytes junto com o que mais afeta o tamanho do SVG;
+    primitives (tolerância do reconhecimento de primitivas) e dedup (modo da deduplicação
+    de formas) tiram caminhos da entrada.
+    """
+    selection = None if selected_indices is None else content_hash(np.asarray(selected_indices, dtype=np.int64))
+    # Método e orçamento só entram na chave quando usados: as entradas já gravadas continuam válidas
+    options = {"method": method} if method != "rdp" else {}
+    options.update({name: value for name, value in (("max_nodes", max_nodes), ("max_svg_bytes", max_svg_bytes),
+                                                    ("primitives", primitives), ("dedup", dedup))
+                    if value is not None})
+    return PipelineCache.stage_key("simplification", detection_key,
+                                   epsilon=None if epsilon is None else float(epsilon), selection=selection, **options)